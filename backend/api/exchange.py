@@ -22,29 +22,7 @@ def create_exchange_instance(config: Dict[str, Any]):
         raise ValueError("配置不完整：缺少name或api_key")
     
     try:
-        kwargs = {
-            'testnet': config.get('testnet', False)
-        }
-        
-        # Extended交易所需要额外参数
-        if config['name'].lower() == 'extended':
-            if config.get('public_key'):
-                kwargs['public_key'] = config['public_key']
-            if config.get('private_key'):
-                kwargs['private_key'] = config['private_key']
-            elif config.get('secret_key'):
-                kwargs['private_key'] = config['secret_key']
-            if config.get('vault') is not None:
-                kwargs['vault'] = config['vault']
-            if config.get('default_market'):
-                kwargs['default_market'] = config['default_market']
-        
-        exchange = ExchangeFactory.create(
-            name=config['name'],
-            api_key=config['api_key'],
-            secret_key=config.get('secret_key', ''),
-            **kwargs
-        )
+        exchange = ExchangeFactory.create_from_config(config)
         return exchange
     except Exception as e:
         raise ValueError(f"交易所初始化失败: {str(e)}")
@@ -90,7 +68,7 @@ def get_exchange_instance(exchange_name: Optional[str] = None):
             return exchange
     except Exception as e:
         # 如果从池中获取失败，记录错误但继续尝试创建
-        logger.warning(f"[Exchange] 从实例池获取失败: {e}", exc_info=True)
+        logger.opt(exception=True).warning(f"[Exchange] 从实例池获取失败: {e}")
     
     # 如果池中没有，创建新实例（兜底方案）
     try:
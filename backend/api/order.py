@@ -23,29 +23,7 @@ def get_order_manager():
         )
     
     try:
-        kwargs = {
-            'testnet': config.get('testnet', False)
-        }
-        
-        # Extended交易所需要额外参数
-        if config['name'].lower() == 'extended':
-            if config.get('public_key'):
-                kwargs['public_key'] = config['public_key']
-            if config.get('private_key'):
-                kwargs['private_key'] = config['private_key']
-            elif config.get('secret_key'):
-                kwargs['private_key'] = config['secret_key']
-            if config.get('vault') is not None:
-                kwargs['vault'] = config['vault']
-            if config.get('default_market'):
-                kwargs['default_market'] = config['default_market']
-        
-        exchange = ExchangeFactory.create(
-            name=config['name'],
-            api_key=config['api_key'],
-            secret_key=config.get('secret_key', ''),
-            **kwargs
-        )
+        exchange = ExchangeFactory.create_from_config(config)
         return OrderManager(exchange)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"订单管理器初始化失败: {str(e)}")
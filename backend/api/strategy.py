@@ -328,6 +328,7 @@ async def get_strategy_types():
                     {"name": "min_valid_price", "label": "最低有效价格", "type": "number", "required": False, "default": 10000.0, "step": "1"},
                     {"name": "max_multiplier", "label": "最大开仓倍数", "type": "number", "required": False, "default": 15.0, "step": "0.1"},
                     {"name": "order_cooldown", "label": "订单冷却时间（秒）", "type": "number", "required": False, "default": 1.5, "step": "0.1"},
+                    {"name": "max_cancels_per_cycle", "label": "每周期最多撤单数", "type": "number", "required": False, "default": 10, "min": 1},
                 ]
             }
         ]
@@ -382,7 +383,8 @@ async def start_sliding_window_grid_strategy(
             max_drift_buffer=config.max_drift_buffer,
             min_valid_price=config.min_valid_price,
             max_multiplier=config.max_multiplier,
-            order_cooldown=config.order_cooldown
+            order_cooldown=config.order_cooldown,
+            max_cancels_per_cycle=config.max_cancels_per_cycle
         )
         
         # 先保存策略实例（在启动前保存，这样即使启动失败也能返回策略ID）
@@ -3,6 +3,7 @@ FastAPI主应用
 """
 import warnings
 import os
+import re
 import sys
 
 # 在导入任何模块之前，先抑制所有 ResourceWarning 警告
@@ -14,6 +15,9 @@ warnings.filterwarnings("ignore", category=ResourceWarning)
 os.environ.setdefault("PYTHONWARNINGS", "ignore::ResourceWarning")
 
 # 创建一个过滤器来过滤 stderr 中的 aiohttp 警告
+_AIOHTTP_WARNING_PATTERN = re.compile(r"Unclosed client session|Unclosed connector|Unclosed connection|client_session:|connector:|connections:")
+
+
 class AiohttpWarningFilter:
     """过滤 stderr 中的 aiohttp 未关闭会话警告"""
     def __init__(self, original_stderr):
@@ -24,15 +28,8 @@ class AiohttpWarningFilter:
                 setattr(self, attr, getattr(original_stderr, attr))
     
     def write(self, text):
-        # 过滤掉 aiohttp 相关的未关闭警告
-        if any(keyword in text for keyword in [
-            "Unclosed client session",
-            "Unclosed connector",
-            "Unclosed connection",
-            "client_session:",
-            "connector:",
-            "connections:"
-        ]):
+        # 过滤掉 aiohttp 相关的未关闭警告（正则预编译，匹配在C层完成）
+        if _AIOHTTP_WARNING_PATTERN.search(text):
             return len(text)  # 返回长度但不实际写入
         return self.original_stderr.write(text)
     
@@ -97,7 +94,7 @@ async def lifespan(app: FastAPI):
                         logger.warning(f"✗ 交易所 {exchange_display_name}{testnet_str} 初始化失败：无法获取实例")
                         
                 except Exception as e:
-                    logger.error(f"✗ 交易所 {exchange_name} 初始化失败: {str(e)}", exc_info=True)
+                    logger.opt(exception=True).error(f"✗ 交易所 {exchange_name} 初始化失败: {str(e)}")
             
             logger.info(f"交易所初始化完成，共 {len(all_exchanges)} 个")
         else:
@@ -107,7 +104,7 @@ async def lifespan(app: FastAPI):
         logger.info("应用启动完成")
         logger.info("=" * 60)
     except Exception as e:
-        logger.error(f"启动时初始化交易所失败: {str(e)}", exc_info=True)
+        logger.opt(exception=True).error(f"启动时初始化交易所失败: {str(e)}")
     
     yield
     
@@ -117,7 +114,7 @@ async def lifespan(app: FastAPI):
         ExchangeInstancePool.clear()
         logger.info("已清理所有交易所实例")
     except Exception as e:
-        logger.error(f"清理交易所实例失败: {str(e)}", exc_info=True)
+        logger.opt(exception=True).error(f"清理交易所实例失败: {str(e)}")
     logger.info("应用已关闭")
 
 
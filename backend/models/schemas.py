@@ -78,6 +78,7 @@ class SlidingWindowGridStrategyConfig(BaseModel):
     min_valid_price: Optional[float] = Field(10000.0, description="最低有效价格")
     max_multiplier: Optional[float] = Field(15.0, description="最大开仓倍数")
     order_cooldown: Optional[float] = Field(1.5, description="订单冷却时间（秒）")
+    max_cancels_per_cycle: Optional[int] = Field(10, description="每个周期最多撤单数")
     
     @field_validator('order_size')
     @classmethod
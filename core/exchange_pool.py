@@ -2,8 +2,9 @@
 交易所实例池
 管理交易所实例的创建和复用，避免重复创建连接
 """
+import atexit
 from typing import Dict, Tuple, Optional
-from threading import Lock
+from threading import RLock
 from exchanges.base import BaseExchange
 from exchanges.factory import ExchangeFactory
 from core.order_manager import OrderManager
@@ -20,7 +21,7 @@ class ExchangeInstancePool:
     
     _instances: Dict[str, BaseExchange] = {}
     _managers: Dict[str, Tuple[OrderManager, AccountManager, PositionManager]] = {}
-    _lock = Lock()
+    _lock = RLock()  # 可重入：get_exchange持锁时会调用get_managers
     
     @classmethod
     def get_managers(cls, account_key: str) -> Tuple[OrderManager, AccountManager, PositionManager]:
@@ -57,29 +58,7 @@ class ExchangeInstancePool:
                 testnet = config.get('testnet', False)
                 logger.info(f"[ExchangePool] 正在创建交易所实例: {exchange_name} (account_key: {account_key}, testnet: {testnet})")
                 
-                kwargs = {
-                    'testnet': testnet
-                }
-                
-                # Extended交易所需要额外参数
-                if config['name'].lower() == 'extended':
-                    if config.get('public_key'):
-                        kwargs['public_key'] = config['public_key']
-                    if config.get('private_key'):
-                        kwargs['private_key'] = config['private_key']
-                    elif config.get('secret_key'):
-                        kwargs['private_key'] = config['secret_key']
-                    if config.get('vault') is not None:
-                        kwargs['vault'] = config['vault']
-                    if config.get('default_market'):
-                        kwargs['default_market'] = config['default_market']
-                
-                exchange = ExchangeFactory.create(
-                    name=config['name'],
-                    api_key=config['api_key'],
-                    secret_key=config.get('secret_key', ''),
-                    **kwargs
-                )
+                exchange = ExchangeFactory.create_from_config(config)
                 
                 logger.info(f"[ExchangePool] 交易所实例创建成功: {exchange_name} (account_key: {account_key})")
                 
@@ -99,7 +78,7 @@ class ExchangeInstancePool:
                 return managers
                 
             except Exception as e:
-                logger.error(f"[ExchangePool] 创建交易所实例失败: {account_key}, 错误: {str(e)}", exc_info=True)
+                logger.opt(exception=True).error(f"[ExchangePool] 创建交易所实例失败: {account_key}, 错误: {str(e)}")
                 raise ValueError(f"创建交易所实例失败: {str(e)}")
     
     @classmethod
@@ -146,7 +125,7 @@ class ExchangeInstancePool:
                         exchange.close()
                         logger.info(f"[ExchangePool] 交易所连接已关闭: {account_key}")
                 except Exception as e:
-                    logger.error(f"[ExchangePool] 关闭交易所连接失败: {account_key}, 错误: {str(e)}", exc_info=True)
+                    logger.opt(exception=True).error(f"[ExchangePool] 关闭交易所连接失败: {account_key}, 错误: {str(e)}")
                 del cls._instances[account_key]
                 removed = True
             
@@ -180,3 +159,7 @@ class ExchangeInstancePool:
         with cls._lock:
             return list(cls._instances.keys())
 
+
+# 进程退出时关闭池中的交易所：SDK每个模块持有一个复用的aiohttp会话（keep-alive连接池），
+# 需在其事件循环中关闭，否则退出时会留下未关闭的会话和连接（后端在lifespan中已清理，重复调用无副作用）
+atexit.register(ExchangeInstancePool.clear)
@@ -2,24 +2,53 @@
 订单管理器
 负责订单的创建、查询、取消等操作
 """
+import threading
+import time
 from typing import Dict, List, Optional, Any
 from decimal import Decimal
 from datetime import datetime
 from exchanges.base import BaseExchange
 
 
+class _TokenBucket:
+    """令牌桶限速器（线程安全），acquire在令牌不足时阻塞等待"""
+    
+    def __init__(self, rate: float, per: float = 1.0):
+        self.capacity = float(rate)
+        self.fill_rate = rate / per
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self, tokens: float = 1.0):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.fill_rate)
+                self._last = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.fill_rate
+            time.sleep(wait)
+
+
 class OrderManager:
     """订单管理器"""
     
-    def __init__(self, exchange: BaseExchange):
+    def __init__(self, exchange: BaseExchange, place_rate: float = 400.0, cancel_rate: float = 400.0):
         """
         初始化订单管理器
         
         Args:
             exchange: 交易所实例
+            place_rate: 每秒最多下单数（同账户所有交易对/策略共享）
+            cancel_rate: 每秒最多撤单请求数（同账户所有交易对/策略共享，下单与撤单共用交易所限频额度）
         """
         self.exchange = exchange
         self._local_orders: Dict[str, Dict[str, Any]] = {}  # 本地订单缓存
+        self._place_tokens = _TokenBucket(rate=place_rate, per=1.0)
+        self._cancel_tokens = _TokenBucket(rate=cancel_rate, per=1.0)
     
     def place_order(
         self,
@@ -50,6 +79,7 @@ class OrderManager:
             kwargs['postOnly'] = True
         
         # 调用交易所API下单
+        self._place_tokens.acquire()
         order_result = self.exchange.place_order(
             symbol=symbol,
             side=side,
@@ -60,15 +90,79 @@ class OrderManager:
         )
         
         # 保存到本地缓存
+        self._save_local_order(order_result)
+        
+        return order_result
+    
+    def place_orders(self, orders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        批量下单
+        
+        Args:
+            orders: 下单参数列表，每项包含 symbol, side, order_type, quantity, price 等 place_order 参数
+            
+        Returns:
+            与orders一一对应的订单信息列表，下单失败的项为 {'error': 错误信息}
+        """
+        requests = []
+        for order in orders:
+            order = dict(order)
+            # 与place_order一致：限价单默认post_only=True
+            if order.get('order_type') == 'limit' and 'postOnly' not in order and 'post_only' not in order:
+                order['postOnly'] = True
+            requests.append(order)
+            # 批量下单在交易所侧仍按单笔计数，每笔取一个令牌，只在额度不足时等待
+            self._place_tokens.acquire()
+        
+        results = self.exchange.place_orders(requests)
+        for order_result in results:
+            self._save_local_order(order_result)
+        
+        return results
+    
+    def replace_orders(self, replacements: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        批量改单：用新订单替换旧订单（交易所支持时一次请求完成，否则退化为撤单+下单）
+        
+        Args:
+            replacements: 改单参数列表，每项为 place_orders 的下单参数，另加被替换的旧订单 order_id
+            
+        Returns:
+            与replacements一一对应的新订单信息列表，失败的项为 {'error': 错误信息}
+        """
+        requests = []
+        for replacement in replacements:
+            replacement = dict(replacement)
+            # 与place_order一致：限价单默认post_only=True
+            if replacement.get('order_type') == 'limit' and 'postOnly' not in replacement and 'post_only' not in replacement:
+                replacement['postOnly'] = True
+            requests.append(replacement)
+            self._place_tokens.acquire()
+        
+        results = self.exchange.replace_orders(requests)
+        
+        # 更新本地缓存：新订单写入，被替换的旧订单标记为已撤销
+        now = datetime.now().isoformat()
+        for replacement, order_result in zip(requests, results):
+            if order_result.get('order_id'):
+                self._save_local_order(order_result)
+                old_order_id = replacement['order_id']
+                if old_order_id in self._local_orders:
+                    self._local_orders[old_order_id]['status'] = 'CANCELED'
+                    self._local_orders[old_order_id]['updated_at'] = now
+        
+        return results
+    
+    def _save_local_order(self, order_result: Dict[str, Any]):
+        """保存下单结果到本地缓存"""
         order_id = order_result.get('order_id')
         if order_id:
+            now = datetime.now().isoformat()
             self._local_orders[order_id] = {
                 **order_result,
-                'created_at': datetime.now().isoformat(),
-                'updated_at': datetime.now().isoformat()
+                'created_at': now,
+                'updated_at': now
             }
-        
-        return order_result
     
     def cancel_order(self, symbol: str, order_id: str) -> Dict[str, Any]:
         """
@@ -81,6 +175,7 @@ class OrderManager:
         Returns:
             取消结果
         """
+        self._cancel_tokens.acquire()
         result = self.exchange.cancel_order(symbol, order_id)
         
         # 更新本地缓存
@@ -90,6 +185,32 @@ class OrderManager:
         
         return result
     
+    def cancel_orders(self, symbol: str, order_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        批量取消订单（一次批量撤单请求代替逐个cancel_order）
+        
+        Args:
+            symbol: 交易对符号
+            order_ids: 订单ID列表
+            
+        Returns:
+            与order_ids一一对应的取消结果列表，取消失败的项包含 error
+        """
+        if not order_ids:
+            return []
+        
+        self._cancel_tokens.acquire()
+        results = self.exchange.cancel_orders(symbol, order_ids)
+        
+        # 更新本地缓存
+        now = datetime.now().isoformat()
+        for order_id, result in zip(order_ids, results):
+            if 'error' not in result and order_id in self._local_orders:
+                self._local_orders[order_id]['status'] = 'CANCELED'
+                self._local_orders[order_id]['updated_at'] = now
+        
+        return results
+    
     def get_order(self, symbol: str, order_id: str) -> Dict[str, Any]:
         """
         查询订单
@@ -117,6 +238,34 @@ class OrderManager:
         
         return order
     
+    def get_orders(self, symbol: str, order_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        批量查询订单
+        
+        Args:
+            symbol: 交易对符号
+            order_ids: 订单ID列表
+            
+        Returns:
+            与order_ids一一对应的订单信息列表
+        """
+        orders = self.exchange.get_orders(symbol, order_ids)
+        
+        # 更新本地缓存
+        now = datetime.now().isoformat()
+        for order_id, order in zip(order_ids, orders):
+            if order_id in self._local_orders:
+                self._local_orders[order_id].update(order)
+                self._local_orders[order_id]['updated_at'] = now
+            else:
+                self._local_orders[order_id] = {
+                    **order,
+                    'created_at': now,
+                    'updated_at': now
+                }
+        
+        return orders
+    
     def get_open_orders(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         获取未成交订单列表
@@ -155,17 +304,18 @@ class OrderManager:
             取消结果列表
         """
         open_orders = self.get_open_orders(symbol)
-        results = []
         
+        # 按交易对分组，每个交易对一次批量撤单
+        order_ids_by_symbol: Dict[str, List[str]] = {}
         for order in open_orders:
+            order_ids_by_symbol.setdefault(order['symbol'], []).append(order['order_id'])
+        
+        results = []
+        for order_symbol, order_ids in order_ids_by_symbol.items():
             try:
-                result = self.cancel_order(order['symbol'], order['order_id'])
-                results.append(result)
+                results.extend(self.cancel_orders(order_symbol, order_ids))
             except Exception as e:
-                results.append({
-                    'order_id': order.get('order_id'),
-                    'error': str(e)
-                })
+                results.extend({'order_id': order_id, 'error': str(e)} for order_id in order_ids)
         
         return results
 
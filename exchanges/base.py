@@ -2,14 +2,28 @@
 交易所抽象基类
 定义所有交易所必须实现的统一接口
 """
+import time
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Any
 from decimal import Decimal
 
 
 class BaseExchange(ABC):
     """交易所抽象基类"""
     
+    # 交易所注册名称（小写），子类设置后在定义时自动注册到ExchangeFactory
+    exchange_name: Optional[str] = None
+    # 是否支持一次请求原地改单（新单替换旧单），不支持时replace_orders退化为撤单+下单
+    supports_replace_orders: bool = False
+    
+    def __init_subclass__(cls, **kwargs):
+        """子类定义时按exchange_name自动注册"""
+        super().__init_subclass__(**kwargs)
+        if cls.exchange_name:
+            from exchanges.factory import ExchangeFactory
+            ExchangeFactory.register(cls.exchange_name, cls)
+    
     def __init__(self, api_key: str, secret_key: str, **kwargs):
         """
         初始化交易所
@@ -89,6 +103,27 @@ class BaseExchange(ABC):
         """
         pass
     
+    def place_orders(self, orders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        批量下单（子类可重写为真正的批量接口，默认用线程池并发调用place_order）
+        
+        Args:
+            orders: 下单参数列表，每项为 place_order 的关键字参数
+            
+        Returns:
+            与orders一一对应的订单信息列表，下单失败的项为 {'error': 错误信息}
+        """
+        def _place(order):
+            try:
+                return self.place_order(**order)
+            except Exception as e:
+                return {'error': str(e)}
+        
+        if len(orders) <= 1:
+            return [_place(order) for order in orders]
+        with ThreadPoolExecutor(max_workers=min(8, len(orders))) as executor:
+            return list(executor.map(_place, orders))
+    
     @abstractmethod
     def cancel_order(self, symbol: str, order_id: str) -> Dict[str, Any]:
         """
@@ -103,6 +138,69 @@ class BaseExchange(ABC):
         """
         pass
     
+    def cancel_orders(self, symbol: str, order_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        批量撤单（子类可重写为真正的批量撤单接口，默认用线程池并发调用cancel_order）
+        
+        Args:
+            symbol: 交易对符号
+            order_ids: 订单ID列表
+            
+        Returns:
+            与order_ids一一对应的撤单结果列表，撤单失败的项为 {'order_id': 订单ID, 'error': 错误信息}
+        """
+        def _cancel(order_id):
+            try:
+                return self.cancel_order(symbol, order_id)
+            except Exception as e:
+                return {'order_id': order_id, 'error': str(e)}
+        
+        if len(order_ids) <= 1:
+            return [_cancel(order_id) for order_id in order_ids]
+        with ThreadPoolExecutor(max_workers=min(8, len(order_ids))) as executor:
+            return list(executor.map(_cancel, order_ids))
+    
+    def replace_orders(self, replacements: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        批量改单：用新订单替换旧订单（子类可重写为交易所原生的改单接口）
+        
+        默认实现先按交易对批量撤销旧订单，再批量下新单；旧订单撤销失败的项不会下新单
+        
+        Args:
+            replacements: 改单参数列表，每项为 place_order 的关键字参数，另加被替换的旧订单 order_id
+            
+        Returns:
+            与replacements一一对应的新订单信息列表，失败的项为 {'error': 错误信息}
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(replacements)
+        
+        indexes_by_symbol: Dict[str, List[int]] = {}
+        for i, replacement in enumerate(replacements):
+            indexes_by_symbol.setdefault(replacement['symbol'], []).append(i)
+        
+        place_indexes = []
+        for symbol, indexes in indexes_by_symbol.items():
+            try:
+                cancel_results = self.cancel_orders(symbol, [replacements[i]['order_id'] for i in indexes])
+            except Exception as e:
+                cancel_results = [{'error': str(e)}] * len(indexes)
+            for i, cancel_result in zip(indexes, cancel_results):
+                if 'error' in cancel_result:
+                    results[i] = {'error': f"撤销旧订单失败: {cancel_result['error']}"}
+                else:
+                    place_indexes.append(i)
+        
+        if place_indexes:
+            orders = []
+            for i in place_indexes:
+                order = dict(replacements[i])
+                del order['order_id']
+                orders.append(order)
+            for i, result in zip(place_indexes, self.place_orders(orders)):
+                results[i] = result
+        
+        return results
+    
     @abstractmethod
     def get_order(self, symbol: str, order_id: str) -> Dict[str, Any]:
         """
@@ -117,6 +215,19 @@ class BaseExchange(ABC):
         """
         pass
     
+    def get_orders(self, symbol: str, order_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        批量查询订单（子类可重写为真正的批量实现）
+        
+        Args:
+            symbol: 交易对符号
+            order_ids: 订单ID列表
+            
+        Returns:
+            与order_ids一一对应的订单信息列表
+        """
+        return [self.get_order(symbol, order_id) for order_id in order_ids]
+    
     @abstractmethod
     def get_open_orders(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
         """
@@ -154,6 +265,97 @@ class BaseExchange(ABC):
         """
         pass
     
+    def watch_bbo(self, symbol: str, callback: Callable[[Decimal, Decimal], None]) -> bool:
+        """
+        订阅最优买卖价推送（子类可重写为WebSocket实现）
+        
+        Args:
+            symbol: 交易对符号
+            callback: 最优买卖价变化时调用 callback(bid_price, ask_price)
+            
+        Returns:
+            是否已订阅，不支持推送时返回False（调用方应退回到轮询）
+        """
+        return False
+    
+    def unwatch_bbo(self, symbol: str, callback: Callable[[Decimal, Decimal], None]):
+        """
+        取消最优买卖价推送订阅（子类可重写，默认无操作）
+        
+        Args:
+            symbol: 交易对符号
+            callback: 订阅时传入的回调
+        """
+        pass
+    
+    def watch_orders(self, callback: Callable[[List[Dict[str, Any]]], None]) -> bool:
+        """
+        订阅订单状态推送（子类可重写为WebSocket实现）
+        
+        Args:
+            callback: 订单状态变化时调用 callback(订单信息列表)
+            
+        Returns:
+            是否已订阅，不支持推送时返回False（调用方应退回到轮询）
+        """
+        return False
+    
+    def unwatch_orders(self, callback: Callable[[List[Dict[str, Any]]], None]):
+        """
+        取消订单状态推送订阅（子类可重写，默认无操作）
+        
+        Args:
+            callback: 订阅时传入的回调
+        """
+        pass
+    
+    def wait_for_order(self, symbol: str, order_id: str, state: str = 'open', timeout: float = 5.0) -> bool:
+        """
+        等待订单进入指定状态（子类可重写为由订单推送唤醒，默认每0.2秒轮询一次未成交订单）
+        
+        Args:
+            symbol: 交易对符号
+            order_id: 订单ID
+            state: 'open' 等待订单出现在未成交订单中，'canceled' 等待订单不在未成交订单中
+            timeout: 最长等待时间（秒）
+            
+        Returns:
+            超时前是否已达到指定状态
+        """
+        want_open = state == 'open'
+        deadline = time.monotonic() + timeout
+        while True:
+            is_open = any(order.get('order_id') == order_id for order in self.get_open_orders(symbol))
+            if is_open == want_open:
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(0.2, remaining))
+    
+    def warmup(self, symbol: str) -> Dict[str, Any]:
+        """
+        并发预热行情和未成交订单（首次请求的连接建立、缓存填充互相重叠，总耗时取最慢的一个）
+        
+        Args:
+            symbol: 交易对符号
+            
+        Returns:
+            {'ticker': 行情, 'open_orders': 未成交订单列表}，获取失败的项为 {'error': 错误信息}
+        """
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = {
+                'ticker': executor.submit(self.get_ticker, symbol),
+                'open_orders': executor.submit(self.get_open_orders, symbol),
+            }
+        results = {}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                results[name] = {'error': str(e)}
+        return results
+    
     def normalize_symbol(self, symbol: str) -> str:
         """
         标准化交易对符号（子类可重写）
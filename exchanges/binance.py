@@ -5,12 +5,13 @@
 from typing import Dict, List, Optional, Any
 from decimal import Decimal
 from exchanges.base import BaseExchange
-from exchanges.factory import ExchangeFactory
 
 
 class BinanceExchange(BaseExchange):
     """币安交易所实现"""
     
+    exchange_name = 'binance'
+    
     def __init__(self, api_key: str, secret_key: str, **kwargs):
         """
         初始化币安交易所
@@ -131,7 +132,3 @@ class BinanceExchange(BaseExchange):
         # 移除斜杠并转大写
         return symbol.replace('/', '').upper()
 
-
-# 注册币安交易所
-ExchangeFactory.register('binance', BinanceExchange)
-
@@ -3,14 +3,17 @@ Extended交易所实现
 基于jiaoyisuoshili/extended.py的Extended类
 """
 import asyncio
+import functools
+import operator
 import sys
 import queue
 import threading
+import time
 import traceback
-from typing import Dict, List, Optional, Any
+from sys import intern
+from typing import Callable, Dict, List, Optional, Any, Tuple
 from decimal import Decimal
 from exchanges.base import BaseExchange
-from exchanges.factory import ExchangeFactory
 
 # 导入Extended交易所封装
 try:
@@ -37,9 +40,101 @@ except ImportError as e:
     Extended = None
 
 
+_ZERO = Decimal('0')
+
+# 持仓方向映射（交易所position_side -> 统一的side）
+_POSITION_SIDE_MAP = {'LONG': 'long', 'SHORT': 'short'}
+
+# 交易对分隔符转换表（BTC/USDT -> BTC-USDT）
+_SYMBOL_TRANS = str.maketrans({'/': '-'})
+
+# 下单返回时需要从订单对象上读取的字段（一次C调用取出全部属性）
+_ORDER_ATTRS = operator.attrgetter(
+    'order_id', 'side_lower', 'type_lower', 'quantity', 'price_or_none', 'status',
+    'time_in_force', 'executed_qty', 'avg_price', 'time', 'update_time'
+)
+
+
+@functools.lru_cache(maxsize=1024)
+def _normalize_symbol(symbol: str) -> str:
+    """交易对标准化（结果缓存，交易对集合很小，命中率接近100%）"""
+    # Extended使用BTC-USD格式，而不是BTC/USDT
+    symbol = symbol.translate(_SYMBOL_TRANS).upper()
+    # 如果包含USDT，转换为USD
+    return symbol[:-5] + '-USD' if symbol.endswith('-USDT') else symbol
+
+
+def _format_order_dict(order: Any, symbol: str) -> Dict[str, Any]:
+    """将Extended订单对象转换为统一的订单字典"""
+    # side/type的小写形式和price的空值处理已在ExtendedOrder构造时完成
+    # order_id和status驻留（intern），策略侧用集合/字典比较时可走指针相等的快速路径
+    return {
+        'order_id': intern(str(order.order_id)),
+        'client_order_id': order.client_order_id,
+        'symbol': symbol,
+        'side': order.side_lower,
+        'type': order.type_lower,
+        'quantity': order.quantity,
+        'price': order.price_or_none,
+        'status': intern(order.status),
+        'executed_qty': order.executed_qty,
+        'avg_price': order.avg_price,
+        'time': order.time,
+        'update_time': order.update_time
+    }
+
+
+def _to_decimal(value: Any) -> Decimal:
+    """转换为Decimal（已是Decimal时直接复用，避免字符串往返）"""
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def _normalize_position(position: Any, symbol: str) -> Dict[str, Any]:
+    """将Extended持仓对象转换为统一的持仓字典"""
+    # 解析持仓数量
+    position_amt = _to_decimal(position.position_amt)
+    entry_price = _to_decimal(position.entry_price) if position.entry_price else _ZERO
+    unrealized_pnl = _to_decimal(position.unrealized_profit) if position.unrealized_profit else _ZERO
+    
+    # 优先使用 position_side 字段判断方向（Extended交易所使用此字段）
+    # 如果 position_side 不是 LONG/SHORT 或不可用，再根据 position_amt 的正负判断：正数为多单，负数为空单
+    position_side = getattr(position, 'position_side', 'BOTH')
+    side = _POSITION_SIDE_MAP.get(str(position_side).upper()) if position_side else None
+    if side is None:
+        side = ('short', 'none', 'long')[(position_amt > 0) - (position_amt < 0) + 1]
+    
+    # 如果判断为空单，但 position_amt 为正数，需要将 quantity 转为负数
+    # 这样前端显示时会更直观
+    if side == 'short' and position_amt > 0:
+        position_amt = -position_amt
+    
+    return {
+        'symbol': symbol,
+        'quantity': position_amt,
+        'avg_price': entry_price,
+        'unrealized_pnl': unrealized_pnl,
+        'side': side,  # 持仓方向：long(多单), short(空单), none(无持仓)
+        'leverage': str(getattr(position, 'leverage', 1)),
+        'position_side': position_side
+    }
+
+
+def _unknown_order_dict(order_id: str, symbol: str) -> Dict[str, Any]:
+    """未找到订单时返回的统一结构"""
+    return {
+        'order_id': order_id,
+        'symbol': symbol,
+        'status': 'UNKNOWN',
+        'message': '订单未找到或已成交'
+    }
+
+
 class ExtendedExchange(BaseExchange):
     """Extended交易所实现"""
     
+    exchange_name = 'extended'
+    supports_replace_orders = True
+    
     def __init__(self, api_key: str, secret_key: str, **kwargs):
         """
         初始化Extended交易所
@@ -88,6 +183,11 @@ class ExtendedExchange(BaseExchange):
         # 订单WebSocket订阅标志
         self._orders_subscribed = False
         
+        # 推送订阅：(交易对, 调用方回调) -> 注册到客户端的包装回调，取消订阅时据此移除
+        self._bbo_watchers: Dict[Tuple[str, Callable], Callable] = {}
+        self._order_watchers: Dict[Callable, Callable] = {}
+        self._watchers_lock = threading.Lock()
+        
         # 持久的事件循环和线程，用于处理所有 API 调用
         self._api_loop: Optional[asyncio.AbstractEventLoop] = None
         self._api_thread: Optional[threading.Thread] = None
@@ -129,7 +229,6 @@ class ExtendedExchange(BaseExchange):
                                 print(f"[Extended] 在持久事件循环中初始化成功")
                         except Exception as init_err:
                             print(f"[Extended] 在持久事件循环中初始化失败: {init_err}")
-                            import traceback
                             traceback.print_exc()
                             # 即使初始化失败，也继续运行事件循环，后续调用可以重试
                     
@@ -139,7 +238,6 @@ class ExtendedExchange(BaseExchange):
                     new_loop.run_forever()
                 except Exception as e:
                     print(f"[Extended] API事件循环错误: {e}")
-                    import traceback
                     traceback.print_exc()
                 finally:
                     try:
@@ -152,12 +250,21 @@ class ExtendedExchange(BaseExchange):
             self._api_thread = threading.Thread(target=run_api_loop, daemon=True)
             self._api_thread.start()
             # 等待事件循环启动
-            import time
             time.sleep(0.5)
             print(f"[Extended] 已启动API事件循环线程")
     
     def _run_async(self, coro):
         """运行异步函数（同步包装）"""
+        # 如果调用方本身就运行在API事件循环中（例如WebSocket回调），同步阻塞等待会卡死事件循环，
+        # 这种情况下应直接await对应的异步接口（aget_open_orders / aget_position）
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is not None and running_loop is getattr(self, '_api_loop', None):
+            coro.close()
+            raise RuntimeError("不能在API事件循环内调用同步接口，请直接await对应的异步接口（如aget_open_orders）")
+        
         # 检查属性是否存在（防止在对象销毁时调用）
         if not hasattr(self, '_api_loop_lock'):
             # 如果属性不存在，直接使用回退方式（每次创建新事件循环）
@@ -168,7 +275,6 @@ class ExtendedExchange(BaseExchange):
             if not hasattr(self, '_api_loop') or self._api_loop is None or not self._api_loop.is_running():
                 self._start_api_event_loop()
                 # 等待事件循环启动
-                import time
                 max_wait = 10
                 waited = 0
                 while (not hasattr(self, '_api_loop') or self._api_loop is None or not self._api_loop.is_running()) and waited < max_wait:
@@ -418,12 +524,7 @@ class ExtendedExchange(BaseExchange):
     
     def normalize_symbol(self, symbol: str) -> str:
         """Extended交易对标准化（如 BTC/USDT -> BTC-USD）"""
-        # Extended使用BTC-USD格式，而不是BTC/USDT
-        symbol = symbol.replace('/', '-').upper()
-        # 如果包含USDT，转换为USD
-        if symbol.endswith('-USDT'):
-            symbol = symbol.replace('-USDT', '-USD')
-        return symbol
+        return _normalize_symbol(symbol)
     
     def get_balance(self, currency: Optional[str] = None) -> Dict[str, Any]:
         """获取账户余额（基于 account 快照，和旧实现保持一致）
@@ -443,11 +544,9 @@ class ExtendedExchange(BaseExchange):
                     if asset.asset.upper() == currency.upper():
                         return {
                             "currency": asset.asset,
-                            "available": asset.available_balance,
-                            "frozen": str(
-                                Decimal(asset.wallet_balance) - Decimal(asset.available_balance)
-                            ),
-                            "total": asset.wallet_balance,
+                            "available": str(asset.available_balance),
+                            "frozen": str(asset.wallet_balance - asset.available_balance),
+                            "total": str(asset.wallet_balance),
                         }
                 # 未找到该币种，返回 0
                 return {
@@ -463,11 +562,9 @@ class ExtendedExchange(BaseExchange):
                 main_asset = assets[0]
                 return {
                     "currency": main_asset.asset,
-                    "available": main_asset.available_balance,
-                    "frozen": str(
-                        Decimal(main_asset.wallet_balance) - Decimal(main_asset.available_balance)
-                    ),
-                    "total": main_asset.wallet_balance,
+                    "available": str(main_asset.available_balance),
+                    "frozen": str(main_asset.wallet_balance - main_asset.available_balance),
+                    "total": str(main_asset.wallet_balance),
                 }
 
             # 如果没有资产列表，退回到账户快照的总余额字段
@@ -516,7 +613,6 @@ class ExtendedExchange(BaseExchange):
             except Exception as e:
                 # 获取 ticker 失败时，记录日志并返回一个安全的默认值
                 print(f"[Extended] 获取 ticker 失败: {e}")
-                import traceback
                 traceback.print_exc()
                 return {
                     'symbol': normalized_symbol,
@@ -552,7 +648,6 @@ class ExtendedExchange(BaseExchange):
             except Exception as e:
                 # 如果订单簿获取失败，使用 ticker 的 last_price 作为 fallback
                 print(f"[Extended] 获取订单簿失败，使用 last_price 作为买1/卖1价格: {e}")
-                import traceback
                 traceback.print_exc()
             
             return {
@@ -580,7 +675,6 @@ class ExtendedExchange(BaseExchange):
             except Exception:
                 pass
             print(f"[Extended] _run_async 执行 get_ticker 失败: {e}")
-            import traceback
             traceback.print_exc()
             return {
                 'symbol': normalized_symbol,
@@ -627,56 +721,89 @@ class ExtendedExchange(BaseExchange):
         **kwargs
     ) -> Dict[str, Any]:
         """下单"""
+        if order_type == 'limit' and price is None:
+            raise ValueError("限价单必须指定价格")
+        
+        return self._run_async(self.aplace_order(symbol, side, order_type, quantity, price, post_only, **kwargs))
+    
+    def place_orders(self, orders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        批量下单（在API事件循环中并发提交，总耗时约为单笔下单的耗时）
+        
+        Args:
+            orders: 下单参数列表，每项为 place_order 的关键字参数
+        
+        Returns:
+            与orders一一对应的订单信息列表，下单失败的项为 {'error': 错误信息}
+        """
+        async def _place_orders():
+            results = await asyncio.gather(
+                *(self.aplace_order(**order) for order in orders),
+                return_exceptions=True
+            )
+            return [{'error': str(r)} if isinstance(r, Exception) else r for r in results]
+        
+        return self._run_async(_place_orders())
+    
+    async def aplace_order(
+        self,
+        symbol: str,
+        side: str,
+        order_type: str,
+        quantity: Decimal,
+        price: Optional[Decimal] = None,
+        post_only: bool = False,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """下单（异步版本，供已运行在API事件循环中的调用方直接await）"""
         normalized_symbol = self.normalize_symbol(symbol)
         
         if order_type == 'limit' and price is None:
             raise ValueError("限价单必须指定价格")
         
-        async def _place_order():
-            # 转换side格式（buy/sell -> BUY/SELL）
-            side_upper = side.upper()
-            if side_upper not in ['BUY', 'SELL']:
-                raise ValueError(f"不支持的订单方向: {side}")
-            
-            # 转换order_type格式
-            order_type_upper = order_type.upper()
-            if order_type_upper not in ['LIMIT', 'MARKET']:
-                raise ValueError(f"不支持的订单类型: {order_type}")
-            
-            # 对于限价单，如果没有明确指定postOnly，默认设置为True（确保挂单而不是立即成交）
-            if order_type_upper == 'LIMIT' and 'postOnly' not in kwargs and 'post_only' not in kwargs:
-                kwargs['postOnly'] = True
-            
-            # 如果传入了post_only参数，也传递到kwargs
-            if post_only:
-                kwargs['postOnly'] = True
-            
-            # 创建订单
-            order = await self.extended_client.create_order(
-                symbol=normalized_symbol,
-                side=side_upper,
-                order_type=order_type_upper,
-                quantity=float(quantity),
-                price=float(price) if price else None,
-                params=kwargs
-            )
-            
-            return {
-                'order_id': str(order.order_id),
-                'symbol': normalized_symbol,
-                'side': order.side.lower(),
-                'type': order.type.lower(),
-                'quantity': order.quantity,
-                'price': order.price if order.price != "0" else None,
-                'status': order.status,
-                'time_in_force': order.time_in_force,
-                'executed_qty': order.executed_qty,
-                'avg_price': order.avg_price,
-                'time': order.time,
-                'update_time': order.update_time
-            }
+        # 转换side格式（buy/sell -> BUY/SELL）
+        side_upper = side.upper()
+        if side_upper not in ('BUY', 'SELL'):
+            raise ValueError(f"不支持的订单方向: {side}")
+        
+        # 转换order_type格式
+        order_type_upper = order_type.upper()
+        if order_type_upper not in ('LIMIT', 'MARKET'):
+            raise ValueError(f"不支持的订单类型: {order_type}")
+        
+        # 显式传入post_only时强制挂单；限价单未指定postOnly时默认为True（确保挂单而不是立即成交）
+        # post_only是具名参数，不会出现在kwargs中，只需检查postOnly
+        if post_only:
+            kwargs['postOnly'] = True
+        elif order_type_upper == 'LIMIT':
+            kwargs.setdefault('postOnly', True)
         
-        return self._run_async(_place_order())
+        # 创建订单
+        order = await self.extended_client.create_order(
+            symbol=normalized_symbol,
+            side=side_upper,
+            order_type=order_type_upper,
+            quantity=float(quantity),
+            price=float(price) if price else None,
+            params=kwargs
+        )
+        
+        (order_id, side_v, type_v, qty, price_v, status, tif,
+         executed_qty, avg_price, created_time, update_time) = _ORDER_ATTRS(order)
+        return {
+            'order_id': str(order_id),
+            'symbol': normalized_symbol,
+            'side': side_v,
+            'type': type_v,
+            'quantity': qty,
+            'price': price_v,
+            'status': status,
+            'time_in_force': tif,
+            'executed_qty': executed_qty,
+            'avg_price': avg_price,
+            'time': created_time,
+            'update_time': update_time
+        }
     
     def cancel_order(self, symbol: str, order_id: str) -> Dict[str, Any]:
         """取消订单"""
@@ -686,13 +813,13 @@ class ExtendedExchange(BaseExchange):
             try:
                 order_id_int = int(order_id)
             except ValueError:
-                # 如果不是数字，尝试通过client_order_id取消
+                # 如果不是数字，尝试通过client_order_id取消（未在缓存中时按external_id直接撤单，返回的order_id为空）
                 order = await self.extended_client.cancel_order(
                     symbol=normalized_symbol,
                     client_order_id=order_id
                 )
                 return {
-                    'order_id': str(order.order_id),
+                    'order_id': str(order.order_id) if order.order_id else order_id,
                     'symbol': normalized_symbol,
                     'status': 'CANCELED'
                 }
@@ -710,70 +837,164 @@ class ExtendedExchange(BaseExchange):
         
         return self._run_async(_cancel_order())
     
+    def cancel_orders(self, symbol: str, order_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        批量撤单（通过mass_cancel一次请求撤销，代替逐个cancel_order）
+        
+        Args:
+            symbol: 交易对符号
+            order_ids: 订单ID列表（也可以是client_order_id）
+        
+        Returns:
+            与order_ids一一对应的撤单结果列表，撤单失败的项为 {'order_id': 订单ID, 'error': 错误信息}
+        """
+        normalized_symbol = self.normalize_symbol(symbol)
+        
+        async def _cancel_orders():
+            by_client_id = self.extended_client.client_order_id_to_order_id
+            resolved = []
+            for order_id in order_ids:
+                try:
+                    resolved.append(int(order_id))
+                except ValueError:
+                    # 通过client_order_id二级索引查找
+                    resolved.append(by_client_id.get(order_id))
+            
+            try:
+                cancelled = await self.extended_client.cancel_orders(
+                    normalized_symbol, [i for i in resolved if i is not None]
+                )
+                cancelled_ids = {order['orderId'] for order in cancelled}
+                error = '撤单失败'
+            except Exception as e:
+                cancelled_ids = set()
+                error = str(e)
+            
+            # 索引中找不到的client_order_id直接按external_id并发撤单，无需先刷新订单缓存
+            unresolved = [order_id for order_id, order_id_int in zip(order_ids, resolved) if order_id_int is None]
+            external_results = dict(zip(unresolved, await asyncio.gather(
+                *(self.extended_client.cancel_order(symbol=normalized_symbol, client_order_id=order_id)
+                  for order_id in unresolved),
+                return_exceptions=True
+            )))
+            
+            results = []
+            for order_id, order_id_int in zip(order_ids, resolved):
+                if order_id_int is None:
+                    external_result = external_results[order_id]
+                    if isinstance(external_result, Exception):
+                        results.append({'order_id': order_id, 'error': str(external_result)})
+                    else:
+                        results.append({'order_id': order_id, 'symbol': normalized_symbol, 'status': 'CANCELED'})
+                elif order_id_int in cancelled_ids:
+                    results.append({
+                        'order_id': str(order_id_int),
+                        'symbol': normalized_symbol,
+                        'status': 'CANCELED'
+                    })
+                else:
+                    results.append({'order_id': order_id, 'error': error})
+            return results
+        
+        return self._run_async(_cancel_orders())
+    
+    def replace_orders(self, replacements: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        批量改单（Extended下单时携带旧订单的client_order_id，新单与撤销旧单在同一请求中完成，全部并发提交）
+        
+        Args:
+            replacements: 改单参数列表，每项为 place_order 的关键字参数，另加被替换的旧订单 order_id（也可以是client_order_id）
+        
+        Returns:
+            与replacements一一对应的新订单信息列表，失败的项为 {'error': 错误信息}
+        """
+        async def _replace_order(replacement):
+            order = dict(replacement)
+            old_order_id = order.pop('order_id')
+            try:
+                cached = self.extended_client.open_orders.get(int(old_order_id))
+                previous_client_order_id = cached.client_order_id if cached else None
+            except ValueError:
+                previous_client_order_id = old_order_id
+            
+            if not previous_client_order_id:
+                # 缓存中找不到旧订单的client_order_id时退化为先撤单再下单
+                await self.extended_client.cancel_order(
+                    symbol=self.normalize_symbol(order['symbol']),
+                    order_id=int(old_order_id)
+                )
+            else:
+                order['previousClientOrderId'] = previous_client_order_id
+            return await self.aplace_order(**order)
+        
+        async def _replace_orders():
+            results = await asyncio.gather(
+                *(_replace_order(replacement) for replacement in replacements),
+                return_exceptions=True
+            )
+            return [{'error': str(r)} if isinstance(r, Exception) else r for r in results]
+        
+        return self._run_async(_replace_orders())
+    
     def get_order(self, symbol: str, order_id: str) -> Dict[str, Any]:
         """查询订单"""
         normalized_symbol = self.normalize_symbol(symbol)
         
         async def _get_order():
-            # 先获取所有未成交订单
-            open_orders = await self.extended_client.get_open_orders(normalized_symbol)
+            # 先刷新未成交订单（会同步更新客户端按order_id索引的open_orders缓存）
+            await self.extended_client.get_open_orders(normalized_symbol)
             
-            # 查找指定订单
+            # 查找指定订单（open_orders缓存以order_id为键，O(1)查找；单次get是原子的，无需加锁）
             try:
                 order_id_int = int(order_id)
             except ValueError:
-                # 通过client_order_id查找
-                for order in open_orders:
-                    if order.client_order_id == order_id:
-                        # side和type已经是字符串（从_format_order中通过.value获取）
-                        side_str = order.side.lower() if isinstance(order.side, str) else str(order.side).lower()
-                        type_str = order.type.lower() if isinstance(order.type, str) else str(order.type).lower()
-                        return {
-                            'order_id': str(order.order_id),
-                            'client_order_id': order.client_order_id,
-                            'symbol': normalized_symbol,
-                            'side': side_str,
-                            'type': type_str,
-                            'quantity': order.quantity,
-                            'price': order.price if order.price != "0" else None,
-                            'status': order.status,
-                            'executed_qty': order.executed_qty,
-                            'avg_price': order.avg_price,
-                            'time': order.time,
-                            'update_time': order.update_time
-                        }
-            else:
-                # 通过order_id查找
-                for order in open_orders:
-                    if order.order_id == order_id_int:
-                        # side和type已经是字符串（从_format_order中通过.value获取）
-                        side_str = order.side.lower() if isinstance(order.side, str) else str(order.side).lower()
-                        type_str = order.type.lower() if isinstance(order.type, str) else str(order.type).lower()
-                        return {
-                            'order_id': str(order.order_id),
-                            'client_order_id': order.client_order_id,
-                            'symbol': normalized_symbol,
-                            'side': side_str,
-                            'type': type_str,
-                            'quantity': order.quantity,
-                            'price': order.price if order.price != "0" else None,
-                            'status': order.status,
-                            'executed_qty': order.executed_qty,
-                            'avg_price': order.avg_price,
-                            'time': order.time,
-                            'update_time': order.update_time
-                        }
+                # 通过client_order_id二级索引查找
+                order_id_int = self.extended_client.client_order_id_to_order_id.get(order_id)
+            order = self.extended_client.open_orders.get(order_id_int)
+            if order is not None and order.symbol != normalized_symbol:
+                order = None
+            
+            if order is not None:
+                return _format_order_dict(order, normalized_symbol)
             
             # 如果未找到，返回未知状态
-            return {
-                'order_id': order_id,
-                'symbol': normalized_symbol,
-                'status': 'UNKNOWN',
-                'message': '订单未找到或已成交'
-            }
+            return _unknown_order_dict(order_id, normalized_symbol)
         
         return self._run_async(_get_order())
     
+    def get_orders(self, symbol: str, order_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        批量查询订单（只刷新一次订单缓存并只加锁一次）
+        
+        Args:
+            symbol: 交易对符号
+            order_ids: 订单ID列表（也可以是client_order_id）
+        
+        Returns:
+            与order_ids一一对应的订单信息列表，未找到的订单状态为UNKNOWN
+        """
+        normalized_symbol = self.normalize_symbol(symbol)
+        
+        async def _get_orders():
+            await self.extended_client.get_open_orders(normalized_symbol)
+            results = []
+            # 取一次引用：缓存刷新时整体替换，本次查询始终基于同一份数据
+            index = self.extended_client.open_orders
+            by_client_id = self.extended_client.client_order_id_to_order_id
+            for order_id in order_ids:
+                try:
+                    order = index.get(int(order_id))
+                except ValueError:
+                    # 通过client_order_id二级索引查找
+                    order = index.get(by_client_id.get(order_id))
+                if order is not None and order.symbol == normalized_symbol:
+                    results.append(_format_order_dict(order, normalized_symbol))
+                else:
+                    results.append(_unknown_order_dict(order_id, normalized_symbol))
+            return results
+        
+        return self._run_async(_get_orders())
+    
     def get_open_orders(self, symbol: Optional[str] = None, use_cache: bool = True) -> List[Dict[str, Any]]:
         """
         获取未成交订单列表（优先使用缓存，避免API限速）
@@ -785,165 +1006,182 @@ class ExtendedExchange(BaseExchange):
         Returns:
             未成交订单列表
         """
+        self._ensure_orders_subscribed()
+        return self._run_async(self.aget_open_orders(symbol, use_cache=use_cache))
+    
+    async def aget_open_orders(self, symbol: Optional[str] = None, use_cache: bool = True) -> List[Dict[str, Any]]:
+        """
+        获取未成交订单列表（异步版本，供已运行在API事件循环中的调用方直接await）
         
-        # 启动订单WebSocket订阅（如果还没有启动）
-        if not self._orders_subscribed:
-            try:
-                # 注册订单更新回调（这会启动后台轮询）
-                def on_orders_update(orders):
-                    """订单更新回调（用于保持缓存最新）"""
-                    pass  # 缓存已在get_open_orders中更新
-                
-                self.extended_client.watch_order(on_orders_update)
-                self._orders_subscribed = True
-                print(f"[Extended] 已启动订单WebSocket订阅（后台轮询，每5秒更新一次）")
-            except Exception as e:
-                print(f"[Extended] 启动订单订阅失败: {e}，将使用REST API")
+        Args:
+            symbol: 交易对符号，None表示获取所有交易对的订单
+            use_cache: 是否使用缓存，如果缓存有效且在TTL内，直接返回缓存数据
         
-        async def _get_open_orders():
-            # 优先使用缓存（如果启用）
-            if symbol:
-                normalized_symbol = self.normalize_symbol(symbol)
-                orders = await self.extended_client.get_open_orders(normalized_symbol, use_cache=use_cache)
-            else:
-                # 获取所有交易对的订单
-                # 如果使用缓存，直接从缓存获取
-                if use_cache:
-                    import time
-                    current_time = time.time()
-                    cache_valid = (
-                        self.extended_client.orders_cache_timestamp > 0 and
-                        (current_time - self.extended_client.orders_cache_timestamp) < self.extended_client.orders_cache_ttl
-                    )
-                    
-                    if cache_valid:
-                        # 从缓存获取所有订单
-                        with self.extended_client.lock:
-                            all_orders = list(self.extended_client.open_orders.values())
-                        # 只返回未成交订单
-                        orders = [order for order in all_orders if order.status in ['NEW', 'PARTIALLY_FILLED']]
-                    else:
-                        # 缓存无效，使用REST API
-                        markets = await self.extended_client.get_markets()
-                        all_orders = []
-                        for market_symbol in markets.keys():
-                            try:
-                                market_orders = await self.extended_client.get_open_orders(market_symbol, use_cache=False)
-                                all_orders.extend(market_orders)
-                            except Exception:
-                                continue
-                        orders = all_orders
+        Returns:
+            未成交订单列表
+        """
+        self._ensure_orders_subscribed()
+        
+        # 优先使用缓存（如果启用）
+        if symbol:
+            normalized_symbol = self.normalize_symbol(symbol)
+            orders = await self.extended_client.get_open_orders(normalized_symbol, use_cache=use_cache)
+        else:
+            # 获取所有交易对的订单
+            # 如果使用缓存，直接从缓存获取
+            if use_cache:
+                # 订单流已连接时缓存实时有效；否则按自适应TTL判断
+                cache_valid = self.extended_client.orders_ws_subscribed or \
+                    self.extended_client.orders_cache_valid(time.monotonic())
+                
+                if cache_valid:
+                    # 从缓存快照获取所有订单（只包含未成交订单，无需再按状态过滤，也无需加锁）
+                    return [
+                        _format_order_dict(order, order.symbol)
+                        for order in self.extended_client.open_orders_snapshot
+                    ]
                 else:
-                    # 不使用缓存，直接使用REST API
-                    markets = await self.extended_client.get_markets()
-                    all_orders = []
-                    for market_symbol in markets.keys():
-                        try:
-                            market_orders = await self.extended_client.get_open_orders(market_symbol, use_cache=False)
-                            all_orders.extend(market_orders)
-                        except Exception:
-                            continue
-                    orders = all_orders
-            
-            result = []
-            for order in orders:
-                # side和type已经是字符串（从_format_order中通过.value获取）
-                side_str = order.side.lower() if isinstance(order.side, str) else str(order.side).lower()
-                type_str = order.type.lower() if isinstance(order.type, str) else str(order.type).lower()
-                result.append({
-                    'order_id': str(order.order_id),
-                    'client_order_id': order.client_order_id,
-                    'symbol': order.symbol,
-                    'side': side_str,
-                    'type': type_str,
-                    'quantity': order.quantity,
-                    'price': order.price if order.price != "0" else None,
-                    'status': order.status,
-                    'executed_qty': order.executed_qty,
-                    'avg_price': order.avg_price,
-                    'time': order.time,
-                    'update_time': order.update_time
-                })
+                    # 缓存无效，使用REST API
+                    orders = await self._fetch_all_market_orders()
+            else:
+                # 不使用缓存，直接使用REST API
+                orders = await self._fetch_all_market_orders()
+        
+        return [_format_order_dict(order, order.symbol) for order in orders]
+    
+    def _ensure_orders_subscribed(self):
+        """启动订单WebSocket订阅（如果还没有启动）"""
+        if self._orders_subscribed:
+            return
+        try:
+            # 注册订单更新回调（这会启动账户WebSocket订单流）
+            def on_orders_update(orders):
+                """订单更新回调（用于保持缓存最新）"""
+                pass  # 缓存已在订单事件中更新
             
-            return result
+            self.extended_client.watch_order(on_orders_update)
+            self._orders_subscribed = True
+            print(f"[Extended] 已启动订单WebSocket订阅")
+        except Exception as e:
+            print(f"[Extended] 启动订单订阅失败: {e}，将使用REST API")
+    
+    def watch_bbo(self, symbol: str, callback: Callable[[Decimal, Decimal], None]) -> bool:
+        """订阅最优买卖价推送（基于订单簿WebSocket）"""
+        def on_depth(depth):
+            if depth.bids and depth.asks:
+                callback(Decimal(depth.bids[0].price), Decimal(depth.asks[0].price))
         
-        return self._run_async(_get_open_orders())
+        normalized_symbol = self.normalize_symbol(symbol)
+        with self._watchers_lock:
+            # 同一回调重复订阅时先移除旧的包装回调，避免重复分发
+            previous = self._bbo_watchers.pop((normalized_symbol, callback), None)
+            self._bbo_watchers[(normalized_symbol, callback)] = on_depth
+        if previous is not None:
+            self.extended_client.unwatch_depth(normalized_symbol, previous)
+        return bool(self.extended_client.watch_depth(normalized_symbol, on_depth))
+    
+    def unwatch_bbo(self, symbol: str, callback: Callable[[Decimal, Decimal], None]):
+        """取消最优买卖价推送订阅（订单簿监听保持运行，供后续订阅复用）"""
+        normalized_symbol = self.normalize_symbol(symbol)
+        with self._watchers_lock:
+            on_depth = self._bbo_watchers.pop((normalized_symbol, callback), None)
+        if on_depth is not None:
+            self.extended_client.unwatch_depth(normalized_symbol, on_depth)
+    
+    def watch_orders(self, callback: Callable[[List[Dict[str, Any]]], None]) -> bool:
+        """订阅订单状态推送（基于账户WebSocket订单流）"""
+        def on_orders(orders):
+            callback([_format_order_dict(order, order.symbol) for order in orders])
+        
+        with self._watchers_lock:
+            previous = self._order_watchers.pop(callback, None)
+            self._order_watchers[callback] = on_orders
+        if previous is not None:
+            self.extended_client.unwatch_order(previous)
+        self.extended_client.watch_order(on_orders)
+        if self.extended_client.start_order_stream():
+            return True
+        # 订单流无法启动时调用方会退回轮询，不保留回调
+        self.unwatch_orders(callback)
+        return False
+    
+    def unwatch_orders(self, callback: Callable[[List[Dict[str, Any]]], None]):
+        """取消订单状态推送订阅（订单流保持运行，继续维护未成交订单缓存）"""
+        with self._watchers_lock:
+            on_orders = self._order_watchers.pop(callback, None)
+        if on_orders is not None:
+            self.extended_client.unwatch_order(on_orders)
+    
+    def wait_for_order(self, symbol: str, order_id: str, state: str = 'open', timeout: float = 5.0) -> bool:
+        """等待订单进入指定状态（由订单推送唤醒；订单ID不是数字或无法启动订单流时退回轮询）"""
+        try:
+            order_id_int = int(order_id)
+        except (TypeError, ValueError):
+            return super().wait_for_order(symbol, order_id, state, timeout)
+        if not self.extended_client.start_order_stream():
+            return super().wait_for_order(symbol, order_id, state, timeout)
+        return self.extended_client.wait_for_order(order_id_int, state == 'open', timeout)
+    
+    async def _fetch_all_market_orders(self) -> List[Any]:
+        """
+        获取所有交易对的未成交订单（REST API）
+        
+        账户接口一次返回全部交易对的订单，只请求一次；按交易对分别请求会重复拉取整个账户，
+        且每次都会用单个交易对的结果覆盖订单缓存
+        """
+        return await self.extended_client.get_open_orders(None, use_cache=False)
     
     def get_position(self, symbol: str) -> Dict[str, Any]:
         """获取持仓信息"""
+        return self._run_async(self.aget_position(symbol))
+    
+    async def aget_position(self, symbol: str) -> Dict[str, Any]:
+        """获取持仓信息（异步版本，供已运行在API事件循环中的调用方直接await）"""
         normalized_symbol = self.normalize_symbol(symbol)
-        
-        async def _get_position():
-            try:
-                positions = await self.extended_client.get_positions(normalized_symbol)
-                if positions and len(positions) > 0:
-                    position = positions[0]
-                    # 解析持仓数量
-                    position_amt_str = str(position.position_amt)
-                    position_amt = Decimal(position_amt_str)
-                    entry_price = Decimal(str(position.entry_price)) if position.entry_price else Decimal('0')
-                    unrealized_pnl = Decimal(str(position.unrealized_profit)) if position.unrealized_profit else Decimal('0')
-                    
-                    # 优先使用 position_side 字段判断方向（Extended交易所使用此字段）
-                    # 如果 position_side 不可用，再根据 position_amt 的正负判断
-                    position_side = getattr(position, 'position_side', None)
-                    if position_side:
-                        position_side_upper = str(position_side).upper()
-                        if position_side_upper == 'LONG':
-                            side = 'long'  # 多单
-                        elif position_side_upper == 'SHORT':
-                            side = 'short'  # 空单
-                        else:
-                            # 如果 position_side 不是 LONG 或 SHORT，根据 position_amt 判断
-                            if position_amt > 0:
-                                side = 'long'
-                            elif position_amt < 0:
-                                side = 'short'
-                            else:
-                                side = 'none'
-                    else:
-                        # 如果没有 position_side 字段，根据持仓数量判断方向：正数为多单，负数为空单
-                        if position_amt > 0:
-                            side = 'long'  # 多单
-                        elif position_amt < 0:
-                            side = 'short'  # 空单
-                        else:
-                            side = 'none'  # 无持仓
-                    
-                    # 如果判断为空单，但 position_amt 为正数，需要将 quantity 转为负数
-                    # 这样前端显示时会更直观
-                    if side == 'short' and position_amt > 0:
-                        position_amt = -position_amt
-                    
-                    return {
-                        'symbol': normalized_symbol,
-                        'quantity': position_amt,
-                        'avg_price': entry_price,
-                        'unrealized_pnl': unrealized_pnl,
-                        'side': side,  # 持仓方向：long(多单), short(空单), none(无持仓)
-                        'leverage': str(position.leverage) if hasattr(position, 'leverage') else '1',
-                        'position_side': position.position_side if hasattr(position, 'position_side') else 'BOTH'
-                    }
-                else:
-                    # 没有持仓
-                    return {
-                        'symbol': normalized_symbol,
-                        'quantity': Decimal('0'),
-                        'avg_price': Decimal('0'),
-                        'unrealized_pnl': Decimal('0'),
-                        'side': 'none'  # 无持仓
-                    }
-            except Exception as e:
-                print(f"获取持仓失败: {e}")
-                # 出错时返回空持仓
+        try:
+            positions = await self.extended_client.get_positions(normalized_symbol)
+            if positions and len(positions) > 0:
+                return _normalize_position(positions[0], normalized_symbol)
+            else:
+                # 没有持仓
                 return {
                     'symbol': normalized_symbol,
-                    'quantity': Decimal('0'),
-                    'avg_price': Decimal('0'),
-                    'unrealized_pnl': Decimal('0')
+                    'quantity': _ZERO,
+                    'avg_price': _ZERO,
+                    'unrealized_pnl': _ZERO,
+                    'side': 'none'  # 无持仓
                 }
+        except Exception as e:
+            print(f"获取持仓失败: {e}")
+            # 出错时返回空持仓
+            return {
+                'symbol': normalized_symbol,
+                'quantity': _ZERO,
+                'avg_price': _ZERO,
+                'unrealized_pnl': _ZERO
+            }
+    
+    def get_positions(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        批量获取持仓信息（一次请求获取全部持仓后统一转换）
         
-        return self._run_async(_get_position())
+        Args:
+            symbol: 交易对符号，None表示获取所有交易对的持仓
+        
+        Returns:
+            持仓信息列表
+        """
+        return self._run_async(self.aget_positions(symbol))
+    
+    async def aget_positions(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
+        """批量获取持仓信息（异步版本）"""
+        normalized_symbol = self.normalize_symbol(symbol) if symbol else None
+        try:
+            positions = await self.extended_client.get_positions(normalized_symbol)
+        except Exception as e:
+            print(f"获取持仓失败: {e}")
+            return []
+        return [_normalize_position(position, position.symbol) for position in positions]
     
     def get_klines(
         self,
@@ -954,16 +1192,24 @@ class ExtendedExchange(BaseExchange):
         end_time: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """获取K线数据"""
-        normalized_symbol = self.normalize_symbol(symbol)
-        
         # Extended暂不支持K线数据，返回空列表或使用Ticker数据模拟
-        # 这里返回空列表，实际使用时可以通过其他方式获取
+        # 这里直接返回空列表（无需标准化交易对），实际使用时可以通过其他方式获取
         return []
     
     def close(self):
         """关闭客户端连接"""
         try:
-            # 关闭持久事件循环
+            # 先在API事件循环中关闭Extended客户端：其aiohttp会话绑定在该循环上，
+            # 先停止循环再关闭会重新启动一个新循环，旧会话无法正常关闭（产生 Unclosed client session 警告）
+            if hasattr(self, 'extended_client') and self.extended_client:
+                api_loop = getattr(self, '_api_loop', None)
+                if api_loop is not None and api_loop.is_running():
+                    try:
+                        asyncio.run_coroutine_threadsafe(self.extended_client.close(), api_loop).result(timeout=5)
+                    except Exception as e:
+                        print(f"关闭Extended客户端时出错: {e}")
+            
+            # 再关闭持久事件循环
             if hasattr(self, '_api_loop') and self._api_loop is not None and self._api_loop.is_running():
                 try:
                     # 停止事件循环
@@ -973,16 +1219,6 @@ class ExtendedExchange(BaseExchange):
                         self._api_thread.join(timeout=2)
                 except Exception as e:
                     print(f"[Extended] 关闭API事件循环时出错: {e}")
-            
-            # 关闭Extended客户端
-            if hasattr(self, 'extended_client') and self.extended_client:
-                async def _close():
-                    await self.extended_client.close()
-                
-                try:
-                    self._run_async(_close())
-                except Exception as e:
-                    print(f"关闭Extended客户端时出错: {e}")
         except Exception as e:
             # 如果关闭过程中出错，只记录错误，不抛出异常
             print(f"关闭Extended交易所时出错: {e}")
@@ -993,8 +1229,3 @@ class ExtendedExchange(BaseExchange):
             self.close()
         except Exception:
             pass
-
-
-# 注册Extended交易所
-ExchangeFactory.register('extended', ExtendedExchange)
-
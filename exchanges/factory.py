@@ -2,7 +2,7 @@
 交易所工厂
 用于创建和管理交易所实例
 """
-from typing import Dict, Type, Optional
+from typing import Any, Dict, Type, Optional
 from exchanges.base import BaseExchange
 
 
@@ -45,16 +45,53 @@ class ExchangeFactory:
         Raises:
             ValueError: 如果交易所未注册
         """
-        name_lower = name.lower()
-        if name_lower not in cls._exchanges:
-            available = ', '.join(cls._exchanges.keys())
+        exchange_class = cls._exchanges.get(name.lower())
+        if exchange_class is None:
+            available = ', '.join(cls._exchanges)
             raise ValueError(
                 f"交易所 '{name}' 未注册。可用交易所: {available}"
             )
         
-        exchange_class = cls._exchanges[name_lower]
         return exchange_class(api_key, secret_key, **kwargs)
     
+    @classmethod
+    def create_from_config(cls, config: Dict[str, Any]) -> BaseExchange:
+        """
+        根据账号配置创建交易所实例（一次性解析可选参数和private_key回退，调用方无需重复拼装参数）
+        
+        Args:
+            config: 账号配置（ConfigManager.get_exchange_config/get_account_config 的返回值）
+            
+        Returns:
+            交易所实例
+            
+        Raises:
+            ValueError: 如果交易所未注册
+        """
+        kwargs = {
+            'testnet': config.get('testnet', False)
+        }
+        
+        # Extended交易所需要额外参数
+        if config['name'].lower() == 'extended':
+            if config.get('public_key'):
+                kwargs['public_key'] = config['public_key']
+            if config.get('private_key'):
+                kwargs['private_key'] = config['private_key']
+            elif config.get('secret_key'):
+                kwargs['private_key'] = config['secret_key']
+            if config.get('vault') is not None:
+                kwargs['vault'] = config['vault']
+            if config.get('default_market'):
+                kwargs['default_market'] = config['default_market']
+        
+        return cls.create(
+            name=config['name'],
+            api_key=config['api_key'],
+            secret_key=config.get('secret_key', ''),
+            **kwargs
+        )
+    
     @classmethod
     def list_exchanges(cls) -> list:
         """
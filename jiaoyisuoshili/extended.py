@@ -2,12 +2,15 @@
 Extended交易所API封装
 基于官方x10-python-trading-starknet SDK
 """
+import sys
 import time
 import asyncio
+import logging
 import threading
-from typing import Dict, List, Optional, Callable, Any
+from collections import deque
+from typing import Dict, List, Optional, Callable, Any, Tuple
 from decimal import Decimal
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields
 from datetime import datetime, timedelta
 
 # 导入Extended官方SDK
@@ -68,8 +71,27 @@ except ImportError as e:
     MAINNET_CONFIG = None
 
 
+log = logging.getLogger(__name__)
+
+# 账户WebSocket流（用于订单事件驱动的缓存更新），旧版SDK可能没有
+try:
+    from x10.perpetual.stream_client import PerpetualStreamClient
+    STREAM_CLIENT_AVAILABLE = True
+except ImportError:
+    STREAM_CLIENT_AVAILABLE = False
+
+# 可选：uvloop（uvicorn[standard]会附带安装），仅用于OrderBook WebSocket事件循环
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
+
 @dataclass
 class ExtendedDepthLevel:
+    # 深度档位数量多，使用__slots__去掉每个实例的__dict__
+    __slots__ = ('price', 'quantity')
     price: str
     quantity: str
 
@@ -137,36 +159,125 @@ class ExtendedOrder:
     activation_price: Optional[str] = None
     price_rate: Optional[str] = None
     realized_pnl: Optional[str] = None
+    # 以下字段在构造时预先计算，避免每次格式化订单时重复转换
+    side_lower: str = field(init=False, repr=False, compare=False)
+    type_lower: str = field(init=False, repr=False, compare=False)
+    price_or_none: Optional[str] = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        # side/type取值范围很小，驻留后所有订单共享同一个字符串对象
+        self.side_lower = sys.intern(str(self.side).lower())
+        self.type_lower = sys.intern(str(self.type).lower())
+        self.price_or_none = None if self.price == "0" else self.price
+
+
+_ZERO = Decimal('0')
+_MIN_POSITION_SIZE = Decimal('1e-9')  # 持仓尺寸低于该值视为无持仓
+_ONE = Decimal('1')
+_TAKER_TOLERANCE = Decimal('0.003')  # 市价单/平仓IOC单相对盘口价的容差（0.3%）
+_MASS_CANCEL_CHUNK = 50  # 单次批量撤单请求的最大订单数
+_MIN_POLL_INTERVAL = 0.1  # Ticker/K线轮询的最小间隔（秒）
+
+
+class _PriceTick:
+    """最佳买卖价及其最近一次变化的时间（time.monotonic()），按交易对原地更新"""
+    __slots__ = ('bid', 'ask', 'ts')
+    
+    def __init__(self):
+        self.bid: Optional[float] = None
+        self.ask: Optional[float] = None
+        self.ts: float = 0.0
+
+
+def _now_ms() -> int:
+    """当前毫秒时间戳（time_ns整数运算，无浮点转换）"""
+    return time.time_ns() // 1_000_000
+
+
+def _to_decimal(value: Any) -> Decimal:
+    """
+    转换为Decimal（SDK返回的数值字段本身就是Decimal，直接复用）
+    
+    float仍经过str()转换：Decimal.from_float会保留二进制误差（如0.15变为0.1499...），
+    之后_round_price/_round_size按舍入规则取整时可能差一个tick
+    """
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def _round_price(market: MarketModel, price: Decimal) -> Decimal:
+    """按市场价格精度取整（已在tick上的价格直接返回，否则按SDK的取整规则处理）"""
+    tick = getattr(market.trading_config, 'min_price_change', None)
+    if tick and not price % tick:
+        return price
+    return market.trading_config.round_price(price)
+
+
+def _round_size(market: MarketModel, size: Decimal) -> Decimal:
+    """按市场数量精度取整（已在步长上的数量直接返回，否则按SDK的取整规则处理）"""
+    tick = getattr(market.trading_config, 'min_order_size_change', None)
+    if tick and not size % tick:
+        return size
+    return market.trading_config.round_order_size(size)
+
+
+def _enum_value(obj: Any, default: Optional[str] = None) -> Optional[str]:
+    """安全地获取枚举值"""
+    if obj is None:
+        return default
+    if hasattr(obj, 'value'):
+        return obj.value
+    return str(obj) if obj else default
+
+
+def _dstr(value: Any) -> str:
+    """转换为字符串（已是字符串时直接复用）"""
+    return value if isinstance(value, str) else str(value)
+
+
+def _as_str_dict(obj: Any) -> Dict[str, Any]:
+    """将dataclass转换为字典，Decimal字段转为字符串（兼容按字符串序列化的旧代码）"""
+    return {
+        f.name: str(v) if isinstance(v := getattr(obj, f.name), Decimal) else v
+        for f in fields(obj)
+    }
 
 
 @dataclass
 class ExtendedAccountPosition:
+    # 数值字段保持Decimal，需要字符串时再转换（见as_str_dict）
     symbol: str
-    position_amt: str
-    entry_price: str
-    unrealized_profit: str
+    position_amt: Decimal
+    entry_price: Decimal
+    unrealized_profit: Decimal
     leverage: str
     isolated: bool = False
     position_side: str = "BOTH"
     update_time: int = 0
+    
+    def as_str_dict(self) -> Dict[str, Any]:
+        return _as_str_dict(self)
 
 
 @dataclass
 class ExtendedAccountAsset:
+    # 数值字段保持Decimal，需要字符串时再转换（见as_str_dict）
     asset: str
-    wallet_balance: str
-    unrealized_profit: str
-    margin_balance: str
-    maint_margin: str
-    initial_margin: str
-    position_initial_margin: str
-    open_order_initial_margin: str
-    cross_wallet_balance: str
-    cross_un_pnl: str
-    available_balance: str
-    max_withdraw_amount: str
+    wallet_balance: Decimal
+    unrealized_profit: Decimal
+    margin_balance: Decimal
+    maint_margin: Decimal
+    initial_margin: Decimal
+    position_initial_margin: Decimal
+    open_order_initial_margin: Decimal
+    cross_wallet_balance: Decimal
+    cross_un_pnl: Decimal
+    available_balance: Decimal
+    max_withdraw_amount: Decimal
     margin_available: bool = True
     update_time: int = 0
+    
+    def as_str_dict(self) -> Dict[str, Any]:
+        return _as_str_dict(self)
 
 
 @dataclass
@@ -191,8 +302,64 @@ class ExtendedAccountSnapshot:
     positions: List[ExtendedAccountPosition]
 
 
+def _pct_change(open_price, change):
+    """计算涨跌幅百分比，开盘价为0时返回0"""
+    return change / open_price * 100 if open_price else 0
+
+
+def _append_depth_levels(levels: List[ExtendedDepthLevel], raw_levels, limit: int):
+    """
+    解析REST深度档位并追加到levels
+    
+    档位格式（[price, qty] 或带 price/qty 属性的对象）只按第一档判断一次；
+    已存在的价格（如WebSocket已提供的最佳价）会被跳过，避免重复添加
+    """
+    raw_levels = raw_levels[:limit]
+    first = raw_levels[0]
+    if isinstance(first, (list, tuple)):
+        pairs = ((str(level[0]), str(level[1])) for level in raw_levels if len(level) >= 2)
+    elif hasattr(first, 'price') and hasattr(first, 'qty'):
+        pairs = ((str(level.price), str(level.qty)) for level in raw_levels)
+    else:
+        return
+    
+    seen_prices = {level.price for level in levels}
+    for price, qty in pairs:
+        if price in seen_prices:
+            continue
+        seen_prices.add(price)
+        levels.append(ExtendedDepthLevel(price=price, quantity=qty))
+
+
+# 字符串 -> SDK枚举 转换表（SDK未安装时使用占位符类的属性）
+_ORDER_SIDE_MAP = {"BUY": OrderSide.BUY, "SELL": OrderSide.SELL}
+_ORDER_TYPE_MAP = {"LIMIT": OrderType.LIMIT, "MARKET": OrderType.MARKET, "CONDITIONAL": OrderType.CONDITIONAL}
+_TIME_IN_FORCE_MAP = {"GTC": TimeInForce.GTT, "IOC": TimeInForce.IOC, "FOK": TimeInForce.FOK}
+_POSITION_SIDE_MAP = {"LONG": PositionSide.LONG, "SHORT": PositionSide.SHORT}
+
+# 未成交订单状态（缓存中只保存这些状态的订单）
+_OPEN_STATUSES = frozenset(('NEW', 'PARTIALLY_FILLED'))
+
+
+# 持仓字段解析表：字段名 -> (候选属性名, 转换函数, 默认值)，兼容不同SDK版本的字段名
+_POSITION_FIELDS = (
+    ('symbol', ('market', 'market_name', 'symbol'), _dstr, ''),
+    ('position_amt', ('size', 'position_size', 'quantity'), _to_decimal, _ZERO),
+    ('entry_price', ('open_price', 'entry_price', 'average_entry_price'), _to_decimal, _ZERO),
+    ('unrealized_profit', ('unrealised_pnl', 'unrealized_pnl'), _to_decimal, _ZERO),
+    ('leverage', ('leverage',), _dstr, '0'),
+    ('update_time', ('updated_at', 'updated_time'), None, 0),
+)
+
+
 class Extended:
-    """Extended交易所API封装"""
+    """
+    Extended交易所API封装
+    
+    订单缓存的并发约定：open_orders 的所有写入都在 self.lock 内完成，写入后通过
+    _publish_open_orders() 重新绑定 open_orders_snapshot（不可变tuple）。读取方直接使用
+    快照或对 open_orders 做单次 get，二者在GIL下都是原子操作，无需加锁。
+    """
     
     def __init__(self, api_key: str, private_key: str, public_key: str, vault: int, 
                  use_testnet: bool = False, default_market: str = "BTC-USD"):
@@ -223,7 +390,7 @@ class Extended:
         
         # 选择配置
         self.config = TESTNET_CONFIG if use_testnet else MAINNET_CONFIG
-        print(f"[Extended] 使用{'测试网' if use_testnet else '主网'}配置")
+        log.info("[Extended] 使用%s配置", '测试网' if use_testnet else '主网')
         
         # 创建Stark账户
         self.stark_account = StarkPerpetualAccount(
@@ -240,37 +407,78 @@ class Extended:
         self.account_callbacks: List[Callable] = []
         self.order_callbacks: List[Callable] = []
         self.depth_callbacks: Dict[str, List[Callable]] = {}
+        # depth_callbacks 的只读分发表（symbol -> 回调tuple），订阅时整体替换
+        self._depth_dispatch: Dict[str, Tuple[Callable, ...]] = {}
         self.ticker_callbacks: List[Callable] = []
         self.kline_callbacks: List[Callable] = []
         
+        # Ticker/K线轮询：间隔（秒，不低于 _MIN_POLL_INTERVAL），close() 时置位停止事件让轮询线程退出
+        self.poll_interval: float = 1.0
+        self._stop_event = threading.Event()
+        # 订阅表：symbol -> Ticker回调，(symbol, interval) -> K线回调；由同一个轮询线程统一驱动
+        self._ticker_subs: Dict[str, List[Callable]] = {}
+        self._kline_subs: Dict[Tuple[str, str], List[Callable]] = {}
+        self._poller_thread: Optional[threading.Thread] = None
+        # trading_client 创建时所在的事件循环（initialize() 中记录）
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        
         # 数据缓存
         self.account_snapshot: Optional[ExtendedAccountSnapshot] = None
+        # 未成交订单缓存（order_id -> 订单），只保存NEW/PARTIALLY_FILLED状态的订单
         self.open_orders: Dict[int, ExtendedOrder] = {}
+        # open_orders 的只读快照，每次写入后整体替换，读取方无需加锁
+        self.open_orders_snapshot: Tuple[ExtendedOrder, ...] = ()
+        # client_order_id -> order_id 二级索引，随单个订单的写入/移除增量维护，REST整体替换缓存时重建
+        self.client_order_id_to_order_id: Dict[str, int] = {}
         self.last_depth: Optional[ExtendedDepth] = None
         self.last_ticker: Optional[ExtendedTicker] = None
         self.last_klines: List[ExtendedKline] = []
         self.markets: Dict[str, MarketModel] = {}
+        # 单个市场的短TTL缓存（symbol -> (获取时间, 市场信息)），下单路径据此取最新价/精度
+        self._market_cache: Dict[str, Tuple[float, MarketModel]] = {}
+        self._market_ttl: float = 10.0
+        # 盘口最优价短缓存（symbol -> (获取时间, best_bid, best_ask)），用于市价/平仓的IOC定价
+        self._best_price_cache: Dict[str, Tuple[float, Optional[Decimal], Optional[Decimal]]] = {}
+        self._best_price_ttl: float = 0.2
         
         # 线程锁
         self.lock = threading.Lock()
+        # 订单缓存变化通知（与self.lock共用一把锁），wait_for_order据此等待而不是轮询
+        self.orders_changed = threading.Condition(self.lock)
         
         # 订单簿缓存
         self.orderbooks: Dict[str, OrderBook] = {}
         
         # 价格缓存，用于检测 WebSocket 是否在更新
-        self.last_depth_prices: Dict[str, Dict[str, Any]] = {}  # {symbol: {'bid': price, 'ask': price, 'timestamp': time}}
+        self.last_depth_prices: Dict[str, _PriceTick] = {}  # {symbol: 最近一次变化的买卖价及时间}
         # 记录WebSocket OrderBook连续“无数据”的次数，用于在极端情况下触发重建 WebSocket 连接
         self.orderbook_empty_count: Dict[str, int] = {}
+        # 最佳买卖价变化回调复用的深度快照：symbol -> (深度, 买一档位, 卖一档位)
+        self._depth_snapshots: Dict[str, Tuple[ExtendedDepth, ExtendedDepthLevel, ExtendedDepthLevel]] = {}
+        # 深度回调异常计数及上次记录日志的时间（time.monotonic()），用于限制日志频率
+        self._depth_callback_errors: int = 0
+        self._depth_callback_error_ts: float = 0.0
         
         # 持久的事件循环和线程，用于管理 OrderBook WebSocket 连接
         self._orderbook_loop: Optional[asyncio.AbstractEventLoop] = None
         self._orderbook_thread: Optional[threading.Thread] = None
         self._orderbook_loop_lock = threading.Lock()
+        self._orderbook_loop_ready = threading.Event()
+        # 正在创建中的OrderBook（concurrent.futures.Future），用于合并并发的首次创建
+        self._orderbook_futures: Dict[str, Any] = {}
+        self._orderbook_futures_lock = threading.Lock()
         
         # 订单缓存相关
-        self.orders_cache_timestamp: float = 0  # 缓存时间戳
-        self.orders_cache_ttl: float = 5.0  # 缓存有效期（秒），5秒内使用缓存
-        self.orders_ws_subscribed: bool = False  # 是否已订阅WebSocket订单更新
+        # 已订阅WebSocket订单流时，open_orders由订单事件实时更新，无需TTL；
+        # 未订阅（或连接断开）时才退回到TTL缓存 + REST刷新
+        self.orders_cache_timestamp: float = 0  # 缓存时间戳（time.monotonic()，不受系统时钟调整影响）
+        self.orders_cache_ttl: float = 5.0  # 缓存有效期（秒），空闲时5秒内使用缓存
+        self.orders_cache_min_ttl: float = 1.0  # 下单/撤单频繁时自适应TTL的下限（秒）
+        self._order_writes: deque = deque()  # 最近60秒内下单/撤单写入缓存的时间（time.monotonic()）
+        self.orders_cache_hits: int = 0
+        self.orders_cache_misses: int = 0
+        self.orders_ws_subscribed: bool = False  # 是否已订阅WebSocket订单更新（连接建立后才为True）
+        self._order_stream_future = None  # 订单流任务（运行在OrderBook事件循环上）
         
         # 初始化标志
         self._initialized = False
@@ -302,19 +510,16 @@ class Extended:
             
             # 在新的事件循环中创建 trading_client
             self.trading_client = PerpetualTradingClient(self.config, self.stark_account)
+            # 记录 trading_client 所属的事件循环（其aiohttp会话绑定在该循环上），轮询线程把请求调度到这里
+            self._client_loop = asyncio.get_running_loop()
         
-        # 获取市场信息
+        # 获取市场信息（已加载过且未强制重建时复用，避免重复请求和重复构建MarketModel）
         try:
-            markets_response = await self.trading_client.markets_info.get_markets()
-            if hasattr(markets_response, 'data') and markets_response.data:
-                self.markets = {market.name: market for market in markets_response.data}
-                self._initialized = True
-            else:
-                # 即使没有市场数据，也标记为已初始化（trading_client已创建）
-                # 市场信息可以在后续调用中获取
-                self._initialized = True
-                if not self.markets:
-                    self.markets = {}
+            if force_recreate or not self.markets:
+                await self._load_markets()
+            # 即使没有市场数据，也标记为已初始化（trading_client已创建）
+            # 市场信息可以在后续调用中获取
+            self._initialized = True
         except Exception as e:
             # 如果获取市场信息失败，但trading_client已创建，仍然标记为已初始化
             # 这样后续调用可以重试获取市场信息
@@ -334,11 +539,20 @@ class Extended:
             if self._orderbook_thread is not None and self._orderbook_thread.is_alive():
                 return  # 已经启动
             
+            startup_error = [None]  # 线程内创建事件循环失败时，把异常带回启动方
+            
             def run_orderbook_loop():
                 """在后台线程中运行持久的事件循环"""
-                new_loop = asyncio.new_event_loop()
+                try:
+                    new_loop = uvloop.new_event_loop() if UVLOOP_AVAILABLE else asyncio.new_event_loop()
+                except Exception as e:
+                    startup_error[0] = e
+                    self._orderbook_loop_ready.set()
+                    return
                 asyncio.set_event_loop(new_loop)
                 self._orderbook_loop = new_loop
+                # 事件循环真正开始运行后再通知启动方
+                new_loop.call_soon(self._orderbook_loop_ready.set)
                 
                 # 设置异常处理器，捕获未处理的 Task 异常（如 WebSocket 连接超时）
                 def handle_exception(loop, context):
@@ -347,30 +561,36 @@ class Extended:
                     if exception:
                         # 如果是 TimeoutError（WebSocket 连接超时），只记录警告，不打印完整堆栈
                         if isinstance(exception, (TimeoutError, asyncio.TimeoutError)):
-                            print(f"[Extended] WebSocket连接超时（已自动处理，不影响现有连接）")
+                            log.warning("[Extended] WebSocket连接超时（已自动处理，不影响现有连接）")
                         else:
                             # 其他异常打印详细信息
-                            print(f"[Extended] OrderBook事件循环异常: {exception}")
+                            log.warning("[Extended] OrderBook事件循环异常: %s", exception)
                     else:
                         # 没有异常对象，打印上下文信息
-                        print(f"[Extended] OrderBook事件循环异常: {context.get('message', '未知错误')}")
+                        log.warning("[Extended] OrderBook事件循环异常: %s", context.get('message', '未知错误'))
                 
                 new_loop.set_exception_handler(handle_exception)
                 
                 try:
                     new_loop.run_forever()
                 except Exception as e:
-                    print(f"[Extended] OrderBook事件循环错误: {e}")
+                    log.warning("[Extended] OrderBook事件循环错误: %s", e)
                 finally:
+                    self._orderbook_loop_ready.clear()
                     new_loop.close()
                     self._orderbook_loop = None
             
+            self._orderbook_loop_ready.clear()
             self._orderbook_thread = threading.Thread(target=run_orderbook_loop, daemon=True)
             self._orderbook_thread.start()
-            # 等待事件循环启动
-            import time
-            time.sleep(0.5)
-            print(f"[Extended] 已启动OrderBook WebSocket事件循环线程")
+            # 等待事件循环真正运行（通常不到1毫秒），而不是固定等待
+            if not self._orderbook_loop_ready.wait(timeout=2.0):
+                log.warning("[Extended] OrderBook事件循环启动超时")
+                return
+            if startup_error[0] is not None:
+                log.warning("[Extended] OrderBook事件循环启动失败: %s", startup_error[0])
+                return
+            log.info("[Extended] 已启动OrderBook WebSocket事件循环线程")
     
     def _ensure_initialized(self):
         """确保客户端已初始化"""
@@ -379,65 +599,41 @@ class Extended:
     
     def _convert_order_side(self, side: str) -> OrderSide:
         """转换订单方向"""
-        if side.upper() == "BUY":
-            return OrderSide.BUY
-        elif side.upper() == "SELL":
-            return OrderSide.SELL
-        else:
+        try:
+            return _ORDER_SIDE_MAP[side.upper()]
+        except KeyError:
             raise ValueError(f"不支持的订单方向: {side}")
     
     def _convert_order_type(self, order_type: str) -> OrderType:
         """转换订单类型"""
-        if order_type.upper() == "LIMIT":
-            return OrderType.LIMIT
-        elif order_type.upper() == "MARKET":
-            return OrderType.MARKET
-        elif order_type.upper() == "CONDITIONAL":
-            return OrderType.CONDITIONAL
-        else:
+        try:
+            return _ORDER_TYPE_MAP[order_type.upper()]
+        except KeyError:
             raise ValueError(f"不支持的订单类型: {order_type}")
     
     def _convert_time_in_force(self, tif: str) -> TimeInForce:
         """转换订单有效期"""
-        if tif.upper() == "GTC":
-            return TimeInForce.GTT
-        elif tif.upper() == "IOC":
-            return TimeInForce.IOC
-        elif tif.upper() == "FOK":
-            return TimeInForce.FOK
-        else:
-            return TimeInForce.GTT  # 默认值
+        return _TIME_IN_FORCE_MAP.get(tif.upper(), TimeInForce.GTT)  # 默认GTT
     
     def _convert_position_side(self, side: str) -> PositionSide:
         """转换持仓方向"""
-        if side.upper() == "LONG":
-            return PositionSide.LONG
-        elif side.upper() == "SHORT":
-            return PositionSide.SHORT
-        else:
+        try:
+            return _POSITION_SIDE_MAP[side.upper()]
+        except KeyError:
             raise ValueError(f"不支持的持仓方向: {side}")
     
     def _format_order(self, order_data: Any) -> ExtendedOrder:
         """格式化订单数据"""
-        # 安全地获取枚举值
-        def get_enum_value(obj, default=None):
-            """安全地获取枚举值"""
-            if obj is None:
-                return default
-            if hasattr(obj, 'value'):
-                return obj.value
-            return str(obj) if obj else default
-        
         return ExtendedOrder(
             order_id=order_data.id,
             client_order_id=order_data.external_id,
             symbol=order_data.market,
-            side=get_enum_value(order_data.side, 'UNKNOWN'),
-            type=get_enum_value(order_data.type, 'UNKNOWN'),
+            side=_enum_value(order_data.side, 'UNKNOWN'),
+            type=_enum_value(order_data.type, 'UNKNOWN'),
             quantity=str(order_data.qty),
             price=str(order_data.price),
-            status=get_enum_value(order_data.status, 'UNKNOWN'),
-            time_in_force=get_enum_value(order_data.time_in_force if hasattr(order_data, 'time_in_force') else None, 'GTC'),
+            status=_enum_value(order_data.status, 'UNKNOWN'),
+            time_in_force=_enum_value(order_data.time_in_force if hasattr(order_data, 'time_in_force') else None, 'GTC'),
             executed_qty=str(order_data.filled_qty or 0),
             avg_price=str(order_data.average_price or 0),
             time=order_data.created_time,
@@ -448,31 +644,15 @@ class Extended:
     
     def _format_position(self, position: PositionModel) -> ExtendedAccountPosition:
         """格式化持仓数据（兼容不同字段名/类型）"""
-        # 市场标识兼容
-        symbol = getattr(position, 'market', None) or getattr(position, 'market_name', None) or getattr(position, 'symbol', '')
-        # 持仓数量兼容
-        size = getattr(position, 'size', None)
-        if size is None:
-            size = getattr(position, 'position_size', None)
-        if size is None:
-            size = getattr(position, 'quantity', None)
-        # 可能是Decimal/str
-        try:
-            size_str = str(size)
-        except Exception:
-            size_str = "0"
-        # 入场价兼容
-        entry = getattr(position, 'open_price', None)
-        if entry is None:
-            entry = getattr(position, 'entry_price', None)
-        if entry is None:
-            entry = getattr(position, 'average_entry_price', None)
-        # 未实现盈亏兼容
-        upnl = getattr(position, 'unrealised_pnl', None)
-        if upnl is None:
-            upnl = getattr(position, 'unrealized_pnl', 0)
-        # 杠杆
-        lev = getattr(position, 'leverage', 0)
+        out = {}
+        for name, attrs, convert, default in _POSITION_FIELDS:
+            value = next((v for a in attrs if (v := getattr(position, a, None)) is not None), None)
+            if value is None:
+                out[name] = default
+            else:
+                out[name] = convert(value) if convert else value
+        out['update_time'] = out['update_time'] or 0
+        
         # 方向：优先side字段，缺失时用size正负判断
         raw_side = getattr(position, 'side', None)
         if hasattr(raw_side, 'value'):
@@ -481,40 +661,28 @@ class Extended:
             position_side = raw_side
         else:
             try:
-                f = float(size_str)
+                f = float(out['position_amt'])
                 position_side = 'LONG' if f > 0 else ('SHORT' if f < 0 else 'BOTH')
             except Exception:
                 position_side = 'BOTH'
-        # 更新时间
-        updated = getattr(position, 'updated_at', None)
-        if updated is None:
-            updated = getattr(position, 'updated_time', 0)
-
-        return ExtendedAccountPosition(
-            symbol=symbol,
-            position_amt=size_str,
-            entry_price=str(entry if entry is not None else 0),
-            unrealized_profit=str(upnl if upnl is not None else 0),
-            leverage=str(lev if lev is not None else 0),
-            position_side=position_side,
-            update_time=updated or 0
-        )
+        
+        return ExtendedAccountPosition(position_side=position_side, **out)
     
     def _format_balance(self, balance: BalanceModel) -> ExtendedAccountAsset:
         """格式化余额数据"""
         return ExtendedAccountAsset(
             asset=balance.collateral_name,
-            wallet_balance=str(balance.balance),
-            unrealized_profit=str(balance.unrealised_pnl),
-            margin_balance=str(balance.equity),
-            maint_margin="0",  # Extended API可能不提供此字段
-            initial_margin=str(balance.initial_margin),
-            position_initial_margin="0",  # Extended API可能不提供此字段
-            open_order_initial_margin="0",  # Extended API可能不提供此字段
-            cross_wallet_balance="0",  # Extended API可能不提供此字段
-            cross_un_pnl="0",  # Extended API可能不提供此字段
-            available_balance=str(balance.available_for_trade),
-            max_withdraw_amount=str(balance.available_for_withdrawal),
+            wallet_balance=_to_decimal(balance.balance),
+            unrealized_profit=_to_decimal(balance.unrealised_pnl),
+            margin_balance=_to_decimal(balance.equity),
+            maint_margin=_ZERO,  # Extended API可能不提供此字段
+            initial_margin=_to_decimal(balance.initial_margin),
+            position_initial_margin=_ZERO,  # Extended API可能不提供此字段
+            open_order_initial_margin=_ZERO,  # Extended API可能不提供此字段
+            cross_wallet_balance=_ZERO,  # Extended API可能不提供此字段
+            cross_un_pnl=_ZERO,  # Extended API可能不提供此字段
+            available_balance=_to_decimal(balance.available_for_trade),
+            max_withdraw_amount=_to_decimal(balance.available_for_withdrawal),
             update_time=balance.updated_time
         )
     
@@ -522,15 +690,112 @@ class Extended:
         """获取所有市场信息"""
         self._ensure_initialized()
         if not self.markets:
-            markets_response = await self.trading_client.markets_info.get_markets()
-            if hasattr(markets_response, 'data') and markets_response.data:
-                self.markets = {market.name: market for market in markets_response.data}
+            await self._load_markets()
         return self.markets
     
+    async def _load_markets(self):
+        """从REST API加载市场信息（无数据时保留已有缓存）"""
+        markets_response = await self.trading_client.markets_info.get_markets()
+        if hasattr(markets_response, 'data') and markets_response.data:
+            self.markets = {market.name: market for market in markets_response.data}
+            now = time.monotonic()
+            with self.lock:
+                self._market_cache = {name: (now, market) for name, market in self.markets.items()}
+    
+    def get_market_cached(self, symbol: str) -> Optional[MarketModel]:
+        """同步查找TTL内的市场信息，过期或不存在时返回None"""
+        # 只读查找不加锁：dict.get是原子操作，写入方在锁内更新
+        cached = self._market_cache.get(symbol)
+        if cached is not None and time.monotonic() - cached[0] < self._market_ttl:
+            return cached[1]
+        return None
+    
     async def get_market(self, symbol: str) -> Optional[MarketModel]:
-        """获取指定市场信息"""
-        markets = await self.get_markets()
-        return markets.get(symbol)
+        """获取指定市场信息（TTL内直接使用缓存，过期后只刷新该市场）"""
+        market = self.get_market_cached(symbol)
+        if market is not None:
+            return market
+        
+        try:
+            markets_response = await self.trading_client.markets_info.get_markets(market_names=[symbol])
+            market = next((m for m in (getattr(markets_response, 'data', None) or []) if m.name == symbol), None)
+        except Exception as e:
+            log.warning("[Extended] 刷新市场信息失败: %s，使用已加载的市场信息", e)
+            market = None
+        
+        if market is None:
+            # 刷新失败时退回到已加载的市场列表（可能略旧，但精度等配置仍可用）
+            markets = await self.get_markets()
+            return markets.get(symbol)
+        
+        with self.lock:
+            self.markets[symbol] = market
+            self._market_cache[symbol] = (time.monotonic(), market)
+        return market
+    
+    async def _fetch_price_context(self, symbol: str) -> Tuple[Optional[MarketModel], Optional[Decimal], Optional[Decimal]]:
+        """并发获取市场信息和盘口最优价，返回 (market, best_bid, best_ask)"""
+        market, (best_bid, best_ask) = await asyncio.gather(
+            self.get_market(symbol),
+            self._get_best_prices(symbol)
+        )
+        return market, best_bid, best_ask
+    
+    async def _get_best_prices(self, symbol: str) -> Tuple[Optional[Decimal], Optional[Decimal]]:
+        """通过REST盘口快照获取最优买卖价（200毫秒内复用，连续平仓不重复请求），失败时返回 (None, None)"""
+        cached = self._best_price_cache.get(symbol)
+        if cached is not None and time.monotonic() - cached[0] < self._best_price_ttl:
+            return cached[1], cached[2]
+        
+        best_bid = None
+        best_ask = None
+        try:
+            ob = await self.trading_client.markets_info.get_orderbook_snapshot(market_name=symbol)
+            if hasattr(ob, 'data') and ob.data:
+                if hasattr(ob.data, 'bid') and ob.data.bid:
+                    level = ob.data.bid[0]
+                    best_bid = _to_decimal(level[0] if isinstance(level, (list, tuple)) else getattr(level, 'price', '0'))
+                if hasattr(ob.data, 'ask') and ob.data.ask:
+                    level = ob.data.ask[0]
+                    best_ask = _to_decimal(level[0] if isinstance(level, (list, tuple)) else getattr(level, 'price', '0'))
+        except Exception:
+            return None, None
+        
+        self._best_price_cache[symbol] = (time.monotonic(), best_bid, best_ask)
+        return best_bid, best_ask
+    
+    async def _submit_ioc_taker(self, symbol: str, market: MarketModel, side: OrderSide, quantity: Decimal,
+                                best_bid: Optional[Decimal], best_ask: Optional[Decimal],
+                                reduce_only: bool = False, tolerance: Decimal = _TAKER_TOLERANCE):
+        """
+        以盘口价±容差提交IOC限价单，模拟市价成交（市价单和平仓共用）
+        
+        Returns:
+            (下单响应, 实际使用的价格)
+        """
+        # 盘口价缺失时回退到最新价，根据方向选择更易成交的价格
+        if side == OrderSide.BUY:
+            reference = best_ask if best_ask and best_ask > 0 else _to_decimal(market.market_stats.last_price)
+            target = reference * (_ONE + tolerance)
+        else:
+            reference = best_bid if best_bid and best_bid > 0 else _to_decimal(market.market_stats.last_price)
+            target = reference * (_ONE - tolerance)
+        price = _round_price(market, target)
+        
+        placed_order = await self.trading_client.place_order(
+            market_name=symbol,
+            amount_of_synthetic=quantity,
+            price=price,
+            side=side,
+            time_in_force=TimeInForce.IOC,
+            reduce_only=reduce_only
+        )
+        return placed_order, price
+    
+    def invalidate_market(self, symbol: str):
+        """使市场缓存失效（下单失败等情况下调用，下次获取时重新拉取）"""
+        with self.lock:
+            self._market_cache.pop(symbol, None)
     
     async def get_ticker(self, symbol: str) -> ExtendedTicker:
         """获取Ticker数据"""
@@ -540,19 +805,102 @@ class Extended:
             raise ValueError(f"未找到市场: {symbol}")
         
         stats = market.market_stats
+        open_price = stats.last_price - stats.daily_price_change
         return ExtendedTicker(
             symbol=symbol,
             last_price=str(stats.last_price),
-            open_price=str(stats.last_price - stats.daily_price_change),
+            open_price=str(open_price),
             high_price=str(stats.daily_high),
             low_price=str(stats.daily_low),
             volume=str(stats.daily_volume),
             quote_volume=str(stats.daily_volume_base),
             price_change=str(stats.daily_price_change),
-            price_change_percent=str(stats.daily_price_change / (stats.last_price - stats.daily_price_change) * 100 if stats.last_price != stats.daily_price_change else "0"),
-            event_time=int(time.time() * 1000)
+            price_change_percent=str(_pct_change(open_price, stats.daily_price_change)),
+            event_time=_now_ms()
         )
     
+    async def _ensure_orderbook(self, symbol: str) -> OrderBook:
+        """创建或获取交易对的WebSocket订单簿（优先在持久的事件循环中创建）"""
+        if symbol in self.orderbooks:
+            return self.orderbooks[symbol]
+        
+        market = await self.get_market(symbol)
+        if not market:
+            log.warning("[Extended] 未找到市场: %s", symbol)
+            raise ValueError(f"未找到市场: {symbol}")
+        
+        log.debug("[Extended] 创建WebSocket OrderBook连接...")
+        # 在持久的事件循环中创建 OrderBook
+        if self._orderbook_loop is not None and self._orderbook_loop.is_running():
+            # 使用持久的事件循环创建 OrderBook
+            # 注意：OrderBook 需要在持久的事件循环中创建和运行，这样 WebSocket 才能持续更新
+            # 同一交易对并发首次创建时，只发起一次创建，其余调用方等待同一个future
+            with self._orderbook_futures_lock:
+                future = self._orderbook_futures.get(symbol)
+                owner = future is None
+                if owner:
+                    future = asyncio.run_coroutine_threadsafe(
+                        OrderBook.create(
+                            self.config,
+                            market_name=symbol,
+                            start=True
+                        ),
+                        self._orderbook_loop
+                    )
+                    self._orderbook_futures[symbol] = future
+            try:
+                # 不阻塞当前事件循环，便于多个交易对并发创建；shield避免单个等待方超时取消共享的创建任务
+                self.orderbooks[symbol] = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout=10)
+                if owner:
+                    log.info("[Extended] OrderBook已在持久事件循环中创建并启动")
+            except (Exception, asyncio.CancelledError) as e:
+                # 创建方超时后会取消共享的创建任务，其余等待方因此收到CancelledError（BaseException），
+                # 同样走回退；只有共享任务未被取消（即当前任务自身被取消）时才继续抛出
+                if isinstance(e, asyncio.CancelledError) and not future.cancelled():
+                    raise
+                if owner:
+                    future.cancel()
+                if symbol in self.orderbooks:
+                    return self.orderbooks[symbol]
+                log.warning("[Extended] 在持久事件循环中创建OrderBook失败: %s，尝试在当前事件循环中创建", e)
+                # 如果失败，回退到当前事件循环
+                self.orderbooks[symbol] = await OrderBook.create(
+                    self.config,
+                    market_name=symbol,
+                    start=True
+                )
+            finally:
+                if owner:
+                    with self._orderbook_futures_lock:
+                        self._orderbook_futures.pop(symbol, None)
+        else:
+            # 如果没有持久的事件循环，在当前事件循环中创建
+            log.warning("[Extended] 持久事件循环未运行，在当前事件循环中创建OrderBook")
+            self.orderbooks[symbol] = await OrderBook.create(
+                self.config,
+                market_name=symbol,
+                start=True
+            )
+        
+        return self.orderbooks[symbol]
+    
+    async def get_depths(self, symbols: List[str], limit: int = 20) -> Dict[str, ExtendedDepth]:
+        """
+        并发获取多个交易对的深度数据
+        
+        缺失的订单簿会一起创建，总耗时约等于最慢的一个交易对，而不是逐个累加
+        
+        Returns:
+            {symbol: ExtendedDepth}
+        """
+        self._ensure_initialized()
+        missing = [symbol for symbol in symbols if symbol not in self.orderbooks]
+        if missing:
+            # 单个创建失败时由get_depth自行回退到REST API
+            await asyncio.gather(*(self._ensure_orderbook(symbol) for symbol in missing), return_exceptions=True)
+        depths = await asyncio.gather(*(self.get_depth(symbol, limit) for symbol in symbols))
+        return dict(zip(symbols, depths))
+    
     async def get_depth(self, symbol: str, limit: int = 20) -> ExtendedDepth:
         """获取深度数据（优先使用WebSocket，避免API限速）"""
         self._ensure_initialized()
@@ -562,55 +910,16 @@ class Extended:
         use_rest_api = False  # 默认不使用REST API
         
         try:
-            print(f"[Extended] 尝试获取 {symbol} 的深度数据（优先使用WebSocket）...")
+            log.debug("[Extended] 尝试获取 %s 的深度数据（优先使用WebSocket）...", symbol)
             
             # 优先使用WebSocket OrderBook获取实时数据
             try:
                 # 创建或获取订单簿（在持久的事件循环中）
-                if symbol not in self.orderbooks:
-                    market = await self.get_market(symbol)
-                    if not market:
-                        print(f"[Extended] 未找到市场: {symbol}")
-                        raise ValueError(f"未找到市场: {symbol}")
-                    
-                    print(f"[Extended] 创建WebSocket OrderBook连接...")
-                    # 在持久的事件循环中创建 OrderBook
-                    if self._orderbook_loop is not None and self._orderbook_loop.is_running():
-                        # 使用持久的事件循环创建 OrderBook
-                        # 注意：OrderBook 需要在持久的事件循环中创建和运行，这样 WebSocket 才能持续更新
-                        future = asyncio.run_coroutine_threadsafe(
-                            OrderBook.create(
-                                self.config,
-                                market_name=symbol,
-                                start=True
-                            ),
-                            self._orderbook_loop
-                        )
-                        try:
-                            self.orderbooks[symbol] = future.result(timeout=10)
-                            print(f"[Extended] OrderBook已在持久事件循环中创建并启动")
-                        except Exception as e:
-                            print(f"[Extended] 在持久事件循环中创建OrderBook失败: {e}，尝试在当前事件循环中创建")
-                            # 如果失败，回退到当前事件循环
-                            self.orderbooks[symbol] = await OrderBook.create(
-                                self.config,
-                                market_name=symbol,
-                                start=True
-                            )
-                    else:
-                        # 如果没有持久的事件循环，在当前事件循环中创建
-                        print(f"[Extended] 持久事件循环未运行，在当前事件循环中创建OrderBook")
-                        self.orderbooks[symbol] = await OrderBook.create(
-                            self.config,
-                            market_name=symbol,
-                            start=True
-                        )
-                
-                orderbook = self.orderbooks[symbol]
+                orderbook = await self._ensure_orderbook(symbol)
                 
                 # 等待数据更新（如果订单簿刚创建）
                 if not orderbook.best_bid() or not orderbook.best_ask():
-                    print(f"[Extended] 等待WebSocket数据更新...")
+                    log.debug("[Extended] 等待WebSocket数据更新...")
                     await asyncio.sleep(2)  # 等待WebSocket连接建立和数据更新
                 
                 # 从WebSocket OrderBook获取多档数据
@@ -623,46 +932,36 @@ class Extended:
                     current_ask_price = float(best_ask.price)
                     
                     # 检查价格是否在更新（只在价格变化时刷新时间戳）
-                    current_time = time.time()
-                    if symbol in self.last_depth_prices:
-                        last_prices = self.last_depth_prices[symbol]
-                        last_bid = last_prices.get('bid')
-                        last_ask = last_prices.get('ask')
-                        last_timestamp = last_prices.get('timestamp', 0)
-                        
-                        if last_bid == current_bid_price and last_ask == current_ask_price:
-                            # 价格完全相同，检查是否长时间没有变化
-                            if current_time - last_timestamp > 30.0:
-                                # 认为 WebSocket 可能已经卡住，优先安全地关闭并移除旧的 OrderBook，
-                                # 然后本次改用 REST 校验最新价格，下一次调用会重新创建 WebSocket 连接
-                                print(f"[Extended] WebSocket OrderBook价格在30秒内未变化，认为可能已卡住，切换为REST并重建OrderBook...")
-                                try:
-                                    if symbol in self.orderbooks:
-                                        ob = self.orderbooks.pop(symbol)
-                                        # 尝试关闭旧的 OrderBook（如果 SDK 提供 close/stop 方法）
-                                        close_fn = getattr(ob, "close", None) or getattr(ob, "stop", None)
-                                        if callable(close_fn):
-                                            close_fn()
-                                except Exception as close_err:
-                                    print(f"[Extended] 关闭旧OrderBook时出错: {close_err}")
-                                use_rest_api = True
-                        else:
-                            # 价格发生了变化，刷新时间戳
-                            self.last_depth_prices[symbol] = {
-                                'bid': current_bid_price,
-                                'ask': current_ask_price,
-                                'timestamp': current_time
-                            }
+                    current_time = time.monotonic()
+                    last_prices = self.last_depth_prices.get(symbol)
+                    if last_prices is None:
+                        # 第一次获取，创建记录（之后原地更新，不再每次分配新对象）
+                        last_prices = self.last_depth_prices[symbol] = _PriceTick()
+                    
+                    if last_prices.bid == current_bid_price and last_prices.ask == current_ask_price:
+                        # 价格完全相同，检查是否长时间没有变化
+                        if current_time - last_prices.ts > 30.0:
+                            # 认为 WebSocket 可能已经卡住，优先安全地关闭并移除旧的 OrderBook，
+                            # 然后本次改用 REST 校验最新价格，下一次调用会重新创建 WebSocket 连接
+                            log.warning("[Extended] WebSocket OrderBook价格在30秒内未变化，认为可能已卡住，切换为REST并重建OrderBook...")
+                            try:
+                                if symbol in self.orderbooks:
+                                    ob = self.orderbooks.pop(symbol)
+                                    # 尝试关闭旧的 OrderBook（如果 SDK 提供 close/stop 方法）
+                                    close_fn = getattr(ob, "close", None) or getattr(ob, "stop", None)
+                                    if callable(close_fn):
+                                        close_fn()
+                            except Exception as close_err:
+                                log.warning("[Extended] 关闭旧OrderBook时出错: %s", close_err)
+                            use_rest_api = True
                     else:
-                        # 第一次获取，记录价格
-                        self.last_depth_prices[symbol] = {
-                            'bid': current_bid_price,
-                            'ask': current_ask_price,
-                            'timestamp': current_time
-                        }
+                        # 价格发生了变化（或第一次获取），刷新记录
+                        last_prices.bid = current_bid_price
+                        last_prices.ask = current_ask_price
+                        last_prices.ts = current_time
                     
                     if not use_rest_api:
-                        print(f"[Extended] WebSocket OrderBook - 最佳买价: {best_bid.price}, 最佳卖价: {best_ask.price}")
+                        log.debug("[Extended] WebSocket OrderBook - 最佳买价: %s, 最佳卖价: %s", best_bid.price, best_ask.price)
                         
                         # 添加最佳买卖价
                         bids.append(ExtendedDepthLevel(
@@ -678,22 +977,23 @@ class Extended:
                         # 注意：Extended的OrderBook可能只提供最佳价，如果需要更多档位，可能需要使用REST API
                         # 这里先获取最佳价，如果需要更多档位，可以fallback到REST API
                         if limit > 1:
-                            print(f"[Extended] WebSocket OrderBook仅提供最佳价，如需更多档位将使用REST API")
+                            log.debug("[Extended] WebSocket OrderBook仅提供最佳价，如需更多档位将使用REST API")
                             # 如果需要更多档位，继续使用REST API获取
                             use_rest_api = True
                         else:
                             use_rest_api = False
                         
                         if bids and asks:
-                            print(f"[Extended] WebSocket OrderBook成功获取深度数据: {len(bids)}档买盘, {len(asks)}档卖盘")
+                            log.debug("[Extended] WebSocket OrderBook成功获取深度数据: %s档买盘, %s档卖盘", len(bids), len(asks))
                             # 如果只需要最佳价，直接返回
                             if limit == 1:
+                                now_ms = _now_ms()
                                 return ExtendedDepth(
                                     symbol=symbol,
-                                    last_update_id=int(time.time() * 1000),
+                                    last_update_id=now_ms,
                                     bids=bids,
                                     asks=asks,
-                                    event_time=int(time.time() * 1000)
+                                    event_time=now_ms
                                 )
                     # WebSocket本次返回了有效数据，清空“无数据”计数
                     self.orderbook_empty_count[symbol] = 0
@@ -701,10 +1001,10 @@ class Extended:
                     # 连续无数据计数+1
                     empty_count = self.orderbook_empty_count.get(symbol, 0) + 1
                     self.orderbook_empty_count[symbol] = empty_count
-                    print(f"[Extended] WebSocket OrderBook暂无数据（连续 {empty_count} 次），尝试使用REST API...")
+                    log.warning("[Extended] WebSocket OrderBook暂无数据（连续 %s 次），尝试使用REST API...", empty_count)
                     # 如果连续多次（比如 20 次）都没有任何数据，认为 WebSocket 连接可能异常，重建 OrderBook
                     if empty_count >= 20:
-                        print(f"[Extended] {symbol} 的WebSocket OrderBook在长时间内均无数据，尝试重建OrderBook连接...")
+                        log.warning("[Extended] %s 的WebSocket OrderBook在长时间内均无数据，尝试重建OrderBook连接...", symbol)
                         try:
                             if symbol in self.orderbooks:
                                 ob = self.orderbooks.pop(symbol)
@@ -712,23 +1012,23 @@ class Extended:
                                 if callable(close_fn):
                                     close_fn()
                         except Exception as close_err:
-                            print(f"[Extended] 重建OrderBook前关闭旧连接时出错: {close_err}")
+                            log.warning("[Extended] 重建OrderBook前关闭旧连接时出错: %s", close_err)
                         # 重置计数，下次调用会重新创建 OrderBook
                         self.orderbook_empty_count[symbol] = 0
                     use_rest_api = True
                     
             except Exception as e:
-                print(f"[Extended] WebSocket OrderBook失败: {e}，尝试使用REST API...")
+                log.warning("[Extended] WebSocket OrderBook失败: %s，尝试使用REST API...", e)
                 use_rest_api = True
             
             # 如果需要更多档位或WebSocket失败，使用REST API作为fallback
             if use_rest_api:
-                print(f"[Extended] 使用REST API获取最新深度数据...")
+                log.debug("[Extended] 使用REST API获取最新深度数据...")
                 try:
                     orderbook_snapshot = await self.trading_client.markets_info.get_orderbook_snapshot(market_name=symbol)
                     
                     if hasattr(orderbook_snapshot, 'error') and orderbook_snapshot.error:
-                        print(f"[Extended] REST API错误: {orderbook_snapshot.error}")
+                        log.warning("[Extended] REST API错误: %s", orderbook_snapshot.error)
                     elif hasattr(orderbook_snapshot, 'data') and orderbook_snapshot.data:
                         data = orderbook_snapshot.data
                         
@@ -738,75 +1038,37 @@ class Extended:
                             bids = []
                             asks = []
                         
-                        # 解析买盘数据
-                        if hasattr(data, 'bid') and data.bid:
-                            # 如果已有WebSocket数据，只添加更多档位；否则替换
-                            if not bids:
-                                bids = []
-                            for i, bid_level in enumerate(data.bid[:limit]):
-                                if isinstance(bid_level, (list, tuple)) and len(bid_level) >= 2:
-                                    price = str(bid_level[0])
-                                    qty = str(bid_level[1])
-                                elif hasattr(bid_level, 'price') and hasattr(bid_level, 'qty'):
-                                    price = str(bid_level.price)
-                                    qty = str(bid_level.qty)
-                                else:
-                                    continue
-                                
-                                # 避免重复添加最佳价（如果WebSocket已经提供了）
-                                if bids and price == bids[0].price:
-                                    continue
-                                
-                                bids.append(ExtendedDepthLevel(price=price, quantity=qty))
-                            print(f"[Extended] REST API解析后买盘数量: {len(bids)}")
-                        
-                        # 解析卖盘数据
-                        if hasattr(data, 'ask') and data.ask:
-                            # 如果已有WebSocket数据，只添加更多档位；否则替换
-                            if not asks:
-                                asks = []
-                            for i, ask_level in enumerate(data.ask[:limit]):
-                                if isinstance(ask_level, (list, tuple)) and len(ask_level) >= 2:
-                                    price = str(ask_level[0])
-                                    qty = str(ask_level[1])
-                                elif hasattr(ask_level, 'price') and hasattr(ask_level, 'qty'):
-                                    price = str(ask_level.price)
-                                    qty = str(ask_level.qty)
-                                else:
-                                    continue
-                                
-                                # 避免重复添加最佳价（如果WebSocket已经提供了）
-                                if asks and price == asks[0].price:
-                                    continue
-                                
-                                asks.append(ExtendedDepthLevel(price=price, quantity=qty))
-                            print(f"[Extended] REST API解析后卖盘数量: {len(asks)}")
+                        # 解析买卖盘数据（如果已有WebSocket数据，只添加更多档位）
+                        for levels, raw_levels in ((bids, getattr(data, 'bid', None)), (asks, getattr(data, 'ask', None))):
+                            if raw_levels:
+                                _append_depth_levels(levels, raw_levels, limit)
+                        log.debug("[Extended] REST API解析后买盘数量: %s，卖盘数量: %s", len(bids), len(asks))
                 except Exception as e:
-                    print(f"[Extended] REST API获取失败: {e}")
+                    log.warning("[Extended] REST API获取失败: %s", e)
             
             # 如果仍然没有数据，返回空深度数据
             if not bids and not asks:
-                print(f"[Extended] 交易对 {symbol} 暂无深度数据")
+                log.warning("[Extended] 交易对 %s 暂无深度数据", symbol)
             
+            now_ms = _now_ms()
             return ExtendedDepth(
                 symbol=symbol,
-                last_update_id=int(time.time() * 1000),
+                last_update_id=now_ms,
                 bids=bids,
                 asks=asks,
-                event_time=int(time.time() * 1000)
+                event_time=now_ms
             )
             
         except Exception as e:
-            print(f"[Extended] 获取深度数据失败: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception("[Extended] 获取深度数据失败: %s", e)
             # 返回空的深度数据
+            now_ms = _now_ms()
             return ExtendedDepth(
                 symbol=symbol,
-                last_update_id=int(time.time() * 1000),
+                last_update_id=now_ms,
                 bids=[],
                 asks=[],
-                event_time=int(time.time() * 1000)
+                event_time=now_ms
             )
     
     async def get_account(self, force_refresh: bool = False) -> ExtendedAccountSnapshot:
@@ -838,24 +1100,18 @@ class Extended:
         except Exception:
             has_margin = True
 
-        def _abs_float(v: str) -> float:
-            try:
-                return abs(float(v))
-            except Exception:
-                return 0.0
-
-        total_size = sum(_abs_float(p.position_amt) for p in positions) if positions else 0.0
+        # position_amt 已是Decimal（见_format_position），直接求和，无需逐个转换/捕获异常
+        total_size = sum(abs(p.position_amt) for p in positions)
         # 使用市场最小下单量的一半作为阈值（若可取到）
-        min_threshold = 0.0
+        min_threshold = _ZERO
         try:
             any_symbol = positions[0].symbol if positions else self.default_market
             m = await self.get_market(any_symbol)
             if m:
-                from decimal import Decimal
-                min_threshold = float(m.trading_config.min_order_size / Decimal('2'))
+                min_threshold = m.trading_config.min_order_size / 2
         except Exception:
             pass
-        if not has_margin and total_size <= max(min_threshold, 1e-9):
+        if not has_margin and total_size <= max(min_threshold, _MIN_POSITION_SIZE):
             positions = []
         
         # 创建账户快照
@@ -895,54 +1151,56 @@ class Extended:
         """
         self._ensure_initialized()
         
+        # 订单流已连接时，缓存由订单事件实时维护，直接返回快照
+        if use_cache and self.orders_ws_subscribed:
+            with self.lock:
+                self.orders_cache_hits += 1
+            orders = self.open_orders_snapshot
+            if symbol:
+                return [order for order in orders if order.symbol == symbol]
+            return list(orders)
+        
         # 检查缓存是否有效
-        current_time = time.time()
-        cache_valid = (
-            use_cache and
-            self.orders_cache_timestamp > 0 and
-            (current_time - self.orders_cache_timestamp) < self.orders_cache_ttl
-        )
+        current_time = time.monotonic()
+        cache_valid = use_cache and self.orders_cache_valid(current_time)
         
         if cache_valid:
             cache_age = current_time - self.orders_cache_timestamp
-            print(f"[Extended] 使用订单缓存（缓存时间: {cache_age:.2f}秒前，TTL: {self.orders_cache_ttl}秒）")
-            # 从缓存中获取订单
-            with self.lock:
-                orders = list(self.open_orders.values())
+            log.debug("[Extended] 使用订单缓存（缓存时间: %.2f秒前）", cache_age)
+            # 从缓存快照中获取订单
+            orders = self.open_orders_snapshot
             
             # 如果指定了symbol，过滤订单
             if symbol:
-                orders = [order for order in orders if order.symbol == symbol and order.status in ['NEW', 'PARTIALLY_FILLED']]
+                orders = [order for order in orders if order.symbol == symbol and order.status in _OPEN_STATUSES]
             else:
                 # 只返回未成交订单
-                orders = [order for order in orders if order.status in ['NEW', 'PARTIALLY_FILLED']]
+                orders = [order for order in orders if order.status in _OPEN_STATUSES]
             
             return orders
         
         # 缓存无效或未启用，使用REST API获取
-        print(f"[Extended] 使用REST API获取未成交订单（避免频繁调用，建议使用WebSocket订阅）...")
+        log.debug("[Extended] 使用REST API获取未成交订单（避免频繁调用，建议使用WebSocket订阅）...")
         orders_response = await self.trading_client.account.get_open_orders()
         if hasattr(orders_response, 'error') and orders_response.error:
             raise Exception(f"获取订单失败: {orders_response.error}")
         
-        orders = []
+        # 先按交易对和原始状态过滤，只格式化未成交订单（与缓存命中时的返回结果一致）
+        orders = [
+            self._format_order(order_data)
+            for order_data in orders_response.data
+            if (not symbol or order_data.market == symbol)
+            and _enum_value(order_data.status, 'UNKNOWN') in _OPEN_STATUSES
+        ]
+        open_orders = {order.order_id: order for order in orders}
+        
         with self.lock:
-            # 清空旧缓存
-            self.open_orders.clear()
-            # 更新缓存时间戳
-            self.orders_cache_timestamp = time.time()
-            
-            for order_data in orders_response.data:
-                if symbol and order_data.market != symbol:
-                    continue
-                
-                order = self._format_order(order_data)
-                orders.append(order)
-                
-                # 更新缓存（只缓存未成交订单）
-                if order.status in ['NEW', 'PARTIALLY_FILLED']:
-                    self.open_orders[order.order_id] = order
-            
+            # 整体替换旧缓存，读取方不会看到清空到一半的字典
+            self.open_orders = open_orders
+            self.client_order_id_to_order_id = {
+                order.client_order_id: order.order_id for order in orders if order.client_order_id
+            }
+            self._publish_open_orders()
             # 更新缓存时间戳
             self.orders_cache_timestamp = current_time
         
@@ -959,19 +1217,22 @@ class Extended:
             symbol = params['symbol']
             side = self._convert_order_side(params['side'])
             order_type = self._convert_order_type(params['type'])
-            quantity = Decimal(params['quantity'])
-            price = Decimal(params['price']) if 'price' in params else None
+            quantity = _to_decimal(params['quantity'])
+            price = _to_decimal(params['price']) if 'price' in params else None
         else:
             # 直接传参方式
             if symbol is None or side is None or order_type is None or quantity is None:
                 raise ValueError("缺少必需参数: symbol, side, order_type, quantity")
             side = self._convert_order_side(side)
             order_type = self._convert_order_type(order_type)
-            quantity = Decimal(str(quantity))
-            price = Decimal(str(price)) if price is not None else None
+            quantity = _to_decimal(quantity)
+            price = _to_decimal(price) if price is not None else None
         
-        # 获取市场信息
-        market = await self.get_market(symbol)
+        # 获取市场信息（市价单同时并发获取盘口最优价）
+        if order_type == OrderType.MARKET:
+            market, best_bid, best_ask = await self._fetch_price_context(symbol)
+        else:
+            market = await self.get_market(symbol)
         if not market:
             raise ValueError(f"未找到市场: {symbol}")
         
@@ -980,52 +1241,20 @@ class Extended:
         if quantity < min_order_size:
             raise ValueError(f"订单数量 {quantity} 小于最小交易量 {min_order_size}")
         
-        # 使用round_order_size方法调整数量精度
-        quantity = market.trading_config.round_order_size(quantity)
+        # 按市场数量精度取整
+        quantity = _round_size(market, quantity)
         
         # 创建订单
         if order_type == OrderType.MARKET:
             # 市价单 - 使用IOC限价单模拟，并使用盘口价+容差，提升成交概率
-            try:
-                ob = await self.trading_client.markets_info.get_orderbook_snapshot(market_name=symbol)
-                best_bid = None
-                best_ask = None
-                if hasattr(ob, 'data') and ob.data:
-                    if hasattr(ob.data, 'bid') and ob.data.bid:
-                        level = ob.data.bid[0]
-                        best_bid = Decimal(str(level[0] if isinstance(level, (list, tuple)) else getattr(level, 'price', '0')))
-                    if hasattr(ob.data, 'ask') and ob.data.ask:
-                        level = ob.data.ask[0]
-                        best_ask = Decimal(str(level[0] if isinstance(level, (list, tuple)) else getattr(level, 'price', '0')))
-            except Exception:
-                best_bid = None
-                best_ask = None
-
-            # 回退到最新价
-            last_price = Decimal(str(market.market_stats.last_price))
-            # 设定容差（0.3%），根据方向选择更易成交的价格
-            tolerance = Decimal('0.003')
-            if side == OrderSide.BUY:
-                target = (best_ask if best_ask and best_ask > 0 else last_price) * (Decimal('1') + tolerance)
-            else:
-                target = (best_bid if best_bid and best_bid > 0 else last_price) * (Decimal('1') - tolerance)
-            # 调整价格精度
-            price_decimal = market.trading_config.round_price(target)
-
-            # 市价单必须使用IOC时间类型
             reduce_only = params.get('reduceOnly', False) if params else False
-            placed_order = await self.trading_client.place_order(
-                market_name=symbol,
-                amount_of_synthetic=quantity,
-                price=price_decimal,
-                side=side,
-                time_in_force=TimeInForce.IOC,
-                reduce_only=reduce_only
+            placed_order, _ = await self._submit_ioc_taker(
+                symbol, market, side, quantity, best_bid, best_ask, reduce_only=reduce_only
             )
         else:
             # 限价单 - 调整价格精度
             if price is not None:
-                price = market.trading_config.round_price(price)
+                price = _round_price(market, price)
             
             reduce_only = params.get('reduceOnly', False) if params else False
             post_only = params.get('postOnly', False) if params else False
@@ -1039,13 +1268,19 @@ class Extended:
                 side=side,
                 time_in_force=time_in_force,
                 post_only=post_only,
-                reduce_only=reduce_only
+                reduce_only=reduce_only,
+                # 调用方指定的客户端订单ID，之后可直接按该ID撤单
+                external_id=params.get('clientOrderId') if params else None,
+                # 被替换订单的客户端订单ID：新单与撤销旧单在同一请求中完成
+                previous_order_id=params.get('previousClientOrderId') if params else None
             )
         
         if hasattr(placed_order, 'error') and placed_order.error:
+            self.invalidate_market(symbol)
             raise Exception(f"下单失败: {placed_order.error}")
         
         # 创建订单对象
+        now_ms = _now_ms()
         order = ExtendedOrder(
             order_id=placed_order.data.id,
             client_order_id=placed_order.data.external_id,
@@ -1057,15 +1292,19 @@ class Extended:
             status="NEW",
             time_in_force=params.get('timeInForce', 'GTC') if params else 'GTC',
             reduce_only=reduce_only,
-            time=int(time.time() * 1000),
-            update_time=int(time.time() * 1000)
+            time=now_ms,
+            update_time=now_ms
         )
         
-        # 更新缓存
+        # 更新缓存（改单时旧订单已被交易所撤销，一并移除）
+        previous_client_order_id = params.get('previousClientOrderId') if params else None
         with self.lock:
-            self.open_orders[order.order_id] = order
-            # 更新缓存时间戳
-            self.orders_cache_timestamp = time.time()
+            if previous_client_order_id:
+                self._pop_open_order(self.client_order_id_to_order_id.get(previous_client_order_id))
+            self._put_open_order(order)
+            self._publish_open_orders()
+            # 写入后缓存即为最新：刷新时间戳并记录本次写入（用于自适应TTL）
+            self._mark_orders_written()
         
         return order
     
@@ -1076,18 +1315,15 @@ class Extended:
         if order_id:
             cancel_response = await self.trading_client.orders.cancel_order(order_id=order_id)
         elif client_order_id:
-            # 通过client_order_id查找order_id
-            orders = await self.get_open_orders(symbol)
-            order_id = None
-            for order in orders:
-                if order.client_order_id == client_order_id:
-                    order_id = order.order_id
-                    break
-            
-            if not order_id:
-                raise ValueError(f"未找到订单: {client_order_id}")
-            
-            cancel_response = await self.trading_client.orders.cancel_order(order_id=order_id)
+            # 索引中有order_id时按order_id撤单；没有时直接按client_order_id（external_id）撤单，
+            # 无需先刷新订单缓存查找order_id
+            order_id = self.client_order_id_to_order_id.get(client_order_id)
+            if order_id:
+                cancel_response = await self.trading_client.orders.cancel_order(order_id=order_id)
+            else:
+                cancel_response = await self.trading_client.orders.cancel_order_by_external_id(
+                    order_external_id=client_order_id
+                )
         else:
             raise ValueError("必须提供order_id或client_order_id")
         
@@ -1096,11 +1332,13 @@ class Extended:
         
         # 从缓存中移除
         with self.lock:
-            self.open_orders.pop(order_id, None)
-            # 更新缓存时间戳
-            self.orders_cache_timestamp = time.time()
+            self._pop_open_order(order_id)
+            self._publish_open_orders()
+            # 写入后缓存即为最新：刷新时间戳并记录本次写入（用于自适应TTL）
+            self._mark_orders_written()
         
         # 返回被撤销的订单
+        now_ms = _now_ms()
         return ExtendedOrder(
             order_id=order_id,
             client_order_id=client_order_id or "",
@@ -1110,9 +1348,37 @@ class Extended:
             quantity="0",
             price="0",
             status="CANCELLED",
-            time=int(time.time() * 1000),
-            update_time=int(time.time() * 1000)
+            time=now_ms,
+            update_time=now_ms
+        )
+    
+    async def _mass_cancel(self, order_ids: List[int]) -> List[int]:
+        """
+        分批并发批量撤单（每批最多 _MASS_CANCEL_CHUNK 个订单）
+        
+        Returns:
+            撤销成功的订单ID列表；所有批次都失败时抛出异常
+        """
+        chunks = [order_ids[i:i + _MASS_CANCEL_CHUNK] for i in range(0, len(order_ids), _MASS_CANCEL_CHUNK)]
+        results = await asyncio.gather(
+            *(self.trading_client.orders.mass_cancel(order_ids=chunk) for chunk in chunks),
+            return_exceptions=True
         )
+        
+        cancelled_ids = []
+        errors = []
+        for chunk, result in zip(chunks, results):
+            error = result if isinstance(result, Exception) else getattr(result, 'error', None)
+            if error:
+                errors.append(error)
+            else:
+                cancelled_ids.extend(chunk)
+        
+        if errors:
+            if not cancelled_ids:
+                raise Exception(f"批量撤单失败: {errors[0]}")
+            log.warning("[Extended] 部分批次撤单失败（%s/%s批）: %s", len(errors), len(chunks), errors[0])
+        return cancelled_ids
     
     async def cancel_all_orders(self, symbol: str) -> List[Dict]:
         """撤销所有订单"""
@@ -1124,17 +1390,29 @@ class Extended:
             return []
         
         # 批量撤销
-        order_ids = [order.order_id for order in orders]
-        cancel_response = await self.trading_client.orders.mass_cancel(order_ids=order_ids)
+        return await self.cancel_orders(symbol, [order.order_id for order in orders])
+    
+    async def cancel_orders(self, symbol: str, order_ids: List[int]) -> List[Dict]:
+        """
+        按订单ID批量撤单（一次mass_cancel请求代替逐个cancel_order）
         
-        if hasattr(cancel_response, 'error') and cancel_response.error:
-            raise Exception(f"批量撤单失败: {cancel_response.error}")
+        Returns:
+            撤销成功的订单列表
+        """
+        self._ensure_initialized()
         
-        # 清空缓存
+        if not order_ids:
+            return []
+        
+        order_ids = await self._mass_cancel(list(order_ids))
+        
+        # 从缓存中移除已撤销的订单
         with self.lock:
-            self.open_orders.clear()
-            # 更新缓存时间戳
-            self.orders_cache_timestamp = time.time()
+            for order_id in order_ids:
+                self._pop_open_order(order_id)
+            self._publish_open_orders()
+            # 写入后缓存即为最新：刷新时间戳并记录本次写入（用于自适应TTL）
+            self._mark_orders_written()
         
         return [{"orderId": order_id, "status": "CANCELLED"} for order_id in order_ids]
     
@@ -1159,48 +1437,44 @@ class Extended:
         if not orders:
             return []
         
-        # 筛选匹配的订单
-        matched_orders = []
-        price_decimal = Decimal(str(price))
-        tolerance_decimal = Decimal(str(tolerance))
+        # 筛选匹配的订单：先用预先计算的小写type/side过滤，再只对候选订单做价格比较
+        price_decimal = _to_decimal(price)
+        tolerance_decimal = _to_decimal(tolerance)
+        low = price_decimal - tolerance_decimal
+        high = price_decimal + tolerance_decimal
+        side_lower = side.lower() if side else None
         
-        for order in orders:
-            # 只处理限价单
-            if order.type.upper() != "LIMIT":
-                continue
-            
-            # 检查订单方向（如果指定了side）
-            if side and order.side.upper() != side.upper():
-                continue
-            
+        candidates = [
+            order for order in orders
+            if order.type_lower == "limit" and (side_lower is None or order.side_lower == side_lower)
+        ]
+        
+        matched_orders = []
+        for order in candidates:
             # 检查价格是否匹配（考虑容差）
             try:
-                order_price = Decimal(order.price)
-                price_diff = abs(order_price - price_decimal)
-                
-                if price_diff <= tolerance_decimal:
+                if low <= Decimal(order.price) <= high:
                     matched_orders.append(order)
-            except (ValueError, TypeError) as e:
-                print(f"[Extended] 解析订单价格失败: {order.price}, 错误: {e}")
-                continue
+            except (ArithmeticError, ValueError, TypeError) as e:
+                log.warning("[Extended] 解析订单价格失败: %s, 错误: %s", order.price, e)
         
         if not matched_orders:
-            print(f"[Extended] 未找到匹配价格的订单: {symbol} @ {price}")
+            log.info("[Extended] 未找到匹配价格的订单: %s @ %s", symbol, price)
             return []
         
         # 批量撤销匹配的订单
-        order_ids = [order.order_id for order in matched_orders]
-        cancel_response = await self.trading_client.orders.mass_cancel(order_ids=order_ids)
-        
-        if hasattr(cancel_response, 'error') and cancel_response.error:
-            raise Exception(f"批量撤单失败: {cancel_response.error}")
+        order_ids = await self._mass_cancel([order.order_id for order in matched_orders])
+        if len(order_ids) < len(matched_orders):
+            cancelled_ids = set(order_ids)
+            matched_orders = [order for order in matched_orders if order.order_id in cancelled_ids]
         
         # 从缓存中移除
         with self.lock:
             for order_id in order_ids:
-                self.open_orders.pop(order_id, None)
-            # 更新缓存时间戳
-            self.orders_cache_timestamp = time.time()
+                self._pop_open_order(order_id)
+            self._publish_open_orders()
+            # 写入后缓存即为最新：刷新时间戳并记录本次写入（用于自适应TTL）
+            self._mark_orders_written()
         
         # 更新订单状态为已撤销
         cancelled_orders = []
@@ -1217,11 +1491,11 @@ class Extended:
                 time_in_force=order.time_in_force,
                 reduce_only=order.reduce_only,
                 time=order.time,
-                update_time=int(time.time() * 1000)
+                update_time=_now_ms()
             )
             cancelled_orders.append(cancelled_order)
         
-        print(f"[Extended] 成功撤销 {len(cancelled_orders)} 个匹配价格的订单: {symbol} @ {price}")
+        log.info("[Extended] 成功撤销 %s 个匹配价格的订单: %s @ %s", len(cancelled_orders), symbol, price)
         return cancelled_orders
     
     async def create_order_by_usdt(self, symbol: str, side: str, usdt_amount: float, 
@@ -1229,23 +1503,21 @@ class Extended:
         """按USDT金额下单"""
         self._ensure_initialized()
         
-        # 获取市场信息
-        market = await self.get_market(symbol)
-        if not market:
-            raise ValueError(f"未找到市场: {symbol}")
-        
-        # 获取当前价格
+        # 获取市场信息（需要当前价格时与Ticker并发获取）
         if order_type == "MARKET" or price is None:
-            ticker = await self.get_ticker(symbol)
+            market, ticker = await asyncio.gather(self.get_market(symbol), self.get_ticker(symbol))
             current_price = float(ticker.last_price)
         else:
+            market = await self.get_market(symbol)
             current_price = price
+        if not market:
+            raise ValueError(f"未找到市场: {symbol}")
         
         # 计算数量
         quantity = Decimal(usdt_amount) / Decimal(current_price)
         
         # 根据市场配置调整数量精度
-        quantity = market.trading_config.round_order_size(quantity)
+        quantity = _round_size(market, quantity)
         
         # 创建订单参数
         params = {
@@ -1257,7 +1529,7 @@ class Extended:
         
         if order_type == "LIMIT" and price:
             # 调整价格精度
-            price_decimal = market.trading_config.round_price(Decimal(price))
+            price_decimal = _round_price(market, _to_decimal(price))
             params['price'] = str(price_decimal)
             params['timeInForce'] = 'GTC'
         
@@ -1267,8 +1539,11 @@ class Extended:
         """平仓"""
         self._ensure_initialized()
         
-        # 获取当前持仓
-        positions = await self.get_positions(symbol)
+        # 并发获取当前持仓、市场信息和盘口最优价（互不依赖）
+        positions, (market, best_bid, best_ask) = await asyncio.gather(
+            self.get_positions(symbol),
+            self._fetch_price_context(symbol)
+        )
         if not positions:
             raise ValueError(f"没有找到 {symbol} 的持仓")
         
@@ -1283,8 +1558,7 @@ class Extended:
         else:  # 空仓，需要买入平仓
             side = 'BUY'
         
-        # 获取市场信息以确保数量精度
-        market = await self.get_market(symbol)
+        # 市场信息用于确保数量精度
         if not market:
             raise ValueError(f"未找到市场: {symbol}")
         
@@ -1301,50 +1575,20 @@ class Extended:
             actual_quantity = abs(position_amt)
         
         # 使用IOC+盘口价±容差，确保尽快成交
-        from x10.perpetual.orders import OrderSide, TimeInForce
-        from decimal import Decimal
-
-        # 使用round_order_size方法调整数量精度
-        actual_quantity = market.trading_config.round_order_size(Decimal(str(actual_quantity)))
+        # 按市场数量精度取整
+        actual_quantity = _round_size(market, _to_decimal(actual_quantity))
 
         close_side = OrderSide.BUY if side == 'BUY' else OrderSide.SELL
-
-        # 获取盘口最优价
-        best_bid = None
-        best_ask = None
-        try:
-            ob = await self.trading_client.markets_info.get_orderbook_snapshot(market_name=symbol)
-            if hasattr(ob, 'data') and ob.data:
-                if hasattr(ob.data, 'bid') and ob.data.bid:
-                    level = ob.data.bid[0]
-                    best_bid = Decimal(str(level[0] if isinstance(level, (list, tuple)) else getattr(level, 'price', '0')))
-                if hasattr(ob.data, 'ask') and ob.data.ask:
-                    level = ob.data.ask[0]
-                    best_ask = Decimal(str(level[0] if isinstance(level, (list, tuple)) else getattr(level, 'price', '0')))
-        except Exception:
-            pass
-
-        last_price = Decimal(str(market.market_stats.last_price))
-        tolerance = Decimal('0.003')  # 0.3%
-        if close_side == OrderSide.BUY:
-            target = (best_ask if best_ask and best_ask > 0 else last_price) * (Decimal('1') + tolerance)
-        else:
-            target = (best_bid if best_bid and best_bid > 0 else last_price) * (Decimal('1') - tolerance)
-        price_decimal = market.trading_config.round_price(target)
-
-        placed_order = await self.trading_client.place_order(
-            market_name=symbol,
-            amount_of_synthetic=actual_quantity,
-            price=price_decimal,
-            side=close_side,
-            time_in_force=TimeInForce.IOC,
-            reduce_only=True
+        placed_order, price_decimal = await self._submit_ioc_taker(
+            symbol, market, close_side, actual_quantity, best_bid, best_ask, reduce_only=True
         )
         
         if hasattr(placed_order, 'error') and placed_order.error:
+            self.invalidate_market(symbol)
             raise Exception(f"平仓订单创建失败: {placed_order.error}")
         
         # 创建订单对象
+        now_ms = _now_ms()
         order = ExtendedOrder(
             order_id=placed_order.data.id,
             client_order_id=placed_order.data.external_id,
@@ -1356,13 +1600,14 @@ class Extended:
             status="NEW",
             time_in_force="GTT",
             reduce_only=True,
-            time=int(time.time() * 1000),
-            update_time=int(time.time() * 1000)
+            time=now_ms,
+            update_time=now_ms
         )
         
         # 缓存订单
         with self.lock:
-            self.open_orders[order.order_id] = order
+            self._put_open_order(order)
+            self._publish_open_orders()
         
         return order
     
@@ -1376,15 +1621,8 @@ class Extended:
                 if hasattr(positions_response, 'error') and positions_response.error:
                     raise Exception(f"获取持仓失败: {positions_response.error}")
 
-                positions_all = [self._format_position(pos) for pos in positions_response.data]
-                # 过滤零仓
-                positions = []
-                for p in positions_all:
-                    try:
-                        if abs(float(p.position_amt)) > 0:
-                            positions.append(p)
-                    except Exception:
-                        pass
+                # 过滤零仓（position_amt 已是Decimal，非零即为有持仓）
+                positions = [p for p in map(self._format_position, positions_response.data) if p.position_amt]
 
                 if symbol:
                     positions = [pos for pos in positions if str(pos.symbol).upper() == str(symbol).upper()]
@@ -1395,7 +1633,7 @@ class Extended:
                 # 若无持仓，稍等重试，避免撮合延迟
                 await asyncio.sleep(0.4)
             except Exception as e:
-                print(f"[Extended] 获取持仓失败(第{attempt+1}次): {e}")
+                log.warning("[Extended] 获取持仓失败(第%s次): %s", attempt+1, e)
                 await asyncio.sleep(0.3)
 
         return []
@@ -1404,8 +1642,11 @@ class Extended:
         """按指定数量平仓"""
         self._ensure_initialized()
         
-        # 获取当前持仓
-        positions = await self.get_positions(symbol)
+        # 并发获取当前持仓、市场信息和盘口最优价（互不依赖）
+        positions, (market, best_bid, best_ask) = await asyncio.gather(
+            self.get_positions(symbol),
+            self._fetch_price_context(symbol)
+        )
         if not positions:
             raise Exception(f"未找到持仓: {symbol}")
         
@@ -1415,7 +1656,7 @@ class Extended:
         # 确保平仓数量不超过持仓数量
         if quantity > position_amt:
             quantity = position_amt
-            print(f"警告: 平仓数量调整为持仓数量: {quantity}")
+            log.warning("[Extended] 平仓数量调整为持仓数量: %s", quantity)
         
         # 确定平仓方向
         if target_position.position_side == "LONG":
@@ -1423,8 +1664,7 @@ class Extended:
         else:
             close_side = "BUY"
         
-        # 获取市场信息以确保数量精度
-        market = await self.get_market(symbol)
+        # 市场信息用于确保数量精度
         if not market:
             raise ValueError(f"未找到市场: {symbol}")
         
@@ -1434,49 +1674,20 @@ class Extended:
             quantity = min_order_size
         
         # 使用IOC+盘口价±容差，确保尽快成交
-        from x10.perpetual.orders import OrderSide, TimeInForce
-        from decimal import Decimal
-
-        # 使用round_order_size方法调整数量精度
-        quantity = market.trading_config.round_order_size(Decimal(str(quantity)))
+        # 按市场数量精度取整
+        quantity = _round_size(market, _to_decimal(quantity))
 
         order_side = OrderSide.BUY if close_side == 'BUY' else OrderSide.SELL
-
-        best_bid = None
-        best_ask = None
-        try:
-            ob = await self.trading_client.markets_info.get_orderbook_snapshot(market_name=symbol)
-            if hasattr(ob, 'data') and ob.data:
-                if hasattr(ob.data, 'bid') and ob.data.bid:
-                    level = ob.data.bid[0]
-                    best_bid = Decimal(str(level[0] if isinstance(level, (list, tuple)) else getattr(level, 'price', '0')))
-                if hasattr(ob.data, 'ask') and ob.data.ask:
-                    level = ob.data.ask[0]
-                    best_ask = Decimal(str(level[0] if isinstance(level, (list, tuple)) else getattr(level, 'price', '0')))
-        except Exception:
-            pass
-
-        last_price = Decimal(str(market.market_stats.last_price))
-        tolerance = Decimal('0.003')
-        if order_side == OrderSide.BUY:
-            target = (best_ask if best_ask and best_ask > 0 else last_price) * (Decimal('1') + tolerance)
-        else:
-            target = (best_bid if best_bid and best_bid > 0 else last_price) * (Decimal('1') - tolerance)
-        price_decimal = market.trading_config.round_price(target)
-
-        placed_order = await self.trading_client.place_order(
-            market_name=symbol,
-            amount_of_synthetic=quantity,
-            price=price_decimal,
-            side=order_side,
-            time_in_force=TimeInForce.IOC,
-            reduce_only=True
+        placed_order, price_decimal = await self._submit_ioc_taker(
+            symbol, market, order_side, quantity, best_bid, best_ask, reduce_only=True
         )
         
         if hasattr(placed_order, 'error') and placed_order.error:
+            self.invalidate_market(symbol)
             raise Exception(f"平仓订单创建失败: {placed_order.error}")
         
         # 创建订单对象
+        now_ms = _now_ms()
         order = ExtendedOrder(
             order_id=placed_order.data.id,
             client_order_id=placed_order.data.external_id,
@@ -1488,13 +1699,14 @@ class Extended:
             status="NEW",
             time_in_force="GTT",
             reduce_only=True,
-            time=int(time.time() * 1000),
-            update_time=int(time.time() * 1000)
+            time=now_ms,
+            update_time=now_ms
         )
         
         # 缓存订单
         with self.lock:
-            self.open_orders[order.order_id] = order
+            self._put_open_order(order)
+            self._publish_open_orders()
         
         return order
     
@@ -1533,9 +1745,15 @@ class Extended:
             return False
         
         # 初始化深度回调
-        if symbol not in self.depth_callbacks:
-            self.depth_callbacks[symbol] = []
-        self.depth_callbacks[symbol].append(callback)
+        with self.lock:
+            stream_started = symbol in self.depth_callbacks
+            self.depth_callbacks.setdefault(symbol, []).append(callback)
+            # 订阅变化时重建只读分发表，事件回调中直接使用，无需每次复制回调列表
+            self._depth_dispatch = {s: tuple(callbacks) for s, callbacks in self.depth_callbacks.items()}
+        
+        # 该交易对的订单簿监听已启动（取消订阅后仍保留），只需登记回调
+        if stream_started:
+            return True
         
         # 启动订单簿监听（在后台线程中运行）
         def start_orderbook_thread():
@@ -1543,22 +1761,23 @@ class Extended:
                 try:
                     market = await self.get_market(symbol)
                     if not market:
-                        print(f"[Extended] 未找到市场: {symbol}")
+                        log.warning("[Extended] 未找到市场: %s", symbol)
                         return
                     
                     orderbook = await OrderBook.create(
                         self.config,
                         market_name=symbol,
                         start=True,
-                        best_ask_change_callback=self._on_best_ask_change,
-                        best_bid_change_callback=self._on_best_bid_change
+                        # 绑定交易对，回调只分发给该交易对的订阅者
+                        best_ask_change_callback=lambda best_ask: self._on_best_ask_change(best_ask, symbol),
+                        best_bid_change_callback=lambda best_bid: self._on_best_bid_change(best_bid, symbol)
                     )
                     
                     self.orderbooks[symbol] = orderbook
-                    print(f"[Extended] 开始监听 {symbol} 订单簿")
+                    log.info("[Extended] 开始监听 %s 订单簿", symbol)
                     
                 except Exception as e:
-                    print(f"[Extended] 启动订单簿监听失败: {e}")
+                    log.warning("[Extended] 启动订单簿监听失败: %s", e)
             
             # 创建新的事件循环
             loop = asyncio.new_event_loop()
@@ -1568,7 +1787,7 @@ class Extended:
                 # 保持事件循环运行
                 loop.run_forever()
             except Exception as e:
-                print(f"[Extended] 订单簿监听异常: {e}")
+                log.warning("[Extended] 订单簿监听异常: %s", e)
             finally:
                 loop.close()
         
@@ -1578,51 +1797,78 @@ class Extended:
         
         return True
     
-    def _on_best_ask_change(self, best_ask):
-        """最佳卖价变化回调"""
+    def unwatch_order_book(self, symbol: str, callback: Callable):
+        """取消订单簿变化回调（订单簿监听保持运行，再次订阅时复用）"""
+        with self.lock:
+            callbacks = self.depth_callbacks.get(symbol)
+            if not callbacks or callback not in callbacks:
+                return
+            callbacks.remove(callback)
+            self._depth_dispatch = {s: tuple(callbacks) for s, callbacks in self.depth_callbacks.items()}
+    
+    def _on_best_ask_change(self, best_ask, symbol: Optional[str] = None):
+        """最佳卖价变化回调（symbol为触发事件的交易对，未知时分发给所有订阅的交易对）"""
         if best_ask:
             # 触发深度更新回调
-            for symbol, callbacks in self.depth_callbacks.items():
-                if symbol in self.orderbooks:
-                    orderbook = self.orderbooks[symbol]
-                    best_bid = orderbook.best_bid()
-                    
-                    depth = ExtendedDepth(
-                        symbol=symbol,
-                        last_update_id=int(time.time() * 1000),
-                        bids=[ExtendedDepthLevel(price=str(best_bid.price), quantity=str(best_bid.quantity))] if best_bid else [],
-                        asks=[ExtendedDepthLevel(price=str(best_ask.price), quantity=str(best_ask.quantity))],
-                        event_time=int(time.time() * 1000)
-                    )
-                    
-                    for callback in callbacks:
-                        try:
-                            callback(depth)
-                        except Exception as e:
-                            print(f"[Extended] 深度更新回调错误: {e}")
+            dispatch = self._depth_dispatch
+            for symbol in ((symbol,) if symbol is not None else tuple(dispatch)):
+                callbacks = dispatch.get(symbol)
+                orderbook = self.orderbooks.get(symbol)
+                if callbacks and orderbook is not None:
+                    self._dispatch_depth(callbacks, self._top_of_book_depth(symbol, orderbook.best_bid(), best_ask))
     
-    def _on_best_bid_change(self, best_bid):
-        """最佳买价变化回调"""
+    def _on_best_bid_change(self, best_bid, symbol: Optional[str] = None):
+        """最佳买价变化回调（symbol为触发事件的交易对，未知时分发给所有订阅的交易对）"""
         if best_bid:
             # 触发深度更新回调
-            for symbol, callbacks in self.depth_callbacks.items():
-                if symbol in self.orderbooks:
-                    orderbook = self.orderbooks[symbol]
-                    best_ask = orderbook.best_ask()
-                    
-                    depth = ExtendedDepth(
-                        symbol=symbol,
-                        last_update_id=int(time.time() * 1000),
-                        bids=[ExtendedDepthLevel(price=str(best_bid.price), quantity=str(best_bid.quantity))],
-                        asks=[ExtendedDepthLevel(price=str(best_ask.price), quantity=str(best_ask.quantity))] if best_ask else [],
-                        event_time=int(time.time() * 1000)
-                    )
-                    
-                    for callback in callbacks:
-                        try:
-                            callback(depth)
-                        except Exception as e:
-                            print(f"[Extended] 深度更新回调错误: {e}")
+            dispatch = self._depth_dispatch
+            for symbol in ((symbol,) if symbol is not None else tuple(dispatch)):
+                callbacks = dispatch.get(symbol)
+                orderbook = self.orderbooks.get(symbol)
+                if callbacks and orderbook is not None:
+                    self._dispatch_depth(callbacks, self._top_of_book_depth(symbol, best_bid, orderbook.best_ask()))
+    
+    def _dispatch_depth(self, callbacks: Tuple[Callable, ...], depth: ExtendedDepth):
+        """调用深度回调；回调异常按秒汇总记录，避免每个事件都写一次日志"""
+        for callback in callbacks:
+            try:
+                callback(depth)
+            except Exception as e:
+                self._depth_callback_errors += 1
+                now = time.monotonic()
+                if now - self._depth_callback_error_ts >= 1.0:
+                    log.warning("[Extended] 深度更新回调错误: %s（最近共%s次）", e, self._depth_callback_errors)
+                    self._depth_callback_errors = 0
+                    self._depth_callback_error_ts = now
+    
+    def _top_of_book_depth(self, symbol: str, best_bid, best_ask) -> ExtendedDepth:
+        """
+        用最佳买卖价更新该交易对复用的深度快照并返回
+        
+        每个交易对只分配一次 ExtendedDepth 和买/卖档位对象，之后每次事件原地更新，
+        回调中如需保留数据应自行复制
+        """
+        snapshot = self._depth_snapshots.get(symbol)
+        if snapshot is None:
+            snapshot = (
+                ExtendedDepth(symbol=symbol, last_update_id=0, bids=[], asks=[]),
+                ExtendedDepthLevel(price='0', quantity='0'),
+                ExtendedDepthLevel(price='0', quantity='0')
+            )
+            self._depth_snapshots[symbol] = snapshot
+        depth, bid_level, ask_level = snapshot
+        
+        for levels, level, best in ((depth.bids, bid_level, best_bid), (depth.asks, ask_level, best_ask)):
+            if best:
+                level.price = str(best.price)
+                level.quantity = str(best.quantity)
+                if not levels:
+                    levels.append(level)
+            elif levels:
+                levels.clear()
+        
+        depth.last_update_id = depth.event_time = _now_ms()
+        return depth
     
     def watch_account(self, callback: Callable[[ExtendedAccountSnapshot], None]):
         """监听账户更新"""
@@ -1630,102 +1876,301 @@ class Extended:
     
     def watch_order(self, callback: Callable[[List[ExtendedOrder]], None]):
         """监听订单更新"""
-        self.order_callbacks.append(callback)
+        with self.lock:
+            # 订阅变化时整体替换列表，订单事件中遍历的旧列表不受影响
+            self.order_callbacks = [*self.order_callbacks, callback]
+        self.start_order_stream()
+    
+    def unwatch_order(self, callback: Callable[[List[ExtendedOrder]], None]):
+        """取消订单更新回调（订单流保持运行）"""
+        with self.lock:
+            self.order_callbacks = [c for c in self.order_callbacks if c != callback]
+    
+    def start_order_stream(self) -> bool:
+        """
+        启动账户WebSocket订单流（在OrderBook事件循环上运行）
+        
+        订单流连接后先用REST拉取一次全部未成交订单作为基线，之后每个订单事件都会直接更新open_orders，get_open_orders无需再调用REST API
+        
+        Returns:
+            是否已启动（SDK不支持订单流时返回False）
+        """
+        if not STREAM_CLIENT_AVAILABLE:
+            return False
+        if self._order_stream_future is not None and not self._order_stream_future.done():
+            return True
+        
+        self._start_orderbook_event_loop()
+        if self._orderbook_loop is None:
+            return False
+        self._order_stream_future = asyncio.run_coroutine_threadsafe(self._run_order_stream(), self._orderbook_loop)
+        return True
+    
+    async def _run_order_stream(self):
+        """订阅账户更新流，断线后自动重连"""
+        stream_client = PerpetualStreamClient(api_url=self.config.stream_url)
+        while True:
+            try:
+                async with stream_client.subscribe_to_account_updates(self.api_key) as stream:
+                    # 先用REST拉取一次全部未成交订单作为基线（首次连接前和断线期间的变化不会推送），
+                    # 之后缓存才由订单事件维护；REST请求调度到trading_client所属的事件循环（其aiohttp会话绑定在该循环上）
+                    seed = self.get_open_orders(None, use_cache=False)
+                    client_loop = self._client_loop
+                    if client_loop is not None and client_loop.is_running() and client_loop is not asyncio.get_running_loop():
+                        await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(seed, client_loop))
+                    else:
+                        await seed
+                    self.orders_ws_subscribed = True
+                    log.info("[Extended] 已订阅WebSocket订单流")
+                    async for event in stream:
+                        orders_data = getattr(getattr(event, 'data', None), 'orders', None)
+                        if orders_data:
+                            self._on_order_events(orders_data)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning("[Extended] WebSocket订单流异常: %s，3秒后重连...", e)
+            finally:
+                # 断线期间open_orders可能错过事件，退回到TTL缓存 + REST刷新
+                self.orders_ws_subscribed = False
+                self.orders_cache_timestamp = 0
+            await asyncio.sleep(3)
+    
+    def _mark_orders_written(self):
+        """本地下单/撤单写入缓存后调用（调用方需持有self.lock）"""
+        now = time.monotonic()
+        self.orders_cache_timestamp = now
+        self._order_writes.append(now)
+    
+    def current_orders_cache_ttl(self, now: float) -> float:
+        """
+        未订阅订单流时的自适应缓存TTL
+        
+        最近60秒内本地下单/撤单越频繁，订单越可能在缓存期间发生成交等外部变化，TTL按
+        orders_cache_ttl * 5 / (5 + 写入次数) 缩短，最低 orders_cache_min_ttl；空闲时恢复为 orders_cache_ttl
+        """
+        with self.lock:
+            writes = self._order_writes
+            while writes and now - writes[0] > 60:
+                writes.popleft()
+            write_count = len(writes)
+        return max(self.orders_cache_min_ttl, self.orders_cache_ttl * 5 / (5 + write_count))
+    
+    def orders_cache_valid(self, now: float) -> bool:
+        """未订阅订单流时，按自适应TTL判断订单缓存是否仍有效，并统计命中/未命中次数"""
+        # self.lock不可重入，先在锁外计算TTL
+        ttl = self.current_orders_cache_ttl(now)
+        with self.lock:
+            valid = (
+                self.orders_cache_timestamp > 0 and
+                now - self.orders_cache_timestamp < ttl
+            )
+            if valid:
+                self.orders_cache_hits += 1
+            else:
+                self.orders_cache_misses += 1
+        return valid
+    
+    def orders_cache_stats(self) -> Dict[str, Any]:
+        """订单缓存统计：命中/未命中次数、命中率、当前TTL、是否由订单流实时维护"""
+        ttl = self.current_orders_cache_ttl(time.monotonic())
+        with self.lock:
+            hits = self.orders_cache_hits
+            misses = self.orders_cache_misses
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': hits / total if total else 0.0,
+            'ttl': ttl,
+            'ws_subscribed': self.orders_ws_subscribed,
+        }
+    
+    def _put_open_order(self, order: ExtendedOrder):
+        """写入单个未成交订单并增量更新client_order_id索引（调用方需持有self.lock）"""
+        previous = self.open_orders.get(order.order_id)
+        if previous is not None and previous.client_order_id and previous.client_order_id != order.client_order_id:
+            self.client_order_id_to_order_id.pop(previous.client_order_id, None)
+        self.open_orders[order.order_id] = order
+        if order.client_order_id:
+            self.client_order_id_to_order_id[order.client_order_id] = order.order_id
+    
+    def _pop_open_order(self, order_id: Optional[int]) -> Optional[ExtendedOrder]:
+        """移除单个未成交订单并增量更新client_order_id索引（调用方需持有self.lock）"""
+        order = self.open_orders.pop(order_id, None)
+        if order is not None and order.client_order_id and \
+                self.client_order_id_to_order_id.get(order.client_order_id) == order.order_id:
+            del self.client_order_id_to_order_id[order.client_order_id]
+        return order
+    
+    def _publish_open_orders(self):
+        """重新生成open_orders快照并通知等待方（调用方需持有self.lock）"""
+        self.open_orders_snapshot = tuple(self.open_orders.values())
+        self.orders_changed.notify_all()
+    
+    def wait_for_order(self, order_id: int, is_open: bool, timeout: float) -> bool:
+        """阻塞等待指定订单出现在/离开未成交订单缓存（订单推送或本地下单/撤单写入缓存时唤醒），超时返回False"""
+        with self.orders_changed:
+            return self.orders_changed.wait_for(lambda: (order_id in self.open_orders) == is_open, timeout)
+    
+    def _on_order_events(self, orders_data: List[Any]):
+        """订单事件：未成交订单写入缓存，已成交/已撤销/已过期订单从缓存移除"""
+        orders = [self._format_order(order_data) for order_data in orders_data]
+        with self.lock:
+            for order in orders:
+                if order.status in _OPEN_STATUSES:
+                    self._put_open_order(order)
+                else:
+                    self._pop_open_order(order.order_id)
+            self._publish_open_orders()
+        
+        for callback in self.order_callbacks:
+            try:
+                callback(orders)
+            except Exception as e:
+                log.warning("[Extended] 订单更新回调错误: %s", e)
     
     def watch_depth(self, symbol: str, callback: Callable[[ExtendedDepth], None]):
         """监听深度更新"""
-        self.watch_order_book(symbol, callback)
+        return self.watch_order_book(symbol, callback)
+    
+    def unwatch_depth(self, symbol: str, callback: Callable[[ExtendedDepth], None]):
+        """取消深度更新回调"""
+        self.unwatch_order_book(symbol, callback)
     
     def watch_ticker(self, symbol: str, callback: Callable[[ExtendedTicker], None]):
-        """监听Ticker更新"""
+        """监听Ticker更新（由统一的轮询线程驱动）"""
         self.ticker_callbacks.append(callback)
-        
-        # 启动定时器轮询Ticker
-        def poll_ticker():
-            while True:
-                try:
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    ticker = loop.run_until_complete(self.get_ticker(symbol))
-                    loop.close()
-                    
-                    for callback in self.ticker_callbacks:
-                        try:
-                            callback(ticker)
-                        except Exception as e:
-                            print(f"[Extended] Ticker更新回调错误: {e}")
-                    
-                    time.sleep(1)  # 每秒更新一次
-                except Exception as e:
-                    print(f"[Extended] 轮询Ticker失败: {e}")
-                    time.sleep(1)
-        
-        thread = threading.Thread(target=poll_ticker, daemon=True)
-        thread.start()
+        with self.lock:
+            self._ticker_subs.setdefault(symbol, []).append(callback)
+        self._ensure_poller()
     
     def watch_kline(self, symbol: str, interval: str, callback: Callable[[List[ExtendedKline]], None]):
-        """监听K线更新"""
+        """监听K线更新（由统一的轮询线程驱动）"""
         self.kline_callbacks.append(callback)
+        with self.lock:
+            self._kline_subs.setdefault((symbol, interval), []).append(callback)
+        self._ensure_poller()
+    
+    def _ensure_poller(self):
+        """启动统一的Ticker/K线轮询线程（所有订阅共用，只启动一次；close()后再次使用时重新启动）"""
+        with self.lock:
+            if (self._poller_thread is not None and self._poller_thread.is_alive()
+                    and not self._stop_event.is_set()):
+                return
+            # close()设置的停止信号不会清除，重启时换用新的Event；仍在退出中的旧线程持有旧Event，不会被重新唤起
+            self._stop_event = threading.Event()
+            self._poller_thread = threading.Thread(target=self._run_poller, args=(self._stop_event,), daemon=True)
+            self._poller_thread.start()
+    
+    def _run_poller(self, stop_event: threading.Event):
+        """
+        轮询所有已订阅交易对的Ticker并分发给Ticker/K线回调
         
-        # 启动定时器轮询K线
-        def poll_klines():
-            while True:
+        请求优先调度到 trading_client 所属的事件循环，复用其持久的aiohttp会话和连接池；
+        该循环不可用时才在本线程内的事件循环（只创建一次）中执行
+        """
+        own_loop: Optional[asyncio.AbstractEventLoop] = None
+        try:
+            while not stop_event.is_set():
                 try:
-                    # Extended暂不支持K线数据，使用Ticker数据模拟
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    ticker = loop.run_until_complete(self.get_ticker(symbol))
-                    loop.close()
-                    
-                    # 创建模拟K线数据
-                    kline = ExtendedKline(
-                        open_time=int(time.time() * 1000),
-                        open=ticker.last_price,
-                        high=ticker.high_price,
-                        low=ticker.low_price,
-                        close=ticker.last_price,
-                        volume=ticker.volume,
-                        close_time=int(time.time() * 1000),
-                        quote_asset_volume=ticker.quote_volume,
-                        number_of_trades=0,
-                        taker_buy_base_asset_volume="0",
-                        taker_buy_quote_asset_volume="0",
-                        event_time=int(time.time() * 1000)
-                    )
-                    
-                    for callback in self.kline_callbacks:
-                        try:
-                            callback([kline])
-                        except Exception as e:
-                            print(f"[Extended] K线更新回调错误: {e}")
-                    
-                    time.sleep(1)  # 每秒更新一次
+                    # 在锁内取订阅快照（watch_ticker/watch_kline可能并发新增订阅）；Ticker和K线订阅同一交易对时只请求一次
+                    with self.lock:
+                        symbols = list(dict.fromkeys([*self._ticker_subs, *(symbol for symbol, _ in self._kline_subs)]))
+                    if symbols:
+                        client_loop = self._client_loop
+                        if client_loop is not None and client_loop.is_running():
+                            tickers = asyncio.run_coroutine_threadsafe(
+                                self._fetch_tickers(symbols), client_loop
+                            ).result(timeout=30)
+                        else:
+                            if own_loop is None:
+                                own_loop = asyncio.new_event_loop()
+                                asyncio.set_event_loop(own_loop)
+                            tickers = own_loop.run_until_complete(self._fetch_tickers(symbols))
+                        for symbol, ticker in zip(symbols, tickers):
+                            if isinstance(ticker, Exception):
+                                log.warning("[Extended] 轮询Ticker失败: %s, 错误: %s", symbol, ticker)
+                                continue
+                            self._dispatch_ticker(symbol, ticker)
                 except Exception as e:
-                    print(f"[Extended] 轮询K线失败: {e}")
-                    time.sleep(1)
+                    log.warning("[Extended] 轮询Ticker失败: %s", e)
+                
+                # 可被 close() 立即唤醒的等待，代替固定的 time.sleep(1)
+                stop_event.wait(max(self.poll_interval, _MIN_POLL_INTERVAL))
+        finally:
+            if own_loop is not None:
+                own_loop.close()
+    
+    async def _fetch_tickers(self, symbols: List[str]) -> List[Any]:
+        """并发获取多个交易对的Ticker，失败的交易对对应位置为异常对象"""
+        return await asyncio.gather(*(self.get_ticker(symbol) for symbol in symbols), return_exceptions=True)
+    
+    def _dispatch_ticker(self, symbol: str, ticker: ExtendedTicker):
+        """把一次轮询得到的Ticker分发给该交易对的Ticker回调和K线回调"""
+        for callback in tuple(self._ticker_subs.get(symbol, ())):
+            try:
+                callback(ticker)
+            except Exception as e:
+                log.warning("[Extended] Ticker更新回调错误: %s", e)
         
-        thread = threading.Thread(target=poll_klines, daemon=True)
-        thread.start()
+        kline = None
+        for (kline_symbol, _), callbacks in list(self._kline_subs.items()):
+            if kline_symbol != symbol:
+                continue
+            if kline is None:
+                # Extended暂不支持K线数据，使用Ticker数据模拟
+                now_ms = _now_ms()
+                kline = ExtendedKline(
+                    open_time=now_ms,
+                    open=ticker.last_price,
+                    high=ticker.high_price,
+                    low=ticker.low_price,
+                    close=ticker.last_price,
+                    volume=ticker.volume,
+                    close_time=now_ms,
+                    quote_asset_volume=ticker.quote_volume,
+                    number_of_trades=0,
+                    taker_buy_base_asset_volume="0",
+                    taker_buy_quote_asset_volume="0",
+                    event_time=now_ms
+                )
+            for callback in tuple(callbacks):
+                try:
+                    callback([kline])
+                except Exception as e:
+                    log.warning("[Extended] K线更新回调错误: %s", e)
     
     async def close(self):
         """关闭客户端"""
+        self._stop_event.set()
+        
+        if self._order_stream_future is not None:
+            self._order_stream_future.cancel()
+            self._order_stream_future = None
+            self.orders_ws_subscribed = False
+        
         if self.trading_client:
             await self.trading_client.close()
         
-        # 关闭所有订单簿
-        for orderbook in self.orderbooks.values():
-            await orderbook.close()
+        # 关闭所有订单簿：订单簿运行在持久的OrderBook事件循环上，需在该循环中关闭
+        orderbook_loop = self._orderbook_loop
+        use_orderbook_loop = (
+            orderbook_loop is not None and orderbook_loop.is_running()
+            and orderbook_loop is not asyncio.get_running_loop()
+        )
+        for symbol, orderbook in list(self.orderbooks.items()):
+            try:
+                if use_orderbook_loop:
+                    await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(orderbook.close(), orderbook_loop))
+                else:
+                    await orderbook.close()
+            except Exception as e:
+                log.warning("[Extended] 关闭订单簿失败: %s, 错误: %s", symbol, e)
         
         self.orderbooks.clear()
+        
+        # 订单簿和订单流都已停止，结束OrderBook事件循环线程（再次使用时会重新启动）
+        if use_orderbook_loop:
+            orderbook_loop.call_soon_threadsafe(orderbook_loop.stop)
         self._initialized = False
-    
-    def __del__(self):
-        """析构函数"""
-        if hasattr(self, '_initialized') and self._initialized:
-            try:
-                # 在析构函数中不能使用异步操作
-                # 只清理同步资源
-                self.orderbooks.clear()
-                self._initialized = False
-            except:
-                pass
@@ -4,6 +4,7 @@
 """
 import warnings
 import os
+import re
 import sys
 
 # 在导入任何模块之前，先抑制所有 ResourceWarning 警告
@@ -15,6 +16,9 @@ warnings.filterwarnings("ignore", category=ResourceWarning)
 os.environ.setdefault("PYTHONWARNINGS", "ignore::ResourceWarning")
 
 # 创建一个过滤器来过滤 stderr 中的 aiohttp 警告
+_AIOHTTP_WARNING_PATTERN = re.compile(r"Unclosed client session|Unclosed connector|Unclosed connection|client_session:|connector:|connections:|Future exception was never retrieved|APPLICATION_DATA_AFTER_CLOSE_NOTIFY|ClientOSError")
+
+
 class AiohttpWarningFilter:
     """过滤 stderr 中的 aiohttp 未关闭会话警告"""
     def __init__(self, original_stderr):
@@ -25,19 +29,8 @@ class AiohttpWarningFilter:
                 setattr(self, attr, getattr(original_stderr, attr))
     
     def write(self, text):
-        # 过滤掉 aiohttp 相关的未关闭警告和 SSL 警告
-        if any(keyword in text for keyword in [
-            "Unclosed client session",
-            "Unclosed connector",
-            "Unclosed connection",
-            "client_session:",
-            "connector:",
-            "connections:",
-            "Future exception was never retrieved",
-            "APPLICATION_DATA_AFTER_CLOSE_NOTIFY",
-            "ClientOSError",
-            "[SSL: APPLICATION_DATA_AFTER_CLOSE_NOTIFY]"
-        ]):
+        # 过滤掉 aiohttp 相关的未关闭警告和 SSL 警告（正则预编译，匹配在C层完成）
+        if _AIOHTTP_WARNING_PATTERN.search(text):
             return len(text)  # 返回长度但不实际写入
         return self.original_stderr.write(text)
     
@@ -2,6 +2,9 @@
 网格交易策略
 在价格区间内设置买卖网格，自动低买高卖
 """
+import bisect
+import logging
+import time
 from typing import Dict, Any, List, Optional
 from decimal import Decimal, ROUND_DOWN
 from datetime import datetime
@@ -10,6 +13,15 @@ from core.order_manager import OrderManager
 from core.account_manager import AccountManager
 from core.position_manager import PositionManager
 
+log = logging.getLogger(__name__)
+
+# 价格/数量精度模板及常用常量（模块级复用，避免每次调用重新解析字符串）
+_Q_PRICE = Decimal('0.01')
+_Q_QTY = Decimal('0.0001')
+_ZERO = Decimal('0')
+# 状态查询复用最近一次价格的有效期（秒）
+_PRICE_TTL = 5.0
+
 
 class GridStrategy(BaseStrategy):
     """网格交易策略"""
@@ -48,8 +60,13 @@ class GridStrategy(BaseStrategy):
         self.order_type = kwargs.get('order_type', 'limit')
         
         self.grid_levels: List[Decimal] = []
+        # 每个网格层级的下单数量，与grid_levels一一对应，计算网格时一次性算好
+        self.grid_quantities: List[Decimal] = []
         self.active_orders: Dict[str, Dict[str, Any]] = {}
         self.filled_orders: List[Dict[str, Any]] = []
+        # 最近一次获取的价格及时间（time.monotonic()），状态查询在有效期内直接使用
+        self._last_price: Optional[Decimal] = None
+        self._last_price_ts: float = 0.0
         
         self._calculate_grid_levels()
     
@@ -57,6 +74,9 @@ class GridStrategy(BaseStrategy):
         """计算网格价格层级"""
         if self.upper_price <= self.lower_price:
             raise ValueError("上边界价格必须大于下边界价格")
+        # 下面按网格数量计算步长和每格投资，先校验，避免除零
+        if self.grid_count < 2:
+            raise ValueError("网格数量至少为2")
         
         price_range = self.upper_price - self.lower_price
         grid_step = price_range / (self.grid_count - 1)
@@ -64,7 +84,13 @@ class GridStrategy(BaseStrategy):
         self.grid_levels = []
         for i in range(self.grid_count):
             price = self.lower_price + grid_step * i
-            self.grid_levels.append(price.quantize(Decimal('0.01'), rounding=ROUND_DOWN))
+            self.grid_levels.append(price.quantize(_Q_PRICE, rounding=ROUND_DOWN))
+        
+        # 网格层级固定，下单数量也只需计算一次
+        self._per_grid_investment = self.investment / self.grid_count
+        self.grid_quantities = [self._calculate_order_quantity(price) for price in self.grid_levels]
+        # 状态查询直接返回的层级字符串
+        self._grid_levels_str = [str(level) for level in self.grid_levels]
     
     def validate_config(self) -> bool:
         """验证配置"""
@@ -87,8 +113,7 @@ class GridStrategy(BaseStrategy):
         self.validate_config()
         
         # 获取当前价格
-        ticker = self.order_manager.exchange.get_ticker(self.symbol)
-        current_price = Decimal(str(ticker.get('price', 0)))
+        current_price = self._fetch_price()
         
         if current_price <= 0:
             return {'status': 'error', 'message': '无法获取当前价格'}
@@ -111,64 +136,46 @@ class GridStrategy(BaseStrategy):
         # 找到当前价格所在的网格位置
         current_grid_index = self._find_grid_index(current_price)
         
-        # 在当前价格上方设置卖单
-        for i in range(current_grid_index + 1, len(self.grid_levels)):
-            price = self.grid_levels[i]
-            quantity = self._calculate_order_quantity(price)
-            
-            if quantity > 0:
-                try:
-                    order = self.order_manager.place_order(
-                        symbol=self.symbol,
-                        side='sell',
-                        order_type=self.order_type,
-                        quantity=quantity,
-                        price=price
-                    )
-                    self.active_orders[order['order_id']] = {
-                        **order,
-                        'grid_level': i,
-                        'grid_price': price
-                    }
-                except Exception as e:
-                    # 记录错误但继续
-                    print(f"下单失败: {e}")
+        # 当前价格上方为卖单，下方为买单；所有层级一次批量提交
+        levels = [(i, 'sell') for i in range(current_grid_index + 1, len(self.grid_levels))]
+        levels += [(i, 'buy') for i in range(current_grid_index - 1, -1, -1)]
+        levels = [(i, side) for i, side in levels if self.grid_quantities[i] > 0]
+        if not levels:
+            return
         
-        # 在当前价格下方设置买单
-        for i in range(current_grid_index - 1, -1, -1):
-            price = self.grid_levels[i]
-            quantity = self._calculate_order_quantity(price)
-            
-            if quantity > 0:
-                try:
-                    order = self.order_manager.place_order(
-                        symbol=self.symbol,
-                        side='buy',
-                        order_type=self.order_type,
-                        quantity=quantity,
-                        price=price
-                    )
-                    self.active_orders[order['order_id']] = {
-                        **order,
-                        'grid_level': i,
-                        'grid_price': price
-                    }
-                except Exception as e:
-                    print(f"下单失败: {e}")
+        results = self.order_manager.place_orders([
+            {
+                'symbol': self.symbol,
+                'side': side,
+                'order_type': self.order_type,
+                'quantity': self.grid_quantities[i],
+                'price': self.grid_levels[i]
+            }
+            for i, side in levels
+        ])
+        
+        for (i, _), order in zip(levels, results):
+            if 'error' in order:
+                # 记录错误但继续
+                log.warning("下单失败: %s", order['error'])
+                continue
+            self.active_orders[order['order_id']] = {
+                **order,
+                'grid_level': i,
+                'grid_price': self.grid_levels[i]
+            }
     
     def _find_grid_index(self, price: Decimal) -> int:
-        """找到价格所在的网格索引"""
-        for i, grid_price in enumerate(self.grid_levels):
-            if price <= grid_price:
-                return i
-        return len(self.grid_levels) - 1
+        """找到价格所在的网格索引（grid_levels升序，二分查找第一个不低于price的层级）"""
+        return min(bisect.bisect_left(self.grid_levels, price), len(self.grid_levels) - 1)
     
     def _calculate_order_quantity(self, price: Decimal) -> Decimal:
         """计算订单数量"""
+        if price <= 0:
+            return _ZERO
         # 简单分配：总投资金额平均分配到每个网格
-        per_grid_investment = self.investment / self.grid_count
-        quantity = per_grid_investment / price
-        return quantity.quantize(Decimal('0.0001'), rounding=ROUND_DOWN)
+        quantity = self._per_grid_investment / price
+        return quantity.quantize(_Q_QTY, rounding=ROUND_DOWN)
     
     def stop(self) -> Dict[str, Any]:
         """停止网格策略"""
@@ -195,14 +202,9 @@ class GridStrategy(BaseStrategy):
         open_orders = self.order_manager.get_open_orders(self.symbol)
         open_order_ids = {o['order_id'] for o in open_orders}
         
-        # 找出已成交的订单
-        filled_orders = []
-        for order_id, order_info in list(self.active_orders.items()):
-            if order_id not in open_order_ids:
-                # 订单已成交或取消
-                filled_orders.append(order_info)
-                self.filled_orders.append(order_info)
-                del self.active_orders[order_id]
+        # 找出已成交或取消的订单（集合差集，不再逐个复制和删除）
+        filled_orders = [self.active_orders.pop(order_id) for order_id in self.active_orders.keys() - open_order_ids]
+        self.filled_orders.extend(filled_orders)
         
         # 如果有订单成交，补充新的网格订单
         if filled_orders:
@@ -226,7 +228,7 @@ class GridStrategy(BaseStrategy):
                 # 买单成交，在更高价位设置卖单
                 if grid_level + 1 < len(self.grid_levels):
                     sell_price = self.grid_levels[grid_level + 1]
-                    quantity = self._calculate_order_quantity(sell_price)
+                    quantity = self.grid_quantities[grid_level + 1]
                     
                     if quantity > 0:
                         try:
@@ -243,13 +245,13 @@ class GridStrategy(BaseStrategy):
                                 'grid_price': sell_price
                             }
                         except Exception as e:
-                            print(f"补充卖单失败: {e}")
+                            log.warning("补充卖单失败: %s", e)
             
             elif side == 'sell':
                 # 卖单成交，在更低价位设置买单
                 if grid_level - 1 >= 0:
                     buy_price = self.grid_levels[grid_level - 1]
-                    quantity = self._calculate_order_quantity(buy_price)
+                    quantity = self.grid_quantities[grid_level - 1]
                     
                     if quantity > 0:
                         try:
@@ -266,12 +268,24 @@ class GridStrategy(BaseStrategy):
                                 'grid_price': buy_price
                             }
                         except Exception as e:
-                            print(f"补充买单失败: {e}")
+                            log.warning("补充买单失败: %s", e)
+    
+    def _fetch_price(self) -> Decimal:
+        """从交易所获取当前价格并缓存"""
+        ticker = self.order_manager.exchange.get_ticker(self.symbol)
+        current_price = Decimal(str(ticker.get('price', 0))) if ticker else _ZERO
+        if current_price > 0:
+            self._last_price = current_price
+            self._last_price_ts = time.monotonic()
+        return current_price
     
     def get_status(self) -> Dict[str, Any]:
         """获取策略状态"""
-        ticker = self.order_manager.exchange.get_ticker(self.symbol)
-        current_price = Decimal(str(ticker.get('price', 0))) if ticker else Decimal('0')
+        # 有效期内复用最近一次价格，避免每次状态查询都请求交易所
+        if self._last_price is not None and time.monotonic() - self._last_price_ts < _PRICE_TTL:
+            current_price = self._last_price
+        else:
+            current_price = self._fetch_price()
         
         return {
             'is_running': self.is_running,
@@ -282,6 +296,6 @@ class GridStrategy(BaseStrategy):
             'current_price': str(current_price),
             'active_orders': len(self.active_orders),
             'filled_orders': len(self.filled_orders),
-            'grid_levels': [str(level) for level in self.grid_levels]
+            'grid_levels': list(self._grid_levels_str)
         }
 
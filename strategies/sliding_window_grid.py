@@ -2,9 +2,13 @@
 滑动窗口网格交易策略
 参考前端策略实现，以当前价格为中心，动态调整买卖单比例
 """
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Dict, Any, List, Optional, Tuple
-from decimal import Decimal, ROUND_DOWN, ROUND_UP
-from datetime import datetime
+from decimal import Decimal
+import heapq
+import logging
+import math
+import random
 import time
 import threading
 from strategies.base import BaseStrategy
@@ -12,6 +16,14 @@ from core.order_manager import OrderManager
 from core.account_manager import AccountManager
 from core.position_manager import PositionManager
 
+log = logging.getLogger(__name__)
+
+_ZERO = Decimal('0')
+_ONE = Decimal('1')
+_MIN_SIDE_RATIO = Decimal('0.1')   # 未达持仓上限时单边订单比例下限
+_MAX_SIDE_RATIO = Decimal('0.9')   # 未达持仓上限时单边订单比例上限
+_MIN_ORDER_SIZE = Decimal('0.000001')  # 计算持仓倍数时的最小开仓大小，避免除零
+
 
 class SlidingWindowGridStrategy(BaseStrategy):
     """滑动窗口网格交易策略"""
@@ -28,6 +40,7 @@ class SlidingWindowGridStrategy(BaseStrategy):
         'MIN_VALID_PRICE': Decimal('10000'),  # 防止崩盘挂到地板价
         'MAX_MULTIPLIER': Decimal('15'),  # 动态开仓大小的比例最大开仓倍数
         'ORDER_COOLDOWN': 1.5,           # 单个订单成功后冷却时间（秒）
+        'MAX_CANCELS_PER_CYCLE': 10,     # 每个周期最多撤单数（重复单+远单），剩余的留到后续周期
     }
     
     def __init__(
@@ -58,6 +71,7 @@ class SlidingWindowGridStrategy(BaseStrategy):
                 - min_valid_price: 最低有效价格，默认10000
                 - max_multiplier: 最大开仓倍数，默认15
                 - order_cooldown: 订单冷却时间（秒），默认1.5
+                - max_cancels_per_cycle: 每个周期最多撤单数，默认10
         """
         super().__init__(order_manager, account_manager, position_manager, account_key=account_key, **kwargs)
         
@@ -81,19 +95,61 @@ class SlidingWindowGridStrategy(BaseStrategy):
             'MIN_VALID_PRICE': Decimal(str(kwargs.get('min_valid_price', self.GRID_CONFIG['MIN_VALID_PRICE']))),
             'MAX_MULTIPLIER': Decimal(str(kwargs.get('max_multiplier', self.GRID_CONFIG['MAX_MULTIPLIER']))),
             'ORDER_COOLDOWN': kwargs.get('order_cooldown', self.GRID_CONFIG['ORDER_COOLDOWN']),
+            'MAX_CANCELS_PER_CYCLE': int(kwargs.get('max_cancels_per_cycle') or self.GRID_CONFIG['MAX_CANCELS_PER_CYCLE']),
         }
         
         self.order_cooldown = self.grid_config['ORDER_COOLDOWN']
         
+        # 下单参数中策略运行期间不变的部分（交易对、类型、数量、只挂单），每单只需补充方向和价格
+        self._order_template: Dict[str, Any] = {
+            'symbol': self.symbol,
+            'order_type': 'limit',
+            'quantity': self.order_size,
+            'postOnly': True
+        }
+        
         # 策略状态
-        self.active_orders: Dict[str, Dict[str, Any]] = {}  # order_id -> order_info
+        self.active_orders: Dict[str, Dict[str, Any]] = {}  # order_id -> order_info（推送模式下作为未成交订单的本地缓存）
+        self._orders_lock = threading.Lock()
+        # 未成交订单按方向和价格的索引，随active_orders增量维护：side -> price -> {order_id: order}
+        self._orders_by_price: Dict[str, Dict[Decimal, Dict[str, Dict[str, Any]]]] = {'sell': {}, 'buy': {}}
+        self._order_index_keys: Dict[str, Tuple[str, Decimal]] = {}  # order_id -> (side, price)
+        self._closed_order_ids: set = set()  # 推送中已结束的订单ID，防止下单结果晚于成交推送时重新写入缓存
+        self._tick_cache: Dict[Decimal, Optional[int]] = {}  # 订单价格 -> 网格档位，挂单价格跨周期基本不变
+        self._reconcile_interval: float = 60.0  # 推送模式下通过REST全量校准未成交订单的间隔（秒）
+        self._open_orders_ttl: float = 0.5  # 无推送时REST订单快照的有效期（秒），同一周期内的update/get_status复用
+        self._last_reconcile: float = 0
         self.last_order_time: float = 0
         self.cycle_count: int = 0
         
         # 后台更新线程
         self._update_thread: Optional[threading.Thread] = None
-        self._update_interval: float = 3.0  # 默认3秒更新一次（参考JavaScript策略的MONITOR_INTERVAL）
-        self._stop_update_thread: bool = False
+        self._update_interval: float = 3.0  # 不支持推送时默认3秒轮询一次（参考JavaScript策略的MONITOR_INTERVAL）
+        self._heartbeat_interval: float = 10.0  # 推送模式下的兜底更新间隔
+        self._max_backoff: float = 30.0  # 连续更新失败时的最大退避间隔（秒）
+        # 停止信号用Event而不是普通bool，跨线程的设置/读取不依赖GIL保证可见性（无GIL的自由线程构建下同样安全）
+        self._stop_update = threading.Event()
+        # 串行化交易周期：update()与stop()的撤单/平仓不会在不同线程上交错执行
+        self._cycle_lock = threading.Lock()
+        self._io_pool: Optional[ThreadPoolExecutor] = None
+        self._io_pool_lock = threading.Lock()  # 串行化线程池的创建、提交与关闭（get_status在API线程上调用）
+        # 行情/订单推送触发更新：价格变化或订单成交/撤销时唤醒更新线程
+        self._update_event = threading.Event()
+        self._streams_subscribed: bool = False  # 行情和订单推送均已订阅（推送模式）
+        # 各推送分别记录订阅状态：部分订阅成功时再次启动不会重复订阅，停止时按此取消
+        self._bbo_subscribed: bool = False
+        self._orders_subscribed: bool = False
+        self._stream_symbol: Optional[str] = None  # 推送订单中的交易对格式（交易所标准化后）
+        self._bbo_lock = threading.Lock()
+        self._latest_bbo: Optional[Tuple[Decimal, Decimal, float]] = None  # (bid, ask, 接收时间)
+        self._trigger_mid: Optional[Decimal] = None  # 上次触发更新时的中间价
+        self._last_ticker_prices: Tuple[Decimal, Decimal, Decimal] = (_ZERO, _ZERO, _ZERO)  # get_status上次成功获取的 (最新价, 买价, 卖价)
+        self._status_ticker: Tuple[float, Optional[Dict[str, Any]]] = (0.0, None)  # get_status的ticker缓存 (获取时间, ticker)
+        self._status_ticker_ttl: float = 0.2  # 状态页高频轮询时ticker的复用时间（秒）
+        # 无变化周期的快速跳过：上个完整周期的盘口价和当时的订单结束事件序号
+        self._order_event_seq: int = 0  # 订单推送中成交/撤销事件的累计次数
+        self._last_cycle_bbo: Optional[Tuple[Decimal, Decimal]] = None
+        self._last_cycle_event_seq: int = 0
         
         # 合并配置到self.config
         self.config.update(self.grid_config)
@@ -120,10 +176,12 @@ class SlidingWindowGridStrategy(BaseStrategy):
         
         self.is_running = True
         self.cycle_count = 0
-        self._stop_update_thread = False
+        self._stop_update.clear()
+        self._last_reconcile = 0  # 启动后第一个周期总是通过REST全量获取未成交订单
+        self._last_cycle_bbo = None  # 启动后第一个周期总是完整执行
         
         # 启动后立即执行第一个交易周期，创建初始订单
-        print(f"[{datetime.now().strftime('%H:%M:%S')}] 策略启动，开始创建初始订单...")
+        log.info("策略启动，开始创建初始订单...")
         initial_update_result = self.update()
         
         if initial_update_result.get('status') == 'error':
@@ -135,7 +193,8 @@ class SlidingWindowGridStrategy(BaseStrategy):
                 'symbol': self.symbol
             }
         
-        # 启动后台更新线程
+        # 订阅行情/订单推送，启动后台更新线程
+        self._subscribe_streams()
         self._start_update_thread()
         
         return {
@@ -152,25 +211,26 @@ class SlidingWindowGridStrategy(BaseStrategy):
         if not self.is_running:
             return {'status': 'not_running', 'message': '策略未运行'}
         
-        # 停止后台更新线程
-        self._stop_update_thread = True
+        # 停止后台更新线程（唤醒等待中的线程使其立即退出）
+        self._stop_update.set()
+        self._update_event.set()
         if self._update_thread and self._update_thread.is_alive():
             self._update_thread.join(timeout=5.0)
         
-        # 取消所有未成交订单
+        # 等待正在执行的交易周期结束后再撤单/平仓（join超时时周期可能仍在下单）
+        with self._cycle_lock:
+            return self._stop_locked()
+    
+    def _stop_locked(self) -> Dict[str, Any]:
+        """撤销所有挂单并平仓（调用方需持有self._cycle_lock）"""
         try:
-            # 1) 先撤销所有挂单
-            open_orders = self.order_manager.get_open_orders(self.symbol)
+            # 1) 先撤销所有挂单（按交易对一次批量撤单）
             canceled_count = 0
-            for order in open_orders:
-                try:
-                    self.order_manager.cancel_order(
-                        symbol=self.symbol,
-                        order_id=order['order_id']
-                    )
+            for result in self.order_manager.cancel_all_orders(self.symbol):
+                if 'error' in result:
+                    log.warning("取消订单失败: %s", result['error'])
+                else:
                     canceled_count += 1
-                except Exception as e:
-                    print(f"取消订单失败: {e}")
             
             # 2) 平掉所有持仓（市价平仓，reduceOnly）
             position = self.position_manager.get_position(self.symbol)
@@ -187,12 +247,18 @@ class SlidingWindowGridStrategy(BaseStrategy):
                         reduceOnly=True,
                         closePosition=True
                     )
-                    print(f"平仓完成: {close_side} {abs(position_qty)} @ 市价")
+                    log.info("平仓完成: %s %s @ 市价", close_side, abs(position_qty))
                 except Exception as e:
-                    print(f"平仓失败: {e}")
+                    log.warning("平仓失败: %s", e)
             
             self.is_running = False
-            self.active_orders.clear()
+            self._unsubscribe_streams()
+            with self._orders_lock:
+                self._reset_active_orders(())
+            with self._io_pool_lock:
+                if self._io_pool is not None:
+                    self._io_pool.shutdown(wait=False)
+                    self._io_pool = None
             
             return {
                 'status': 'stopped',
@@ -206,151 +272,258 @@ class SlidingWindowGridStrategy(BaseStrategy):
                 'message': f'停止策略失败: {str(e)}'
             }
     
+    def _subscribe_streams(self):
+        """订阅最优买卖价和订单推送（交易所不支持时退回到定时轮询）"""
+        exchange = self.order_manager.exchange
+        try:
+            self._stream_symbol = exchange.normalize_symbol(self.symbol)
+            if not self._bbo_subscribed:
+                self._bbo_subscribed = bool(exchange.watch_bbo(self.symbol, self._on_bbo))
+            if not self._orders_subscribed:
+                self._orders_subscribed = bool(exchange.watch_orders(self._on_orders))
+        except Exception as e:
+            log.warning("订阅行情/订单推送失败: %s，使用定时轮询", e)
+        self._streams_subscribed = self._bbo_subscribed and self._orders_subscribed
+    
+    def _unsubscribe_streams(self):
+        """取消行情/订单推送订阅，停止后的策略实例不再留在共享交易所实例的回调中"""
+        exchange = self.order_manager.exchange
+        self._streams_subscribed = False
+        if self._bbo_subscribed:
+            self._bbo_subscribed = False
+            try:
+                exchange.unwatch_bbo(self.symbol, self._on_bbo)
+            except Exception as e:
+                log.warning("取消行情推送订阅失败: %s", e)
+        if self._orders_subscribed:
+            self._orders_subscribed = False
+            try:
+                exchange.unwatch_orders(self._on_orders)
+            except Exception as e:
+                log.warning("取消订单推送订阅失败: %s", e)
+    
+    def _on_bbo(self, bid_price: Decimal, ask_price: Decimal):
+        """最优买卖价推送：缓存最新价格，中间价变化达到一个网格间距时触发更新"""
+        mid_price = (bid_price + ask_price) / 2
+        with self._bbo_lock:
+            self._latest_bbo = (bid_price, ask_price, time.monotonic())
+            trigger = (self._trigger_mid is None or
+                       abs(mid_price - self._trigger_mid) >= self.grid_config['BASE_PRICE_INTERVAL'])
+            if trigger:
+                self._trigger_mid = mid_price
+        if trigger and self.is_running:
+            self._update_event.set()
+    
+    def _on_orders(self, orders: List[Dict[str, Any]]):
+        """订单推送：增量更新本地未成交订单缓存，本交易对有订单成交/撤销时触发更新"""
+        closed = False
+        with self._orders_lock:
+            for order in orders:
+                if order.get('symbol') != self._stream_symbol:
+                    continue
+                order_id = order.get('order_id')
+                if order.get('status') in ('NEW', 'PARTIALLY_FILLED'):
+                    self._index_order(order_id, order)
+                else:
+                    self._unindex_order(order_id)
+                    self._closed_order_ids.add(order_id)
+                    self._order_event_seq += 1
+                    closed = True
+        if closed and self.is_running:
+            self._update_event.set()
+    
+    def _get_cached_bbo(self) -> Optional[Tuple[Decimal, Decimal]]:
+        """返回推送缓存的最优买卖价，超过兜底间隔未更新时视为过期返回None"""
+        with self._bbo_lock:
+            bbo = self._latest_bbo
+        if bbo is None or time.monotonic() - bbo[2] > self._heartbeat_interval:
+            return None
+        return bbo[0], bbo[1]
+    
     def _start_update_thread(self):
         """启动后台更新线程"""
         if self._update_thread and self._update_thread.is_alive():
             return
         
+        # 推送模式下由事件驱动，仅以较长的心跳间隔兜底；否则按固定间隔轮询
+        wait_interval = self._heartbeat_interval if self._streams_subscribed else self._update_interval
+        
         def update_loop():
             """后台更新循环"""
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] 后台更新线程已启动，更新间隔: {self._update_interval}秒")
-            while self.is_running and not self._stop_update_thread:
+            consecutive_errors = 0
+            while self.is_running and not self._stop_update.is_set():
                 try:
+                    if consecutive_errors:
+                        # 连续失败时指数退避，期间不被推送事件提前唤醒（停止时立即返回）
+                        backoff = self._update_interval * 2 ** min(consecutive_errors, 10)
+                        self._stop_update.wait(min(self._max_backoff, backoff))
+                    else:
+                        # 等待价格/订单变化或兜底间隔到期；间隔加±10%抖动，错开同一主机上多个策略实例的请求
+                        self._update_event.wait(wait_interval * random.uniform(0.9, 1.1))
+                    self._update_event.clear()
+                    if not self.is_running or self._stop_update.is_set():
+                        break
+                    
                     # 执行更新
                     result = self.update()
                     if result.get('status') == 'error':
-                        print(f"[{datetime.now().strftime('%H:%M:%S')}] 策略更新失败: {result.get('message', '未知错误')}")
-                    
-                    # 等待更新间隔
-                    time.sleep(self._update_interval)
+                        consecutive_errors += 1
+                        log.warning("策略更新失败（连续%s次）: %s", consecutive_errors, result.get('message', '未知错误'))
+                    else:
+                        consecutive_errors = 0
                 except Exception as e:
-                    print(f"[{datetime.now().strftime('%H:%M:%S')}] 后台更新线程异常: {e}")
-                    import traceback
-                    traceback.print_exc()
-                    # 即使出错也继续循环，避免线程退出
-                    time.sleep(self._update_interval)
+                    consecutive_errors += 1
+                    log.exception("后台更新线程异常: %s", e)
             
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] 后台更新线程已退出 (is_running={self.is_running}, _stop_update_thread={self._stop_update_thread})")
+            log.info("后台更新线程已退出 (is_running=%s, stop=%s)", self.is_running, self._stop_update.is_set())
         
+        self._update_event.clear()
         self._update_thread = threading.Thread(target=update_loop, daemon=True)
         self._update_thread.start()
-        print(f"[{datetime.now().strftime('%H:%M:%S')}] 后台更新线程已启动，更新间隔: {self._update_interval}秒")
+        mode = '推送触发' if self._streams_subscribed else '定时轮询'
+        log.info("后台更新线程已启动（%s），更新间隔: %s秒", mode, wait_interval)
     
     def update(self) -> Dict[str, Any]:
         """
         更新策略状态（核心方法）
-        参考JavaScript策略的executeTradingCycle逻辑
+        参考JavaScript策略的executeTradingCycle逻辑，同一时刻只执行一个周期
         """
+        with self._cycle_lock:
+            return self._update_locked()
+    
+    def _update_locked(self) -> Dict[str, Any]:
+        """执行一个交易周期（调用方需持有self._cycle_lock）"""
         if not self.is_running:
             return {'status': 'not_running'}
         
         self.cycle_count += 1
-        print(f"\n[{datetime.now().strftime('%H:%M:%S')}] 第{self.cycle_count}次循环")
+        log.info("第%s次循环", self.cycle_count)
         
         try:
             # 1. 获取市场数据
             try:
                 market_data = self._get_market_data()
                 if not market_data['ask_price'] or not market_data['bid_price']:
-                    print('无法读取价格，跳过')
+                    log.warning('无法读取价格，跳过')
                     return {'status': 'error', 'message': '无法获取价格数据'}
             except Exception as e:
-                print(f'获取市场数据失败: {e}')
+                log.warning('获取市场数据失败: %s', e)
                 return {'status': 'error', 'message': f'获取市场数据失败: {e}'}
             
+            # 盘口变化不足半个网格间距、订单已挂满且期间没有订单成交/撤销时，本周期无事可做
+            bbo = (market_data['ask_price'], market_data['bid_price'])
+            event_seq = self._order_event_seq
+            if self._is_idle_cycle(bbo, event_seq, market_data):
+                log.debug("盘口与订单无变化，跳过本周期")
+                return {
+                    'status': 'skipped',
+                    'cycle_count': self.cycle_count,
+                    'active_orders': self._active_order_count()
+                }
+            
             # 2. 计算目标价格
             try:
                 target_result = self._calculate_target_prices(market_data)
             except Exception as e:
-                print(f'计算目标价格失败: {e}')
-                import traceback
-                traceback.print_exc()
+                log.exception('计算目标价格失败: %s', e)
                 return {'status': 'error', 'message': f'计算目标价格失败: {e}'}
             # 计算订单结果的日志已在_calculate_target_prices中输出，这里不再重复
             
-            # 3. 撤销远单
+            # 3. 撤销远单（收集订单ID后一次批量撤单）
+            replacements: Dict[Tuple[str, Decimal], str] = {}  # (方向, 新价格) -> 被替换的旧订单ID
             if target_result['cancel_orders']:
-                print(f"开始撤销 {len(target_result['cancel_orders'])} 个远单...")
+                log.info("开始撤销 %s 个远单...", len(target_result['cancel_orders']))
                 canceled_count = 0
                 failed_count = 0
                 
+                current_price = (market_data['ask_price'] + market_data['bid_price']) / 2
+                max_diff = self.grid_config['BASE_PRICE_INTERVAL'] * (self.grid_config['MAX_MULTIPLIER'] / 4)
+                orders_by_price = {
+                    'sell': market_data.get('sell_orders_by_price', {}),
+                    'buy': market_data.get('buy_orders_by_price', {})
+                }
+                cancel_ids = []
+                cancel_info = {}  # order_id -> (订单类型, 价格)
+                cancel_sides = {}  # order_id -> 方向
+                
                 for cancel_order in target_result['cancel_orders']:
-                    try:
-                        # 如果订单有 order_id，直接使用 order_id 取消（用于清理重复订单）
-                        if 'order_id' in cancel_order:
-                            try:
-                                self.order_manager.cancel_order(
-                                    symbol=self.symbol,
-                                    order_id=cancel_order['order_id']
-                                )
-                                canceled_count += 1
-                                order_type_cn = '买' if cancel_order['type'] == 'buy' else '卖'
-                                print(f"已取消重复订单: {order_type_cn}单 @ {cancel_order['price']} (订单ID: {cancel_order['order_id']})")
-                                time.sleep(0.5)  # 避免频繁取消订单
-                                continue
-                            except Exception as e:
-                                print(f"取消订单失败 (订单ID: {cancel_order['order_id']}): {e}")
-                                failed_count += 1
-                                continue
-                        
-                        # 如果没有 order_id，使用价格和类型查找订单（用于撤销远单）
+                    order_type_cn = '买' if cancel_order['type'] == 'buy' else '卖'
+                    # 如果订单有 order_id，直接使用 order_id 取消（用于清理重复订单）
+                    order_id = cancel_order.get('order_id')
+                    if not order_id:
+                        # 如果没有 order_id，按价格和类型查找订单（用于撤销远单）
                         # 检查是否需要跳过撤单（如果价格接近当前价格）
-                        current_price = (market_data['ask_price'] + market_data['bid_price']) / 2
-                        price_diff = abs(float(cancel_order['price']) - float(current_price))
-                        max_diff = float(self.grid_config['BASE_PRICE_INTERVAL']) * (float(self.grid_config['MAX_MULTIPLIER']) / 4)
-                        
+                        price_diff = abs(cancel_order['price'] - current_price)
                         if price_diff <= max_diff:
-                            print(f"跳过撤单：价格接近当前价格 (差值: {price_diff:.1f})")
+                            log.info("跳过撤单：价格接近当前价格 (差值: %.1f)", price_diff)
                             continue
                         
-                        # 查找并取消订单（设置超时保护，避免卡住整个循环）
-                        try:
-                            result = self._cancel_order_by_price(cancel_order['price'], cancel_order['type'])
-                            if result:
-                                canceled_count += 1
-                                time.sleep(0.5)  # 避免频繁取消订单
-                            else:
-                                failed_count += 1
-                                # 如果取消失败，继续处理下一个订单，不中断整个循环
-                        except Exception as cancel_error:
-                            print(f"撤销订单异常: {cancel_error}")
+                        matching_orders = orders_by_price[cancel_order['type']].get(cancel_order['price'])
+                        if not matching_orders:
+                            log.warning("未找到匹配的订单 (%s单 @ %s)", order_type_cn, cancel_order['price'])
                             failed_count += 1
-                            # 继续处理下一个订单，不中断整个循环
                             continue
+                        order_id = matching_orders[0].get('order_id')
+                    
+                    cancel_ids.append(order_id)
+                    cancel_info[order_id] = (order_type_cn, cancel_order['price'])
+                    cancel_sides[order_id] = cancel_order['type']
+                
+                # 交易所支持改单时，待撤订单与同方向的新价格配对，改单一次请求代替撤单+下单
+                if cancel_ids and self.order_manager.exchange.supports_replace_orders:
+                    new_prices = {'buy': list(target_result['buy_prices']), 'sell': list(target_result['sell_prices'])}
+                    remaining_ids = []
+                    for order_id in cancel_ids:
+                        side_prices = new_prices[cancel_sides[order_id]]
+                        if side_prices:
+                            replacements[(cancel_sides[order_id], side_prices.pop())] = order_id
+                        else:
+                            remaining_ids.append(order_id)
+                    cancel_ids = remaining_ids
+                    if replacements:
+                        log.info("其中 %s 个远单改价为新单", len(replacements))
+                
+                if cancel_ids:
+                    try:
+                        results = self.order_manager.cancel_orders(self.symbol, cancel_ids)
                     except Exception as e:
-                        print(f"撤销订单失败: {e}")
-                        failed_count += 1
-                        # 继续执行，不中断整个更新循环
-                        continue
+                        results = [{'order_id': order_id, 'error': str(e)} for order_id in cancel_ids]
+                    
+                    for order_id, result in zip(cancel_ids, results):
+                        order_type_cn, price = cancel_info[order_id]
+                        if 'error' in result:
+                            log.warning("取消订单失败 (%s单 @ %s, 订单ID: %s): %s", order_type_cn, price, order_id, result['error'])
+                            failed_count += 1
+                        else:
+                            canceled_count += 1
+                            with self._orders_lock:
+                                self._unindex_order(order_id)
+                            log.debug("已取消订单: %s单 @ %s (订单ID: %s)", order_type_cn, price, order_id)
                 
                 if canceled_count > 0 or failed_count > 0:
-                    print(f"撤销订单完成: 成功 {canceled_count} 个，失败 {failed_count} 个")
-            
-            # 4. 重新获取市场数据（撤单后）
-            updated_market_data = self._get_market_data()
+                    log.info("撤销订单完成: 成功 %s 个，失败 %s 个", canceled_count, failed_count)
             
-            # 5. 重新计算要下的订单
-            updated_result = self._calculate_target_prices(updated_market_data)
+            self._last_cycle_bbo = bbo
+            self._last_cycle_event_seq = event_seq
             
-            # 6. 执行下单
-            if updated_result['buy_prices'] or updated_result['sell_prices']:
+            # 4. 执行下单（撤销的都是远单和重复订单，不影响需新下的价格，无需撤单后重新获取市场数据）
+            if target_result['buy_prices'] or target_result['sell_prices']:
                 self._execute_batch_orders(
-                    updated_result['buy_prices'],
-                    updated_result['sell_prices']
+                    target_result['buy_prices'],
+                    target_result['sell_prices'],
+                    replacements
                 )
             
             return {
                 'status': 'updated',
                 'cycle_count': self.cycle_count,
-                'active_orders': len(self.active_orders),
-                'new_orders': len(updated_result['buy_prices']) + len(updated_result['sell_prices']),
+                'active_orders': self._active_order_count(),
+                'new_orders': len(target_result['buy_prices']) + len(target_result['sell_prices']),
                 'canceled_orders': len(target_result['cancel_orders'])
             }
             
         except Exception as e:
-            print(f'周期执行异常: {e}')
-            import traceback
-            traceback.print_exc()
+            log.exception('周期执行异常: %s', e)
             return {
                 'status': 'error',
                 'message': str(e)
@@ -359,57 +532,37 @@ class SlidingWindowGridStrategy(BaseStrategy):
     def _get_market_data(self) -> Dict[str, Any]:
         """获取市场数据（价格和现有订单）"""
         try:
-            # 获取ticker
-            try:
-                ticker = self.order_manager.exchange.get_ticker(self.symbol)
-                ask_price = Decimal(str(ticker.get('ask', ticker.get('price', 0))))
-                bid_price = Decimal(str(ticker.get('bid', ticker.get('price', 0))))
-            except Exception as e:
-                print(f"获取ticker失败: {e}")
-                raise
+            # 持仓和ticker在I/O线程池中与订单查询并发获取，总耗时取最慢的一个而不是三者之和
+            position_future = self._submit_io(self._get_position_info)
+            # 优先使用推送缓存的最优买卖价，缓存缺失或过期时才请求ticker
+            bbo = self._get_cached_bbo()
+            ticker_future = None if bbo is not None else self._submit_io(
+                self.order_manager.exchange.get_ticker, self.symbol
+            )
             
             # 获取现有订单（不打印价格，与JS策略一致）
-            try:
-                open_orders = self.order_manager.get_open_orders(self.symbol)
-            except Exception as e:
-                # 如果获取订单失败，使用空列表，不阻塞策略
-                print(f"获取订单列表失败: {e}，使用空订单列表")
-                open_orders = []
+            # 每个价格对应的订单列表（用于清理重复订单），键本身即去重后的价格
+            sell_orders_by_price, buy_orders_by_price = self._snapshot_orders_by_price()
             
-            existing_sell_orders = []
-            existing_buy_orders = []
+            if ticker_future is None:
+                bid_price, ask_price = bbo
+            else:
+                try:
+                    ticker = ticker_future.result()
+                    ask_price = Decimal(str(ticker.get('ask', ticker.get('price', 0))))
+                    bid_price = Decimal(str(ticker.get('bid', ticker.get('price', 0))))
+                except Exception as e:
+                    log.warning("获取ticker失败: %s", e)
+                    raise
+            # _get_position_info内部已处理异常，失败时返回空持仓
+            position_info = position_future.result()
             # 同时统计所有订单（不去重），用于准确统计订单数量
-            all_sell_orders_count = 0
-            all_buy_orders_count = 0
-            # 记录每个价格对应的订单列表（用于清理重复订单）
-            sell_orders_by_price = {}  # price -> [order1, order2, ...]
-            buy_orders_by_price = {}   # price -> [order1, order2, ...]
+            all_sell_orders_count = sum(map(len, sell_orders_by_price.values()))
+            all_buy_orders_count = sum(map(len, buy_orders_by_price.values()))
             
-            for order in open_orders:
-                if order.get('side', '').lower() == 'sell':
-                    price = order.get('price')
-                    if price:
-                        price_decimal = Decimal(str(price))
-                        existing_sell_orders.append(price_decimal)
-                        all_sell_orders_count += 1
-                        # 按价格分组订单
-                        if price_decimal not in sell_orders_by_price:
-                            sell_orders_by_price[price_decimal] = []
-                        sell_orders_by_price[price_decimal].append(order)
-                elif order.get('side', '').lower() == 'buy':
-                    price = order.get('price')
-                    if price:
-                        price_decimal = Decimal(str(price))
-                        existing_buy_orders.append(price_decimal)
-                        all_buy_orders_count += 1
-                        # 按价格分组订单
-                        if price_decimal not in buy_orders_by_price:
-                            buy_orders_by_price[price_decimal] = []
-                        buy_orders_by_price[price_decimal].append(order)
-            
-            # 排序并去重（用于判断是否需要下单，每个价格只需要一个订单）
-            existing_sell_orders = sorted(set(existing_sell_orders))
-            existing_buy_orders = sorted(set(existing_buy_orders), reverse=True)
+            # 排序后的去重价格（用于判断是否需要下单，每个价格只需要一个订单）
+            existing_sell_orders = sorted(sell_orders_by_price)
+            existing_buy_orders = sorted(buy_orders_by_price, reverse=True)
             
             # 不打印现有订单数量，与JS策略一致
             
@@ -421,12 +574,11 @@ class SlidingWindowGridStrategy(BaseStrategy):
                 'all_sell_orders_count': all_sell_orders_count,  # 所有卖单数量（不去重）
                 'all_buy_orders_count': all_buy_orders_count,    # 所有买单数量（不去重）
                 'sell_orders_by_price': sell_orders_by_price,    # 按价格分组的卖单（用于清理重复订单）
-                'buy_orders_by_price': buy_orders_by_price        # 按价格分组的买单（用于清理重复订单）
+                'buy_orders_by_price': buy_orders_by_price,       # 按价格分组的买单（用于清理重复订单）
+                'position_info': position_info                    # 与行情/订单并发获取的持仓信息
             }
         except Exception as e:
-            print(f"获取市场数据失败: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception("获取市场数据失败: %s", e)
             return {
                 'ask_price': None,
                 'bid_price': None,
@@ -438,6 +590,115 @@ class SlidingWindowGridStrategy(BaseStrategy):
                 'buy_orders_by_price': {}
             }
     
+    def _is_idle_cycle(self, bbo: Tuple[Decimal, Decimal], event_seq: int, market_data: Dict[str, Any]) -> bool:
+        """判断本周期是否可以跳过（与上个完整周期相比盘口、订单数和订单事件都没有变化）"""
+        last_bbo = self._last_cycle_bbo
+        if last_bbo is None or event_seq != self._last_cycle_event_seq:
+            return False
+        if market_data['all_sell_orders_count'] + market_data['all_buy_orders_count'] != self.grid_config['TOTAL_ORDERS']:
+            return False
+        half_interval = self.grid_config['BASE_PRICE_INTERVAL'] / 2
+        return abs(bbo[0] - last_bbo[0]) < half_interval and abs(bbo[1] - last_bbo[1]) < half_interval
+    
+    def _active_order_count(self) -> int:
+        """本地缓存中的未成交订单数"""
+        with self._orders_lock:
+            return len(self.active_orders)
+    
+    def _index_order(self, order_id: str, order: Dict[str, Any]):
+        """写入未成交订单缓存并更新按价格索引（调用方需持有self._orders_lock）"""
+        self._unindex_order(order_id)
+        self.active_orders[order_id] = order
+        price = order.get('price')
+        side = (order.get('side') or '').lower()
+        if price and side in self._orders_by_price:
+            price = Decimal(str(price))
+            self._orders_by_price[side].setdefault(price, {})[order_id] = order
+            self._order_index_keys[order_id] = (side, price)
+    
+    def _unindex_order(self, order_id: str):
+        """从未成交订单缓存和按价格索引中移除订单（调用方需持有self._orders_lock）"""
+        self.active_orders.pop(order_id, None)
+        key = self._order_index_keys.pop(order_id, None)
+        if key is not None:
+            side, price = key
+            orders = self._orders_by_price[side].get(price)
+            if orders is not None:
+                orders.pop(order_id, None)
+                if not orders:
+                    del self._orders_by_price[side][price]
+    
+    def _reset_active_orders(self, orders):
+        """用全量订单列表重建未成交订单缓存和索引（调用方需持有self._orders_lock）"""
+        self.active_orders = {}
+        self._orders_by_price = {'sell': {}, 'buy': {}}
+        self._order_index_keys = {}
+        for order in orders:
+            if order.get('order_id'):
+                self._index_order(order['order_id'], order)
+    
+    def _submit_io(self, fn, *args) -> Future:
+        """
+        在并发行情/持仓查询的线程池中执行fn（运行中首次使用时创建线程池，stop时关闭）
+        
+        策略已停止时不再创建线程池，直接在当前线程执行并返回已完成的Future
+        """
+        with self._io_pool_lock:
+            if self._io_pool is None and self.is_running:
+                self._io_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='sliding-grid-io')
+            if self._io_pool is not None:
+                return self._io_pool.submit(fn, *args)
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    
+    def _snapshot_orders_by_price(self) -> Tuple[Dict[Decimal, List[Dict[str, Any]]], Dict[Decimal, List[Dict[str, Any]]]]:
+        """
+        获取本交易对未成交订单按价格分组的快照 (卖单, 买单)
+        
+        推送模式下直接复制由订单推送增量维护的索引，每隔 _reconcile_interval 秒
+        才通过REST全量拉取一次校准漂移；不支持推送时快照有效期为 _open_orders_ttl 秒，
+        期间本地的下单/撤单结果已直接写入索引，无需失效重拉
+        """
+        now = time.monotonic()
+        ttl = self._reconcile_interval if self._streams_subscribed else self._open_orders_ttl
+        if now - self._last_reconcile >= ttl:
+            try:
+                open_orders = self.order_manager.get_open_orders(self.symbol)
+            except Exception as e:
+                # 如果获取订单失败，使用空列表，不阻塞策略
+                log.warning("获取订单列表失败: %s，使用空订单列表", e)
+                return {}, {}
+            
+            with self._orders_lock:
+                self._reset_active_orders(open_orders)
+                self._closed_order_ids.clear()
+            self._last_reconcile = now
+        
+        # 在锁内复制，推送线程之后的修改不影响本周期的计算
+        with self._orders_lock:
+            return tuple(
+                {price: list(orders.values()) for price, orders in self._orders_by_price[side].items()}
+                for side in ('sell', 'buy')
+            )
+    
+    def _price_to_tick(self, price: Decimal) -> Optional[int]:
+        """价格转换为网格档位（价格 / 网格间距），不在网格上的价格返回None"""
+        try:
+            return self._tick_cache[price]
+        except KeyError:
+            pass
+        tick, remainder = divmod(price, self.grid_config['BASE_PRICE_INTERVAL'])
+        tick = int(tick) if not remainder else None
+        # 价格随行情漂移，缓存超过上限时整体清空，避免长期运行无限增长
+        if len(self._tick_cache) >= 4096:
+            self._tick_cache.clear()
+        self._tick_cache[price] = tick
+        return tick
+    
     def _calculate_target_prices(self, market_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         计算目标价格
@@ -453,41 +714,29 @@ class SlidingWindowGridStrategy(BaseStrategy):
         # 获取按价格分组的订单（用于清理重复订单）
         sell_orders_by_price = market_data.get('sell_orders_by_price', {})
         buy_orders_by_price = market_data.get('buy_orders_by_price', {})
-        # 获取按价格分组的订单（用于清理重复订单）
-        sell_orders_by_price = market_data.get('sell_orders_by_price', {})
-        buy_orders_by_price = market_data.get('buy_orders_by_price', {})
         
+        # 配置项在本次计算中取一次，之后都使用局部变量
         cfg = self.grid_config
+        interval = cfg['BASE_PRICE_INTERVAL']
+        safe_gap = cfg['SAFE_GAP']
+        max_drift = cfg['MAX_DRIFT_BUFFER']
+        max_multiplier = cfg['MAX_MULTIPLIER']
+        total_orders = cfg['TOTAL_ORDERS']
         
         # 计算中间价和窗口
         mid_price = (ask_price + bid_price) / 2
         window_size = mid_price * cfg['WINDOW_PERCENT']
         half_window = window_size / 2
-        interval = cfg['BASE_PRICE_INTERVAL']
         
-        # 获取持仓信息
-        position_info = self._get_position_info()
+        # 获取持仓信息（_get_market_data已并发获取时直接使用）
+        position_info = market_data.get('position_info') or self._get_position_info()
         position_btc = position_info['position_btc']
         order_size = position_info['order_size']
         
-        # 计算理论最大持仓：总订单数 × 每单数量
-        total_orders = cfg['TOTAL_ORDERS']
-        max_position_theoretical = Decimal(str(total_orders)) * order_size
-        
-        # 使用MAX_MULTIPLIER作为额外的安全限制，但不应超过理论最大值
-        max_multiplier = cfg['MAX_MULTIPLIER']
-        safe_order_size = max(order_size, Decimal('0.000001'))
-        max_position_by_multiplier = max_multiplier * safe_order_size
-        
-        # 实际最大持仓限制：取理论最大值和倍数限制中的较小值
-        max_position_limit = min(max_position_theoretical, max_position_by_multiplier)
-        
         # 计算当前持仓相对于开仓大小的倍数（与JS策略一致）
+        safe_order_size = max(order_size, _MIN_ORDER_SIZE)
         position_multiplier = abs(position_btc) / safe_order_size
         
-        # 计算当前持仓相对于最大限制的比例
-        position_ratio = abs(position_btc) / max(max_position_limit, safe_order_size)
-        
         # 基础比例
         base_sell_ratio = cfg['SELL_RATIO']
         base_buy_ratio = cfg['BUY_RATIO']
@@ -497,85 +746,81 @@ class SlidingWindowGridStrategy(BaseStrategy):
         is_at_limit = False
         
         # 与JS策略一致的日志格式
-        print(f"当前持仓: {position_btc:.4f} BTC | 相对于开仓大小的倍数: {position_multiplier:.1f}x")
+        log.info("当前持仓: %.4f BTC | 相对于开仓大小的倍数: %.1fx", position_btc, position_multiplier)
         
         # 根据持仓调整比例
         if position_multiplier >= max_multiplier:
             is_at_limit = True
             if position_btc > 0:
-                print(f"⚠️ 多单已达上限({max_multiplier}x)，停止开多单")
-                final_buy_ratio = Decimal('0')
-                final_sell_ratio = Decimal('1')
+                log.warning("多单已达上限(%sx)，停止开多单", max_multiplier)
+                final_buy_ratio = _ZERO
+                final_sell_ratio = _ONE
             elif position_btc < 0:
-                print(f"⚠️ 空单已达上限({max_multiplier}x)，停止开空单")
-                final_buy_ratio = Decimal('1')
-                final_sell_ratio = Decimal('0')
+                log.warning("空单已达上限(%sx)，停止开空单", max_multiplier)
+                final_buy_ratio = _ONE
+                final_sell_ratio = _ZERO
         elif position_multiplier > 0:
             # 使用position_multiplier来调整比例（与JS策略一致）
             reduction_ratio = position_multiplier / max_multiplier
             if position_btc > 0:
                 buy_reduction = reduction_ratio * base_buy_ratio
-                final_buy_ratio = max(Decimal('0'), base_buy_ratio - buy_reduction)
-                final_sell_ratio = Decimal('1') - final_buy_ratio
-                print(f"调整后比例: 卖单 {final_sell_ratio * 100:.0f}% / 买单 {final_buy_ratio * 100:.0f}%")
+                final_buy_ratio = max(_ZERO, base_buy_ratio - buy_reduction)
+                final_sell_ratio = _ONE - final_buy_ratio
+                log.info("调整后比例: 卖单 %.0f%% / 买单 %.0f%%", final_sell_ratio * 100, final_buy_ratio * 100)
             elif position_btc < 0:
                 sell_reduction = reduction_ratio * base_sell_ratio
-                final_sell_ratio = max(Decimal('0'), base_sell_ratio - sell_reduction)
-                final_buy_ratio = Decimal('1') - final_sell_ratio
-                print(f"调整后比例: 卖单 {final_sell_ratio * 100:.0f}% / 买单 {final_buy_ratio * 100:.0f}%")
+                final_sell_ratio = max(_ZERO, base_sell_ratio - sell_reduction)
+                final_buy_ratio = _ONE - final_sell_ratio
+                log.info("调整后比例: 卖单 %.0f%% / 买单 %.0f%%", final_sell_ratio * 100, final_buy_ratio * 100)
         
         if not is_at_limit:
-            final_buy_ratio = max(Decimal('0.1'), min(Decimal('0.9'), final_buy_ratio))
-            final_sell_ratio = max(Decimal('0.1'), min(Decimal('0.9'), final_sell_ratio))
+            final_buy_ratio = max(_MIN_SIDE_RATIO, min(_MAX_SIDE_RATIO, final_buy_ratio))
+            final_sell_ratio = max(_MIN_SIDE_RATIO, min(_MAX_SIDE_RATIO, final_sell_ratio))
         
-        print(f"最终比例: 卖单 {final_sell_ratio * 100:.0f}% / 买单 {final_buy_ratio * 100:.0f}%")
+        log.info("最终比例: 卖单 %.0f%% / 买单 %.0f%%", final_sell_ratio * 100, final_buy_ratio * 100)
         
         # 计算订单数量
-        total_orders = cfg['TOTAL_ORDERS']
         sell_count = int(round(total_orders * float(final_sell_ratio)))
         buy_count = total_orders - sell_count
         
-        # 计算理想价格
-        # 卖单起始价格：使用ROUND_UP确保价格高于ask_price + SAFE_GAP，避免立即成交
-        sell_start = ((ask_price + cfg['SAFE_GAP']) / interval).quantize(Decimal('1'), rounding=ROUND_UP) * interval
-        # 确保卖单价格至少高于ask_price + SAFE_GAP
-        if sell_start <= ask_price + cfg['SAFE_GAP']:
-            sell_start += interval
-        
-        ideal_sell_prices = []
-        for i in range(sell_count):
-            price = sell_start + Decimal(i) * interval
-            if price > mid_price + half_window + cfg['MAX_DRIFT_BUFFER']:
-                break
-            ideal_sell_prices.append(price)
-        
-        # 买单结束价格：使用ROUND_DOWN确保价格低于bid_price - SAFE_GAP，避免立即成交
-        buy_end = ((bid_price - cfg['SAFE_GAP']) / interval).quantize(Decimal('1'), rounding=ROUND_DOWN) * interval
-        # 确保买单价格至少低于bid_price - SAFE_GAP
-        if buy_end >= bid_price - cfg['SAFE_GAP']:
-            buy_end -= interval
-        
-        ideal_buy_prices = []
-        for i in range(buy_count):
-            price = buy_end - Decimal(i) * interval
-            if price < mid_price - half_window - cfg['MAX_DRIFT_BUFFER']:
-                break
-            if price < cfg['MIN_VALID_PRICE']:
-                break
-            ideal_buy_prices.append(price)
-        
-        # 验证价格：确保买单价格严格低于当前买价，卖单价格严格高于当前卖价
-        # 对于 post_only 订单，需要更大的安全边距（至少 SAFE_GAP）
-        min_sell_price = ask_price + cfg['SAFE_GAP']
-        max_buy_price = bid_price - cfg['SAFE_GAP']
-        
-        validated_sell_prices = [p for p in ideal_sell_prices if p >= min_sell_price]
-        validated_buy_prices = [p for p in ideal_buy_prices if p <= max_buy_price]
-        
-        # 找出需要新下的订单
-        ideal_prices_set = set(validated_sell_prices + validated_buy_prices)
-        new_sell_prices = [p for p in validated_sell_prices if p not in existing_sell_orders]
-        new_buy_prices = [p for p in validated_buy_prices if p not in existing_buy_orders]
+        # 计算理想价格（以网格间距为单位的整数档位计算，只在返回时转换回Decimal价格）
+        # 卖单起始档位：向上取整确保价格高于ask_price + SAFE_GAP，避免立即成交
+        min_sell_price = ask_price + safe_gap
+        sell_start = math.ceil(min_sell_price / interval)
+        # 确保卖单价格严格高于ask_price + SAFE_GAP
+        if sell_start * interval <= min_sell_price:
+            sell_start += 1
+        # 超出窗口太多的价格不再扩展
+        sell_stop = math.floor((mid_price + half_window + max_drift) / interval) + 1
+        ideal_sell_ticks = range(sell_start, min(sell_start + sell_count, sell_stop))
+        
+        # 买单结束档位：向下取整确保价格低于bid_price - SAFE_GAP，避免立即成交
+        max_buy_price = bid_price - safe_gap
+        buy_end = math.floor(max_buy_price / interval)
+        # 确保买单价格严格低于bid_price - SAFE_GAP
+        if buy_end * interval >= max_buy_price:
+            buy_end -= 1
+        # 超出窗口太多或低于最低有效价格的价格不再扩展
+        buy_floor = max(
+            math.ceil((mid_price - half_window - max_drift) / interval),
+            math.ceil(cfg['MIN_VALID_PRICE'] / interval)
+        )
+        ideal_buy_ticks = range(buy_end, max(buy_end - buy_count, buy_floor - 1), -1)
+        
+        # 档位计算已保证卖单价格高于ask_price + SAFE_GAP、买单价格低于bid_price - SAFE_GAP（post_only安全边距）
+        validated_sell_prices = [t * interval for t in ideal_sell_ticks]
+        validated_buy_prices = [t * interval for t in ideal_buy_ticks]
+        
+        # 找出需要新下的订单（现有订单按档位比较，不在网格上的价格档位为None）
+        ideal_ticks = set(ideal_sell_ticks)
+        ideal_ticks.update(ideal_buy_ticks)
+        # 每个现有价格只换算一次档位，之后的新单/重复单/远单判断都是O(1)的字典/集合查找
+        sell_tick_of = {p: self._price_to_tick(p) for p in existing_sell_orders}
+        buy_tick_of = {p: self._price_to_tick(p) for p in existing_buy_orders}
+        existing_sell_ticks = set(sell_tick_of.values())
+        existing_buy_ticks = set(buy_tick_of.values())
+        new_sell_prices = [p for t, p in zip(ideal_sell_ticks, validated_sell_prices) if t not in existing_sell_ticks]
+        new_buy_prices = [p for t, p in zip(ideal_buy_ticks, validated_buy_prices) if t not in existing_buy_ticks]
         
         # 找出需要撤销的远单和重复订单
         # 使用去重后的价格数量来判断是否需要撤销（每个价格只需要一个订单）
@@ -584,77 +829,57 @@ class SlidingWindowGridStrategy(BaseStrategy):
         current_total_orders = all_sell_orders_count + all_buy_orders_count
         orders_to_cancel = []
         
+        # 每个周期的撤单数有上限，超出的留到后续周期，避免一次性撤单挤占下单的限频额度
+        max_cancels = cfg['MAX_CANCELS_PER_CYCLE']
+        
         # 1. 清理重复订单：如果同一价格有多个订单，保留第一个，撤销多余的
-        for price, orders_list in sell_orders_by_price.items():
-            if len(orders_list) > 1:
+        for order_type, orders_by_price, tick_of in (('sell', sell_orders_by_price, sell_tick_of),
+                                                      ('buy', buy_orders_by_price, buy_tick_of)):
+            for price, orders_list in orders_by_price.items():
                 # 如果该价格在理想价格集合中，保留第一个，撤销多余的
-                if price in ideal_prices_set:
-                    # 保留第一个订单，撤销其余的
-                    for order in orders_list[1:]:
-                        orders_to_cancel.append({'type': 'sell', 'price': price, 'order_id': order.get('order_id')})
-                        print(f"发现重复卖单 @ {price}，将撤销多余的订单 (订单ID: {order.get('order_id')})")
-        
-        for price, orders_list in buy_orders_by_price.items():
-            if len(orders_list) > 1:
-                # 如果该价格在理想价格集合中，保留第一个，撤销多余的
-                if price in ideal_prices_set:
-                    # 保留第一个订单，撤销其余的
-                    for order in orders_list[1:]:
-                        orders_to_cancel.append({'type': 'buy', 'price': price, 'order_id': order.get('order_id')})
-                        print(f"发现重复买单 @ {price}，将撤销多余的订单 (订单ID: {order.get('order_id')})")
+                if len(orders_list) > 1 and tick_of[price] in ideal_ticks:
+                    for order in orders_list[1:max_cancels - len(orders_to_cancel) + 1]:
+                        orders_to_cancel.append({'type': order_type, 'price': price, 'order_id': order.get('order_id')})
+                        log.debug("发现重复%s单 @ %s，将撤销多余的订单 (订单ID: %s)",
+                                  '卖' if order_type == 'sell' else '买', price, order.get('order_id'))
         
         # 2. 找出不在理想价格集合中的订单（远单）
         if (current_unique_prices > total_orders or 
             len(existing_sell_orders) > sell_count or 
             len(existing_buy_orders) > buy_count):
             
-            # 找出不在理想价格集合中的订单
-            far_sell_orders = [p for p in existing_sell_orders if p not in ideal_prices_set]
-            far_buy_orders = [p for p in existing_buy_orders if p not in ideal_prices_set]
-            
-            # 将所有远单按距离中间价排序（从远到近）
-            all_far = (
-                [{'type': 'sell', 'price': p} for p in far_sell_orders] +
-                [{'type': 'buy', 'price': p} for p in far_buy_orders]
-            )
-            
-            # 计算距离阈值：不应该撤销距离当前价格太近的订单
-            # 使用 SAFE_GAP 的倍数作为阈值，确保不会撤销可能很快成交的订单
-            price_threshold = cfg['SAFE_GAP'] * Decimal('2')  # 至少是 SAFE_GAP 的2倍
-            
-            # 按距离中间价排序（从远到近），但过滤掉距离当前价格太近的订单
-            all_far_with_distance = []
-            for order in all_far:
-                distance_from_mid = abs(order['price'] - mid_price)
-                # 只考虑距离中间价足够远的订单（至少是 SAFE_GAP 的2倍）
-                if distance_from_mid >= price_threshold:
-                    all_far_with_distance.append((order, distance_from_mid))
-            
-            # 按距离从远到近排序
-            all_far_with_distance.sort(key=lambda x: x[1], reverse=True)
-            
+            # 只撤销距离足够远的订单，不超过本周期撤单上限和超出的订单数
             excess = current_unique_prices - total_orders
-            # 只撤销距离足够远的订单
-            for order, distance in all_far_with_distance:
-                if len(orders_to_cancel) >= 10:
-                    break
-                if len(orders_to_cancel) >= excess:
-                    break
-                orders_to_cancel.append(order)
-        
-        print(f"中间价 ${mid_price:.1f} | 窗口 ±{half_window:.0f}")
-        print(f"当前订单: {all_sell_orders_count}卖 + {all_buy_orders_count}买 = {current_total_orders} (去重后: {len(existing_sell_orders)}卖 + {len(existing_buy_orders)}买 = {current_unique_prices})")
-        print(f"目标订单: {len(validated_sell_prices)}卖 + {len(validated_buy_prices)}买")
-        print(f"需下单: {len(new_sell_prices)}卖 + {len(new_buy_prices)}买")
+            limit = min(max_cancels, excess) - len(orders_to_cancel)
+            if limit > 0:
+                # 计算距离阈值：不应该撤销距离当前价格太近的订单
+                # 使用 SAFE_GAP 的倍数作为阈值，确保不会撤销可能很快成交的订单
+                price_threshold = safe_gap * 2  # 至少是 SAFE_GAP 的2倍
+                
+                # 不在理想价格集合中、且距离中间价足够远的订单（远单）
+                all_far = [
+                    (order_type, p, abs(p - mid_price))
+                    for order_type, tick_of in (('sell', sell_tick_of), ('buy', buy_tick_of))
+                    for p, tick in tick_of.items()
+                    if tick not in ideal_ticks and abs(p - mid_price) >= price_threshold
+                ]
+                
+                # 只取距离最远的limit个（等价于按距离从远到近排序后截取，无需整体排序）
+                for order_type, p, _ in heapq.nlargest(limit, all_far, key=lambda x: x[2]):
+                    orders_to_cancel.append({'type': order_type, 'price': p})
+        
+        log.info("中间价 $%.1f | 窗口 ±%.0f", mid_price, half_window)
+        log.info("当前订单: %s卖 + %s买 = %s (去重后: %s卖 + %s买 = %s)",
+                 all_sell_orders_count, all_buy_orders_count, current_total_orders,
+                 len(existing_sell_orders), len(existing_buy_orders), current_unique_prices)
+        log.info("目标订单: %s卖 + %s买", len(validated_sell_prices), len(validated_buy_prices))
+        log.info("需下单: %s卖 + %s买", len(new_sell_prices), len(new_buy_prices))
         if orders_to_cancel:
-            cancel_info_list = []
-            for o in orders_to_cancel:
-                order_type_cn = '买' if o['type'] == 'buy' else '卖'
-                cancel_info_list.append(f"{order_type_cn}-{o['price']}")
-            cancel_info = ', '.join(cancel_info_list)
-            print(f"需撤销: {len(orders_to_cancel)}单 → {cancel_info}")
+            if log.isEnabledFor(logging.INFO):
+                cancel_info = ', '.join(f"{'买' if o['type'] == 'buy' else '卖'}-{o['price']}" for o in orders_to_cancel)
+                log.info("需撤销: %s单 → %s", len(orders_to_cancel), cancel_info)
         else:
-            print("无需撤销订单")
+            log.info("无需撤销订单")
         
         return {
             'sell_prices': new_sell_prices,
@@ -677,10 +902,10 @@ class SlidingWindowGridStrategy(BaseStrategy):
             error_msg = str(e)
             # 如果是超时错误，不频繁打印日志（已在position_manager中处理）
             if '超时' not in error_msg and 'timeout' not in error_msg.lower():
-                print(f"获取持仓信息失败: {e}")
-            position_btc = Decimal('0')
-            avg_price = Decimal('0')
-            unrealized_pnl = Decimal('0')
+                log.warning("获取持仓信息失败: %s", e)
+            position_btc = _ZERO
+            avg_price = _ZERO
+            unrealized_pnl = _ZERO
             side = 'none'
         
         return {
@@ -691,157 +916,122 @@ class SlidingWindowGridStrategy(BaseStrategy):
             'order_size': self.order_size
         }
     
-    def _cancel_order_by_price(self, price: Decimal, order_type: str):
-        """根据价格取消订单（带超时保护）"""
-        try:
-            # 获取订单列表（已经有缓存机制，应该很快）
-            open_orders = self.order_manager.get_open_orders(self.symbol)
-            order_type_cn = '买' if order_type.lower() == 'buy' else '卖'
-            
-            # 查找匹配的订单
-            matching_orders = []
-            for order in open_orders:
-                order_price = Decimal(str(order.get('price', 0)))
-                order_side = order.get('side', '').lower()
-                
-                if (order_price == price and 
-                    order_side == order_type.lower()):
-                    matching_orders.append(order)
-            
-            if not matching_orders:
-                print(f"未找到匹配的订单 ({order_type_cn}单 @ {price})")
-                return False
-            
-            # 取消第一个匹配的订单
-            order = matching_orders[0]
-            order_id = order.get('order_id')
-            print(f"准备取消订单: {order_type_cn}单 @ {price} (订单ID: {order_id})")
-            
+    def _execute_batch_orders(self, buy_prices: List[Decimal], sell_prices: List[Decimal],
+                              replacements: Optional[Dict[Tuple[str, Decimal], str]] = None):
+        """批量执行订单（replacements中的价格通过改单替换对应的旧订单，其余直接下单）"""
+        replacements = replacements or {}
+        # (方向, 价格) 元组，只用于组装下单参数和日志，不需要每单一个dict
+        orders = [('buy', p) for p in buy_prices]
+        orders.extend(('sell', p) for p in sell_prices)
+        
+        # 格式化订单列表为中文输出（与JS策略一致），日志级别未启用时不拼接
+        if log.isEnabledFor(logging.INFO):
+            log.info("新单: %s", ', '.join(f"{'买' if side == 'buy' else '卖'}-{price}" for side, price in orders))
+        
+        # 检查订单冷却时间（冷却作用于整批订单）
+        elapsed = time.time() - self.last_order_time
+        if elapsed < self.order_cooldown:
+            time.sleep(self.order_cooldown - elapsed)
+        
+        # 改单和新单各一次批量提交，部分失败不影响其余订单
+        template = self._order_template
+        requests = [{**template, 'side': side, 'price': price} for side, price in orders]
+        results: List[Dict[str, Any]] = [{}] * len(orders)
+        replace_indexes = [i for i, order in enumerate(orders) if order in replacements]
+        place_indexes = [i for i, order in enumerate(orders) if order not in replacements]
+        
+        if replace_indexes:
             try:
-                # 尝试取消订单，如果超时则跳过
-                # 注意：cancel_order 内部已经有超时保护（60秒），如果超时会抛出异常
-                self.order_manager.cancel_order(
-                    symbol=self.symbol,
-                    order_id=order_id
-                )
-                print(f"已取消订单: {order_type_cn}单 @ {price}")
-                return True
-            except Exception as cancel_error:
-                # 如果取消订单失败（可能是超时），记录错误但继续
-                error_msg = str(cancel_error)
-                # 如果是超时错误，给出更明确的提示
-                if '超时' in error_msg or 'timeout' in error_msg.lower():
-                    print(f"取消订单超时 ({order_type_cn}单 @ {price})，跳过")
-                else:
-                    print(f"取消订单失败 ({order_type_cn}单 @ {price}): {cancel_error}")
-                return False  # 返回False表示取消失败，但不抛出异常
-        except Exception as e:
-            print(f"获取订单列表失败: {e}")
-            import traceback
-            traceback.print_exc()
-        return False
-    
-    def _execute_batch_orders(self, buy_prices: List[Decimal], sell_prices: List[Decimal]):
-        """批量执行订单"""
-        orders = (
-            [{'type': 'buy', 'price': p} for p in buy_prices] +
-            [{'type': 'sell', 'price': p} for p in sell_prices]
-        )
+                replaced = self.order_manager.replace_orders([
+                    {**requests[i], 'order_id': replacements[orders[i]]} for i in replace_indexes
+                ])
+            except Exception as e:
+                replaced = [{'error': str(e)}] * len(replace_indexes)
+            for i, result in zip(replace_indexes, replaced):
+                results[i] = result
         
-        # 格式化订单列表为中文输出（与JS策略一致）
-        orders_list = []
-        for order in orders:
-            order_type_cn = '买' if order['type'] == 'buy' else '卖'
-            orders_list.append(f"{order_type_cn}-{order['price']}")
-        print(f"新单: {', '.join(orders_list)}")
-        for order in orders:
+        if place_indexes:
             try:
-                # 检查订单冷却时间
-                current_time = time.time()
-                if current_time - self.last_order_time < self.order_cooldown:
-                    wait_time = self.order_cooldown - (current_time - self.last_order_time)
-                    time.sleep(wait_time)
-                
-                if order['type'] == 'buy':
-                    result = self.order_manager.place_order(
-                        symbol=self.symbol,
-                        side='buy',
-                        order_type='limit',
-                        quantity=self.order_size,
-                        price=order['price']
-                    )
-                else:
-                    result = self.order_manager.place_order(
-                        symbol=self.symbol,
-                        side='sell',
-                        order_type='limit',
-                        quantity=self.order_size,
-                        price=order['price']
-                    )
-                
-                if result.get('order_id'):
-                    self.last_order_time = time.time()
-                    self.active_orders[result['order_id']] = result
-                    # 订单提交成功，不打印日志（与JS策略一致）
-                
-                time.sleep(self.order_cooldown)
-                
+                placed = self.order_manager.place_orders([requests[i] for i in place_indexes])
             except Exception as e:
-                order_type_cn = '买' if order['type'] == 'buy' else '卖'
-                print(f"下单失败 ({order_type_cn}单 @ {order['price']}): {e}")
+                placed = [{'error': str(e)}] * len(place_indexes)
+            for i, result in zip(place_indexes, placed):
+                results[i] = result
+        
+        for (side, price), result in zip(orders, results):
+            if result.get('order_id'):
+                self.last_order_time = time.time()
+                with self._orders_lock:
+                    # 改单成功时旧订单已被交易所撤销
+                    replaced_order_id = replacements.get((side, price))
+                    if replaced_order_id:
+                        self._unindex_order(replaced_order_id)
+                    order_id = result['order_id']
+                    if order_id not in self._closed_order_ids and order_id not in self.active_orders:
+                        self._index_order(order_id, result)
+                # 订单提交成功，不打印日志（与JS策略一致）
+            else:
+                order_type_cn = '买' if side == 'buy' else '卖'
+                log.warning("下单失败 (%s单 @ %s): %s", order_type_cn, price, result.get('error', '未返回订单ID'))
         
-        print('本轮下单完成')
+        log.info('本轮下单完成')
+    
+    def _get_status_ticker(self) -> Optional[Dict[str, Any]]:
+        """获取get_status使用的ticker，_status_ticker_ttl 秒内的重复调用复用上次结果（策略周期本身不走此缓存）"""
+        fetched_at, ticker = self._status_ticker
+        if ticker is not None and time.monotonic() - fetched_at < self._status_ticker_ttl:
+            return ticker
+        ticker = self.order_manager.exchange.get_ticker(self.symbol)
+        self._status_ticker = (time.monotonic(), ticker)
+        return ticker
     
     def get_status(self) -> Dict[str, Any]:
         """获取策略状态（包含订单详细信息）"""
-        try:
-            ticker = self.order_manager.exchange.get_ticker(self.symbol)
-            current_price = Decimal(str(ticker.get('price', 0))) if ticker else Decimal('0')
-            bid_price = Decimal(str(ticker.get('bid', current_price))) if ticker else current_price
-            ask_price = Decimal(str(ticker.get('ask', current_price))) if ticker else current_price
-        except:
-            current_price = Decimal('0')
-            bid_price = Decimal('0')
-            ask_price = Decimal('0')
-        
-        position_info = self._get_position_info()
+        # ticker和持仓两个独立的网络请求在常驻的I/O线程池中并发获取，读取本地订单快照与之重叠
+        ticker_future = self._submit_io(self._get_status_ticker)
+        position_future = self._submit_io(self._get_position_info)
         
         # 获取订单详细信息
         try:
-            open_orders = self.order_manager.get_open_orders(self.symbol)
-            sell_orders = []
-            buy_orders = []
-            
-            for order in open_orders:
-                order_price = order.get('price')
-                order_side = order.get('side', '').lower()
-                order_qty = order.get('quantity', '0')
-                order_id = order.get('order_id', '')
-                
-                if order_price:
-                    order_info = {
-                        'order_id': order_id,
-                        'price': str(order_price),
-                        'quantity': str(order_qty)
-                    }
-                    if order_side == 'sell':
-                        sell_orders.append(order_info)
-                    elif order_side == 'buy':
-                        buy_orders.append(order_info)
-            
-            # 按价格排序
-            sell_orders.sort(key=lambda x: float(x['price']), reverse=False)  # 卖单从低到高
-            buy_orders.sort(key=lambda x: float(x['price']), reverse=True)   # 买单从高到低
+            # 复用按价格索引的本地订单快照，价格已是Decimal，按键排序即可
+            sell_orders_by_price, buy_orders_by_price = self._snapshot_orders_by_price()
+            sell_orders = [
+                {'order_id': order.get('order_id', ''), 'price': str(price), 'quantity': str(order.get('quantity', '0'))}
+                for price in sorted(sell_orders_by_price)  # 卖单从低到高
+                for order in sell_orders_by_price[price]
+            ]
+            buy_orders = [
+                {'order_id': order.get('order_id', ''), 'price': str(price), 'quantity': str(order.get('quantity', '0'))}
+                for price in sorted(buy_orders_by_price, reverse=True)  # 买单从高到低
+                for order in buy_orders_by_price[price]
+            ]
             
             # 统计实际订单数（包括所有有价格的未成交订单，不仅仅是策略自己创建的）
             total_active_orders = len(sell_orders) + len(buy_orders)
             
         except Exception as e:
-            print(f"获取订单详细信息失败: {e}")
+            log.warning("获取订单详细信息失败: %s", e)
             sell_orders = []
             buy_orders = []
             total_active_orders = 0
         
+        # ticker偶发失败时沿用上次成功的价格，避免状态页价格跳成0
+        try:
+            ticker = ticker_future.result()
+            current_price = Decimal(str(ticker.get('price', 0))) if ticker else _ZERO
+            # 交易所获取失败时可能返回全0的ticker，同样沿用上次的价格
+            if current_price > 0:
+                bid_price = Decimal(str(ticker.get('bid', current_price)))
+                ask_price = Decimal(str(ticker.get('ask', current_price)))
+                self._last_ticker_prices = (current_price, bid_price, ask_price)
+            else:
+                current_price, bid_price, ask_price = self._last_ticker_prices
+        except Exception:
+            current_price, bid_price, ask_price = self._last_ticker_prices
+        
+        # _get_position_info内部已处理异常，失败时返回空持仓
+        position_info = position_future.result()
+        
         return {
             'is_running': self.is_running,
             'symbol': self.symbol,
@@ -873,6 +1063,7 @@ class SlidingWindowGridStrategy(BaseStrategy):
                 'min_valid_price': str(self.grid_config['MIN_VALID_PRICE']),
                 'max_multiplier': str(self.grid_config['MAX_MULTIPLIER']),
                 'order_cooldown': self.grid_config['ORDER_COOLDOWN'],
+                'max_cancels_per_cycle': self.grid_config['MAX_CANCELS_PER_CYCLE'],
             }
         }
 
@@ -5,6 +5,7 @@
 """
 import sys
 import os
+import traceback
 import time
 from decimal import Decimal
 
@@ -37,16 +38,7 @@ def test_extended_limit_order():
     try:
         # 创建交易所实例
         print("\n正在创建交易所实例...")
-        exchange = ExchangeFactory.create(
-            name=extended_config['name'],
-            api_key=extended_config['api_key'],
-            secret_key=extended_config.get('secret_key', ''),
-            public_key=extended_config.get('public_key'),
-            private_key=extended_config.get('private_key', extended_config.get('secret_key', '')),
-            vault=extended_config.get('vault'),
-            testnet=extended_config.get('testnet', False),
-            default_market=extended_config.get('default_market', 'BTC-USD')
-        )
+        exchange = ExchangeFactory.create_from_config(extended_config)
         print("✓ 交易所实例创建成功")
         
         # 测试参数
@@ -164,7 +156,6 @@ def test_extended_limit_order():
                     print(f"  状态: {cancel_result.get('status', 'N/A')}")
                 except Exception as e:
                     print(f"❌ 取消订单失败: {e}")
-                    import traceback
                     traceback.print_exc()
             else:
                 print(f"订单保留，请稍后手动取消")
@@ -176,13 +167,11 @@ def test_extended_limit_order():
             
         except Exception as e:
             print(f"❌ 下单失败: {e}")
-            import traceback
             traceback.print_exc()
             return False
         
     except Exception as e:
         print(f"\n❌ 测试失败: {e}")
-        import traceback
         traceback.print_exc()
         return False
 
@@ -5,6 +5,7 @@
 """
 import sys
 import os
+import traceback
 import time
 from decimal import Decimal
 
@@ -38,16 +39,7 @@ def test_extended_price():
     try:
         # 创建交易所实例
         print("\n正在创建交易所实例...")
-        exchange = ExchangeFactory.create(
-            name=extended_config['name'],
-            api_key=extended_config['api_key'],
-            secret_key=extended_config.get('secret_key', ''),
-            public_key=extended_config.get('public_key'),
-            private_key=extended_config.get('private_key', extended_config.get('secret_key', '')),
-            vault=extended_config.get('vault'),
-            testnet=extended_config.get('testnet', False),
-            default_market=extended_config.get('default_market', 'BTC-USD')
-        )
+        exchange = ExchangeFactory.create_from_config(extended_config)
         print("✓ 交易所实例创建成功")
         
         # 测试交易对
@@ -92,7 +84,6 @@ def test_extended_price():
                 
         except Exception as e:
             print(f"❌ Ticker获取失败: {e}")
-            import traceback
             traceback.print_exc()
             return False
         
@@ -139,7 +130,6 @@ def test_extended_price():
                 
         except Exception as e:
             print(f"❌ 订单簿获取失败: {e}")
-            import traceback
             traceback.print_exc()
             return False
         
@@ -178,7 +168,6 @@ def test_extended_price():
                 
         except Exception as e:
             print(f"❌ 实时价格更新测试失败: {e}")
-            import traceback
             traceback.print_exc()
             return False
         
@@ -189,7 +178,6 @@ def test_extended_price():
         
     except Exception as e:
         print(f"\n❌ 测试失败: {e}")
-        import traceback
         traceback.print_exc()
         return False
 
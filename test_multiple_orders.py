@@ -5,14 +5,13 @@
 """
 import sys
 import os
-import time
+import traceback
 from decimal import Decimal
 
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from core.config_manager import get_config_manager
-from exchanges.factory import ExchangeFactory
 
 
 def test_multiple_orders():
@@ -37,16 +36,10 @@ def test_multiple_orders():
     try:
         # 创建交易所实例
         print("\n正在创建交易所实例...")
-        exchange = ExchangeFactory.create(
-            name=extended_config['name'],
-            api_key=extended_config['api_key'],
-            secret_key=extended_config.get('secret_key', ''),
-            public_key=extended_config.get('public_key'),
-            private_key=extended_config.get('private_key', extended_config.get('secret_key', '')),
-            vault=extended_config.get('vault'),
-            testnet=extended_config.get('testnet', False),
-            default_market=extended_config.get('default_market', 'BTC-USD')
-        )
+        # 从实例池获取（同一进程内多个测试复用同一个交易所实例和WebSocket连接）
+        from core.exchange_pool import ExchangeInstancePool
+        order_manager, _, _ = ExchangeInstancePool.get_managers(extended_config['account_key'])
+        exchange = order_manager.exchange
         print("✓ 交易所实例创建成功")
         
         # 测试参数
@@ -67,10 +60,12 @@ def test_multiple_orders():
         print(f"订单2: 价格 {price2}, 数量 {test_quantity} BTC")
         print(f"{'=' * 60}")
         
-        # 先获取当前价格
+        # 先获取当前价格（与未成交订单缓存预热并发进行）
         print("\n【步骤1】获取当前BTC价格...")
         try:
-            ticker = exchange.get_ticker(test_symbol)
+            ticker = exchange.warmup(test_symbol)['ticker']
+            if 'error' in ticker:
+                raise Exception(ticker['error'])
             current_price = float(ticker.get('price', 0))
             print(f"✓ 当前价格: {current_price}")
             print(f"  挂单价格1: {price1} (低于当前价 {current_price - float(price1):.2f})")
@@ -78,68 +73,50 @@ def test_multiple_orders():
         except Exception as e:
             print(f"⚠ 获取价格失败: {e}，继续测试...")
         
-        # 提交第一个订单（80000）
-        print(f"\n【步骤2】提交第一个限价买入订单（价格: {price1}）...")
+        # 两个订单一次批量提交（80000 和 75000）
+        print(f"\n【步骤2】批量提交两个限价买入订单（价格: {price1}, {price2}）...")
         order1 = None
+        order2 = None
         try:
-            order1 = exchange.place_order(
-                symbol=test_symbol,
-                side="buy",
-                order_type="limit",
-                quantity=test_quantity,
-                price=price1
-            )
-            print(f"✓ 订单1提交成功!")
-            print(f"  订单ID: {order1.get('order_id', 'N/A')}")
-            print(f"  价格: {order1.get('price', 'N/A')}")
-            print(f"  数量: {order1.get('quantity', 'N/A')}")
-            print(f"  状态: {order1.get('status', 'N/A')}")
+            order1, order2 = exchange.place_orders([
+                {'symbol': test_symbol, 'side': 'buy', 'order_type': 'limit', 'quantity': test_quantity, 'price': price}
+                for price in (price1, price2)
+            ])
         except Exception as e:
-            print(f"❌ 订单1提交失败: {e}")
-            import traceback
+            print(f"❌ 批量提交订单失败: {e}")
             traceback.print_exc()
             return False
         
-        # 等待一小段时间
-        print("\n等待1秒...")
-        time.sleep(1)
+        for i, order in enumerate((order1, order2), 1):
+            if 'error' in order:
+                print(f"❌ 订单{i}提交失败: {order['error']}")
+            else:
+                print(f"✓ 订单{i}提交成功!")
+                print(f"  订单ID: {order.get('order_id', 'N/A')}")
+                print(f"  价格: {order.get('price', 'N/A')}")
+                print(f"  数量: {order.get('quantity', 'N/A')}")
+                print(f"  状态: {order.get('status', 'N/A')}")
         
-        # 提交第二个订单（75000）
-        print(f"\n【步骤3】提交第二个限价买入订单（价格: {price2}）...")
-        order2 = None
-        try:
-            order2 = exchange.place_order(
-                symbol=test_symbol,
-                side="buy",
-                order_type="limit",
-                quantity=test_quantity,
-                price=price2
-            )
-            print(f"✓ 订单2提交成功!")
-            print(f"  订单ID: {order2.get('order_id', 'N/A')}")
-            print(f"  价格: {order2.get('price', 'N/A')}")
-            print(f"  数量: {order2.get('quantity', 'N/A')}")
-            print(f"  状态: {order2.get('status', 'N/A')}")
-        except Exception as e:
-            print(f"❌ 订单2提交失败: {e}")
-            import traceback
-            traceback.print_exc()
-            # 如果第二个订单失败，取消第一个订单
-            if order1:
-                print(f"\n尝试取消订单1...")
+        if 'error' in order1 or 'error' in order2:
+            # 有订单失败时，取消已成功的订单
+            placed_ids = [order['order_id'] for order in (order1, order2) if 'error' not in order]
+            if placed_ids:
+                print(f"\n尝试取消已提交的订单...")
                 try:
-                    exchange.cancel_order(test_symbol, order1.get('order_id'))
-                    print(f"✓ 订单1已取消")
+                    exchange.cancel_orders(test_symbol, placed_ids)
+                    print(f"✓ 已取消")
                 except:
                     pass
             return False
         
-        # 等待一小段时间
-        print("\n等待2秒后查询所有未成交订单...")
-        time.sleep(2)
+        # 等待两个订单都出现在未成交订单中（由订单推送唤醒，最多等5秒）
+        print("\n等待订单挂单确认...")
+        for order in (order1, order2):
+            if not exchange.wait_for_order(test_symbol, order['order_id'], 'open', timeout=5.0):
+                print(f"⚠ 订单 {order['order_id']} 5秒内未出现在未成交订单中")
         
         # 查询所有未成交订单
-        print(f"\n【步骤4】查询所有未成交订单...")
+        print(f"\n【步骤3】查询所有未成交订单...")
         try:
             open_orders = exchange.get_open_orders(test_symbol)
             print(f"✓ 当前未成交订单数量: {len(open_orders)}")
@@ -155,7 +132,7 @@ def test_multiple_orders():
         
         # 取消第二个订单（75000）
         order2_id = order2.get('order_id')
-        print(f"\n【步骤5】单独取消订单2（价格: {price2}, 订单ID: {order2_id}）...")
+        print(f"\n【步骤4】单独取消订单2（价格: {price2}, 订单ID: {order2_id}）...")
         try:
             cancel_result = exchange.cancel_order(test_symbol, order2_id)
             print(f"✓ 订单2取消成功!")
@@ -163,16 +140,16 @@ def test_multiple_orders():
             print(f"  状态: {cancel_result.get('status', 'N/A')}")
         except Exception as e:
             print(f"❌ 取消订单2失败: {e}")
-            import traceback
             traceback.print_exc()
             return False
         
-        # 等待一小段时间
-        print("\n等待2秒后再次查询未成交订单...")
-        time.sleep(2)
+        # 等待订单2从未成交订单中移除（由订单推送唤醒，最多等5秒）
+        print("\n等待撤单确认...")
+        if not exchange.wait_for_order(test_symbol, order2_id, 'canceled', timeout=5.0):
+            print(f"⚠ 订单2 5秒内仍在未成交订单中")
         
         # 再次查询未成交订单，确认订单2已取消
-        print(f"\n【步骤6】再次查询未成交订单，确认订单2已取消...")
+        print(f"\n【步骤5】再次查询未成交订单，确认订单2已取消...")
         try:
             open_orders = exchange.get_open_orders(test_symbol)
             print(f"✓ 当前未成交订单数量: {len(open_orders)}")
@@ -213,7 +190,7 @@ def test_multiple_orders():
         # 询问是否取消订单1
         order1_id = order1.get('order_id') if order1 else None
         if order1_id:
-            print(f"\n【步骤7】订单管理")
+            print(f"\n【步骤6】订单管理")
             print(f"订单1（价格: {price1}, 订单ID: {order1_id}）仍在未成交订单中")
             print(f"如果需要取消订单1，可以运行:")
             print(f"  exchange.cancel_order('{test_symbol}', '{order1_id}')")
@@ -235,7 +212,6 @@ def test_multiple_orders():
         
     except Exception as e:
         print(f"\n❌ 测试失败: {e}")
-        import traceback
         traceback.print_exc()
         return False
 
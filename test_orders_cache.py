@@ -5,14 +5,15 @@
 """
 import sys
 import os
+import traceback
 import time
+import statistics
 from decimal import Decimal
 
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from core.config_manager import get_config_manager
-from exchanges.factory import ExchangeFactory
 
 
 def test_orders_cache():
@@ -34,16 +35,10 @@ def test_orders_cache():
     try:
         # 创建交易所实例
         print("\n正在创建交易所实例...")
-        exchange = ExchangeFactory.create(
-            name=extended_config['name'],
-            api_key=extended_config['api_key'],
-            secret_key=extended_config.get('secret_key', ''),
-            public_key=extended_config.get('public_key'),
-            private_key=extended_config.get('private_key', extended_config.get('secret_key', '')),
-            vault=extended_config.get('vault'),
-            testnet=extended_config.get('testnet', False),
-            default_market=extended_config.get('default_market', 'BTC-USD')
-        )
+        # 从实例池获取（同一进程内多个测试复用同一个交易所实例和WebSocket连接）
+        from core.exchange_pool import ExchangeInstancePool
+        order_manager, _, _ = ExchangeInstancePool.get_managers(extended_config['account_key'])
+        exchange = order_manager.exchange
         print("✓ 交易所实例创建成功")
         
         test_symbol = "BTC-USD"
@@ -54,9 +49,9 @@ def test_orders_cache():
         
         # 测试1: 第一次查询（应该使用REST API并建立缓存）
         print(f"\n【测试1】第一次查询未成交订单（建立缓存）...")
-        start_time = time.time()
+        start_time = time.perf_counter()
         orders1 = exchange.get_open_orders(test_symbol)
-        elapsed1 = time.time() - start_time
+        elapsed1 = time.perf_counter() - start_time
         print(f"✓ 查询完成，耗时: {elapsed1:.3f}秒")
         print(f"  订单数量: {len(orders1)}")
         if orders1:
@@ -65,9 +60,9 @@ def test_orders_cache():
         
         # 测试2: 立即再次查询（应该使用缓存）
         print(f"\n【测试2】立即再次查询（应该使用缓存）...")
-        start_time = time.time()
+        start_time = time.perf_counter()
         orders2 = exchange.get_open_orders(test_symbol)
-        elapsed2 = time.time() - start_time
+        elapsed2 = time.perf_counter() - start_time
         print(f"✓ 查询完成，耗时: {elapsed2:.3f}秒")
         print(f"  订单数量: {len(orders2)}")
         
@@ -77,29 +72,32 @@ def test_orders_cache():
             print(f"⚠ 缓存可能未生效，两次查询耗时相近")
         
         # 测试3: 连续多次查询（验证缓存避免API限速）
-        print(f"\n【测试3】连续10次查询（验证缓存避免API限速）...")
-        start_time = time.time()
-        for i in range(10):
+        print(f"\n【测试3】连续100次查询（验证缓存避免API限速）...")
+        # 循环内只计时不打印，统计中位数和p95，避免输出IO掩盖缓存命中的耗时
+        durations_ns = []
+        for i in range(100):
+            start_ns = time.perf_counter_ns()
             orders = exchange.get_open_orders(test_symbol)
-        total_time = time.time() - start_time
-        avg_time = total_time / 10
-        print(f"✓ 10次查询完成")
-        print(f"  总耗时: {total_time:.3f}秒")
-        print(f"  平均每次: {avg_time:.3f}秒")
+            durations_ns.append(time.perf_counter_ns() - start_ns)
+        durations_ns.sort()
+        median_us = statistics.median(durations_ns) / 1000
+        p95_us = durations_ns[94] / 1000
+        print(f"✓ 100次查询完成")
+        print(f"  中位数: {median_us:.1f}微秒，p95: {p95_us:.1f}微秒")
         print(f"  订单数量: {len(orders)}")
         
-        if avg_time < 0.1:
-            print(f"✓ 缓存工作正常！平均查询时间很短，说明使用了缓存而非REST API")
+        if median_us < 100:
+            print(f"✓ 缓存工作正常！查询耗时中位数低于100微秒，说明使用了缓存而非REST API")
         else:
-            print(f"⚠ 平均查询时间较长，可能仍在使用REST API")
+            print(f"⚠ 查询耗时中位数较长，可能仍在使用REST API")
         
         # 测试4: 等待缓存过期后查询（应该重新使用REST API）
         print(f"\n【测试4】等待6秒后查询（缓存应已过期，重新使用REST API）...")
         print("  等待中...")
         time.sleep(6)
-        start_time = time.time()
+        start_time = time.perf_counter()
         orders3 = exchange.get_open_orders(test_symbol)
-        elapsed3 = time.time() - start_time
+        elapsed3 = time.perf_counter() - start_time
         print(f"✓ 查询完成，耗时: {elapsed3:.3f}秒")
         print(f"  订单数量: {len(orders3)}")
         
@@ -112,9 +110,9 @@ def test_orders_cache():
         print(f"\n【测试5】验证WebSocket后台轮询（等待6秒，观察缓存是否自动更新）...")
         print("  等待中...")
         time.sleep(6)
-        start_time = time.time()
+        start_time = time.perf_counter()
         orders4 = exchange.get_open_orders(test_symbol)
-        elapsed4 = time.time() - start_time
+        elapsed4 = time.perf_counter() - start_time
         print(f"✓ 查询完成，耗时: {elapsed4:.3f}秒")
         print(f"  订单数量: {len(orders4)}")
         
@@ -123,12 +121,22 @@ def test_orders_cache():
         else:
             print(f"⚠ 查询时间未明显变化")
         
+        # 测试6: 缓存统计（按命中率判断缓存效果，不依赖耗时比较）
+        print(f"\n【测试6】订单缓存统计...")
+        stats = exchange.extended_client.orders_cache_stats()
+        print(f"  命中: {stats['hits']}，未命中: {stats['misses']}，命中率: {stats['hit_ratio']:.0%}")
+        print(f"  当前TTL: {stats['ttl']:.2f}秒，订单流实时维护: {stats['ws_subscribed']}")
+        if stats['hit_ratio'] >= 0.5:
+            print(f"✓ 大部分查询命中缓存")
+        else:
+            print(f"⚠ 缓存命中率偏低")
+        
         print(f"\n{'=' * 60}")
         print("✓ 订单缓存测试完成")
         print(f"{'=' * 60}")
         print("\n总结:")
         print("  - 第一次查询使用REST API建立缓存")
-        print("  - 后续查询在缓存有效期内使用缓存（避免API限速）")
+        print("  - 后续查询在缓存有效期内使用缓存（避免API限速），下单/撤单频繁时有效期自动缩短")
         print("  - WebSocket后台轮询每5秒更新一次缓存")
         print("  - 缓存过期后自动重新使用REST API获取最新数据")
         
@@ -136,7 +144,6 @@ def test_orders_cache():
         
     except Exception as e:
         print(f"\n❌ 测试失败: {e}")
-        import traceback
         traceback.print_exc()
         return False
 
@@ -5,14 +5,15 @@
 """
 import sys
 import os
+import traceback
 import time
+import statistics
 from decimal import Decimal
 
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from core.config_manager import get_config_manager
-from exchanges.factory import ExchangeFactory
 
 
 def test_orders_websocket():
@@ -32,16 +33,10 @@ def test_orders_websocket():
     try:
         # 创建交易所实例
         print("\n正在创建交易所实例...")
-        exchange = ExchangeFactory.create(
-            name=extended_config['name'],
-            api_key=extended_config['api_key'],
-            secret_key=extended_config.get('secret_key', ''),
-            public_key=extended_config.get('public_key'),
-            private_key=extended_config.get('private_key', extended_config.get('secret_key', '')),
-            vault=extended_config.get('vault'),
-            testnet=extended_config.get('testnet', False),
-            default_market=extended_config.get('default_market', 'BTC-USD')
-        )
+        # 从实例池获取（同一进程内多个测试复用同一个交易所实例和WebSocket连接）
+        from core.exchange_pool import ExchangeInstancePool
+        order_manager, _, _ = ExchangeInstancePool.get_managers(extended_config['account_key'])
+        exchange = order_manager.exchange
         print("✓ 交易所实例创建成功")
         
         test_symbol = "BTC-USD"
@@ -68,14 +63,14 @@ def test_orders_websocket():
             print(f"❌ 创建订单失败: {e}")
             return False
         
-        # 等待订单创建完成
-        time.sleep(1)
+        # 等待订单创建完成（由订单推送唤醒，最多等5秒）
+        exchange.wait_for_order(test_symbol, order_id, 'open', timeout=5.0)
         
         # 测试2: 第一次查询（建立缓存）
         print(f"\n【步骤2】第一次查询未成交订单（建立缓存）...")
-        start_time = time.time()
+        start_time = time.perf_counter()
         orders1 = exchange.get_open_orders(test_symbol)
-        elapsed1 = time.time() - start_time
+        elapsed1 = time.perf_counter() - start_time
         print(f"✓ 查询完成，耗时: {elapsed1:.3f}秒")
         print(f"  订单数量: {len(orders1)}")
         if orders1:
@@ -83,9 +78,9 @@ def test_orders_websocket():
         
         # 测试3: 立即再次查询（应该使用缓存）
         print(f"\n【步骤3】立即再次查询（应该使用缓存）...")
-        start_time = time.time()
+        start_time = time.perf_counter()
         orders2 = exchange.get_open_orders(test_symbol)
-        elapsed2 = time.time() - start_time
+        elapsed2 = time.perf_counter() - start_time
         print(f"✓ 查询完成，耗时: {elapsed2:.3f}秒")
         print(f"  订单数量: {len(orders2)}")
         
@@ -95,22 +90,25 @@ def test_orders_websocket():
             print(f"⚠ 缓存可能未生效")
         
         # 测试4: 连续多次查询（验证缓存避免API限速）
-        print(f"\n【步骤4】连续5次查询（验证缓存避免API限速）...")
-        start_time = time.time()
-        for i in range(5):
-            orders = exchange.get_open_orders(test_symbol)
-        total_time = time.time() - start_time
-        avg_time = total_time / 5
-        print(f"✓ 5次查询完成")
-        print(f"  总耗时: {total_time:.3f}秒")
-        print(f"  平均每次: {avg_time:.3f}秒")
-        
-        if avg_time < 0.1:
-            print(f"✓ 缓存工作正常！平均查询时间很短，说明使用了缓存而非REST API")
-        elif avg_time < elapsed1 * 0.5:
-            print(f"✓ 缓存工作正常！平均查询时间明显短于第一次查询")
+        print(f"\n【步骤4】连续100次查询（验证缓存避免API限速）...")
+        # 循环内只计时不打印，统计中位数和p95，避免输出IO掩盖缓存命中的耗时
+        durations_ns = []
+        for i in range(100):
+            start_ns = time.perf_counter_ns()
+            exchange.get_open_orders(test_symbol)
+            durations_ns.append(time.perf_counter_ns() - start_ns)
+        durations_ns.sort()
+        median_us = statistics.median(durations_ns) / 1000
+        p95_us = durations_ns[94] / 1000
+        print(f"✓ 100次查询完成")
+        print(f"  中位数: {median_us:.1f}微秒，p95: {p95_us:.1f}微秒")
+        
+        if median_us < 100:
+            print(f"✓ 缓存工作正常！查询耗时中位数低于100微秒，说明使用了缓存而非REST API")
+        elif median_us < elapsed1 * 1e6 * 0.5:
+            print(f"✓ 缓存工作正常！查询耗时中位数明显短于第一次查询")
         else:
-            print(f"⚠ 平均查询时间较长")
+            print(f"⚠ 查询耗时中位数较长")
         
         # 测试5: 取消订单后验证缓存更新
         print(f"\n【步骤5】取消订单后验证缓存更新...")
@@ -120,26 +118,16 @@ def test_orders_websocket():
         except Exception as e:
             print(f"⚠ 取消订单失败: {e}")
         
-        # 等待一下让缓存更新
-        time.sleep(1)
-        
-        # 查询订单（应该从缓存获取，但订单已被取消）
+        # 查询订单（撤单成功时已同步写入缓存，立即查询即应反映最新状态，无需等待）
         print(f"\n【步骤6】查询订单（验证缓存是否反映最新状态）...")
         orders3 = exchange.get_open_orders(test_symbol)
         print(f"✓ 查询完成")
         print(f"  订单数量: {len(orders3)}")
         
-        if len(orders3) == 0:
+        if all(order.get('order_id') != order_id for order in orders3):
             print(f"✓ 缓存已更新，正确反映订单已取消的状态")
         else:
-            print(f"⚠ 缓存可能未及时更新，仍显示订单存在")
-            print(f"  等待3秒后再次查询...")
-            time.sleep(3)
-            orders4 = exchange.get_open_orders(test_symbol)
-            if len(orders4) == 0:
-                print(f"✓ 缓存已更新（延迟更新）")
-            else:
-                print(f"⚠ 缓存仍未更新")
+            print(f"⚠ 缓存未反映撤单，仍显示订单存在")
         
         print(f"\n{'=' * 60}")
         print("✓ 订单WebSocket订阅和缓存测试完成")
@@ -154,7 +142,6 @@ def test_orders_websocket():
         
     except Exception as e:
         print(f"\n❌ 测试失败: {e}")
-        import traceback
         traceback.print_exc()
         return False
 
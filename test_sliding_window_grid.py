@@ -4,6 +4,7 @@
 """
 import sys
 import os
+import traceback
 import time
 from decimal import Decimal
 
@@ -11,10 +12,6 @@ from decimal import Decimal
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from core.config_manager import get_config_manager
-from exchanges.factory import ExchangeFactory
-from core.order_manager import OrderManager
-from core.account_manager import AccountManager
-from core.position_manager import PositionManager
 from strategies.sliding_window_grid import SlidingWindowGridStrategy
 
 
@@ -35,22 +32,16 @@ def test_sliding_window_grid():
     try:
         # 创建交易所实例
         print("\n正在创建交易所实例...")
-        exchange = ExchangeFactory.create(
-            name=extended_config['name'],
-            api_key=extended_config['api_key'],
-            secret_key=extended_config.get('secret_key', ''),
-            public_key=extended_config.get('public_key'),
-            private_key=extended_config.get('private_key', extended_config.get('secret_key', '')),
-            vault=extended_config.get('vault'),
-            testnet=extended_config.get('testnet', False),
-            default_market=extended_config.get('default_market', 'BTC-USD')
+        # 从实例池获取（同一进程内多个测试复用同一个交易所实例和WebSocket连接）
+        from core.exchange_pool import ExchangeInstancePool
+        order_manager, account_manager, position_manager = ExchangeInstancePool.get_managers(
+            extended_config['account_key']
         )
+        exchange = order_manager.exchange
         print("✓ 交易所实例创建成功")
         
-        # 创建管理器
-        order_manager = OrderManager(exchange)
-        account_manager = AccountManager(exchange)
-        position_manager = PositionManager(exchange)
+        # 并发预热行情和未成交订单，策略启动时的首次查询不再逐个建立连接
+        exchange.warmup("BTC-USD")
         
         # 创建策略实例
         test_symbol = "BTC-USD"
@@ -88,6 +79,9 @@ def test_sliding_window_grid():
         
         # 执行几次更新循环
         print(f"\n执行策略更新循环...")
+        # 按固定节拍（单调时钟）调度：每次等待到下一个5秒节点，更新本身的耗时不会累积成漂移
+        update_period = 5.0
+        loop_start = time.perf_counter()
         for i in range(3):
             print(f"\n--- 第 {i+1} 次更新 ---")
             update_result = strategy.update()
@@ -103,8 +97,8 @@ def test_sliding_window_grid():
             print(f"  持仓: {status['position_btc']} BTC")
             
             if i < 2:  # 最后一次不需要等待
-                print(f"等待5秒后继续...")
-                time.sleep(5)
+                print(f"等待下一个5秒节点后继续...")
+                time.sleep(max(0.0, loop_start + (i + 1) * update_period - time.perf_counter()))
         
         # 停止策略
         print(f"\n停止策略...")
@@ -119,7 +113,6 @@ def test_sliding_window_grid():
         
     except Exception as e:
         print(f"\n❌ 测试失败: {e}")
-        import traceback
         traceback.print_exc()
         return False
 
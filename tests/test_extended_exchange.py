@@ -0,0 +1,37 @@
+"""
+Extended交易所数据转换测试
+"""
+from decimal import Decimal
+from types import SimpleNamespace
+from exchanges.extended import _normalize_position, _normalize_symbol
+
+
+def _position(position_amt, position_side):
+    return SimpleNamespace(
+        position_amt=position_amt,
+        entry_price='100',
+        unrealized_profit=None,
+        leverage=5,
+        position_side=position_side
+    )
+
+
+def test_normalize_position_side():
+    """测试持仓方向判断"""
+    assert _normalize_position(_position('1', 'LONG'), 'BTC-USD')['side'] == 'long'
+    assert _normalize_position(_position('-1', 'BOTH'), 'BTC-USD')['side'] == 'short'
+    assert _normalize_position(_position('0', None), 'BTC-USD')['side'] == 'none'
+
+
+def test_normalize_position_short_quantity_is_negative():
+    """测试空单数量转为负数"""
+    result = _normalize_position(_position('2', 'SHORT'), 'BTC-USD')
+    assert result['quantity'] == Decimal('-2')
+    assert result['unrealized_pnl'] == Decimal('0')
+
+
+def test_normalize_symbol():
+    """测试交易对标准化"""
+    assert _normalize_symbol('btc/usdt') == 'BTC-USD'
+    assert _normalize_symbol('ETH/USD') == 'ETH-USD'
+    assert _normalize_symbol('BTC-USD') == 'BTC-USD'
@@ -0,0 +1,40 @@
+"""
+Extended Ticker/K线轮询线程测试
+"""
+import threading
+from jiaoyisuoshili.extended import Extended
+
+
+def _client():
+    """跳过SDK初始化，只设置轮询线程相关属性"""
+    client = Extended.__new__(Extended)
+    client.lock = threading.Lock()
+    client._stop_event = threading.Event()
+    client._poller_thread = None
+    client._ticker_subs = {}
+    client._kline_subs = {}
+    client._client_loop = None
+    client.poll_interval = 1
+    return client
+
+
+def test_poller_restarts_after_close():
+    """测试close()设置停止信号后，再次订阅会以新的停止信号重新启动轮询线程"""
+    client = _client()
+    client._ensure_poller()
+    first_thread = client._poller_thread
+
+    # 模拟close()
+    client._stop_event.set()
+    first_thread.join(timeout=5.0)
+    assert not first_thread.is_alive()
+
+    client._ensure_poller()
+    second_thread = client._poller_thread
+    assert second_thread is not first_thread
+    assert second_thread.is_alive()
+    assert not client._stop_event.is_set()
+
+    client._stop_event.set()
+    second_thread.join(timeout=5.0)
+    assert not second_thread.is_alive()
@@ -0,0 +1,62 @@
+"""
+Extended订单缓存自适应TTL测试
+"""
+import threading
+import time
+from collections import deque
+from jiaoyisuoshili.extended import Extended
+
+
+def _client():
+    """跳过SDK初始化，只设置订单缓存相关属性"""
+    client = Extended.__new__(Extended)
+    client.lock = threading.Lock()
+    client.orders_cache_timestamp = 0
+    client.orders_cache_ttl = 5.0
+    client.orders_cache_min_ttl = 1.0
+    client._order_writes = deque()
+    client.orders_cache_hits = 0
+    client.orders_cache_misses = 0
+    client.orders_ws_subscribed = False
+    return client
+
+
+def test_orders_cache_ttl_decays_with_writes_and_recovers():
+    """测试下单/撤单越频繁TTL越短且不低于下限，60秒无写入后恢复"""
+    client = _client()
+    now = time.monotonic()
+    assert client.current_orders_cache_ttl(now) == 5.0
+
+    with client.lock:
+        for _ in range(5):
+            client._mark_orders_written()
+    now = time.monotonic()
+    assert client.current_orders_cache_ttl(now) == 2.5
+
+    with client.lock:
+        for _ in range(100):
+            client._mark_orders_written()
+    assert client.current_orders_cache_ttl(time.monotonic()) == 1.0
+
+    assert client.current_orders_cache_ttl(time.monotonic() + 61) == 5.0
+    assert not client._order_writes
+
+
+def test_orders_cache_valid_counts_hits_and_misses():
+    """测试缓存有效性判断与命中统计"""
+    client = _client()
+    now = time.monotonic()
+    assert not client.orders_cache_valid(now)
+
+    with client.lock:
+        client._mark_orders_written()
+    now = client.orders_cache_timestamp
+    assert client.orders_cache_valid(now + 1)
+    assert not client.orders_cache_valid(now + 10)
+
+    stats = client.orders_cache_stats()
+    assert set(stats) == {'hits', 'misses', 'hit_ratio', 'ttl', 'ws_subscribed'}
+    assert stats['hits'] == 1
+    assert stats['misses'] == 2
+    assert stats['hit_ratio'] == 1 / 3
+    assert stats['ws_subscribed'] is False
@@ -0,0 +1,132 @@
+"""
+改单（replace_orders）测试
+"""
+from decimal import Decimal
+from exchanges.base import BaseExchange
+from core.order_manager import OrderManager
+from strategies.sliding_window_grid import SlidingWindowGridStrategy
+
+
+class FakeExchange(BaseExchange):
+    """内存交易所：记录撤单和改单请求，可指定撤单失败的订单"""
+
+    def __init__(self, supports_replace_orders=False, failing_cancels=()):
+        super().__init__('test_key', 'test_secret')
+        self.supports_replace_orders = supports_replace_orders
+        self.failing_cancels = set(failing_cancels)
+        self.orders = {}
+        self.canceled_ids = []
+        self.replaced_ids = []
+        self.price = Decimal('50000')
+        self._next_id = 0
+
+    def get_balance(self, currency=None):
+        return {}
+
+    def get_ticker(self, symbol):
+        return {'price': str(self.price), 'bid': str(self.price - 10), 'ask': str(self.price + 10)}
+
+    def get_orderbook(self, symbol, limit=20):
+        return {}
+
+    def place_order(self, symbol, side, order_type, quantity, price=None, **kwargs):
+        self._next_id += 1
+        order = {
+            'order_id': str(self._next_id), 'symbol': symbol, 'side': side,
+            'price': price, 'quantity': quantity, 'status': 'NEW'
+        }
+        self.orders[order['order_id']] = order
+        return order
+
+    def cancel_order(self, symbol, order_id):
+        if order_id in self.failing_cancels:
+            raise Exception('订单不存在')
+        self.orders.pop(order_id, None)
+        self.canceled_ids.append(order_id)
+        return {'order_id': order_id, 'status': 'CANCELED'}
+
+    def replace_orders(self, replacements):
+        self.replaced_ids.extend(replacement['order_id'] for replacement in replacements)
+        return super().replace_orders(replacements)
+
+    def get_order(self, symbol, order_id):
+        return self.orders.get(order_id, {})
+
+    def get_open_orders(self, symbol=None):
+        return list(self.orders.values())
+
+    def get_klines(self, symbol, interval, limit=100, start_time=None, end_time=None):
+        return []
+
+
+class FakePositionManager:
+    def get_position(self, symbol):
+        return {'quantity': 0}
+
+
+def _run_strategy_after_price_move(exchange):
+    """启动策略并停掉后台线程，价格两次上移后手动执行周期"""
+    order_manager = OrderManager(exchange)
+    strategy = SlidingWindowGridStrategy(
+        order_manager, None, FakePositionManager(),
+        symbol='BTC-USD', order_size='0.001', order_cooldown=0, min_valid_price=100, total_orders=10
+    )
+    assert strategy.start()['status'] == 'started'
+    strategy._stop_update.set()
+    strategy._update_event.set()
+    strategy._update_thread.join(timeout=5.0)
+    # 每个周期都重新拉取订单快照
+    strategy._open_orders_ttl = 0
+
+    # 第一次上移补齐新窗口的订单，第二次上移后初始订单成为超出数量上限的远单
+    initial_ids = set(exchange.orders)
+    for price in ('50600', '51200'):
+        exchange.price = Decimal(price)
+        assert strategy.update()['status'] == 'updated'
+    return strategy, order_manager, initial_ids
+
+
+def test_strategy_pairs_cancels_with_new_prices_when_replace_supported():
+    """测试支持改单时远单与同方向新价格配对改单，旧订单ID从索引中移除"""
+    exchange = FakeExchange(supports_replace_orders=True)
+    strategy, order_manager, initial_ids = _run_strategy_after_price_move(exchange)
+
+    assert exchange.replaced_ids
+    assert set(exchange.replaced_ids) <= initial_ids
+    for old_order_id in exchange.replaced_ids:
+        assert old_order_id not in exchange.orders
+        assert old_order_id not in strategy.active_orders
+        assert order_manager._local_orders[old_order_id]['status'] == 'CANCELED'
+    # 本地索引与交易所的未成交订单一致
+    assert set(strategy.active_orders) == set(exchange.orders)
+    strategy.stop()
+
+
+def test_strategy_cancels_then_places_without_replace_support():
+    """测试不支持改单时仍按撤单+下单执行"""
+    exchange = FakeExchange(supports_replace_orders=False)
+    strategy, _, initial_ids = _run_strategy_after_price_move(exchange)
+
+    assert not exchange.replaced_ids
+    assert exchange.canceled_ids
+    assert set(exchange.canceled_ids) <= initial_ids
+    assert set(strategy.active_orders) == set(exchange.orders)
+    strategy.stop()
+
+
+def test_base_replace_orders_skips_place_when_cancel_failed():
+    """测试默认改单实现：旧订单撤销失败的项不下新单，其余项照常替换"""
+    exchange = FakeExchange(failing_cancels={'missing'})
+    old_order = exchange.place_order('BTC-USD', 'buy', 'limit', Decimal('0.001'), Decimal('49000'))
+
+    results = exchange.replace_orders([
+        {'symbol': 'BTC-USD', 'side': 'buy', 'order_type': 'limit', 'quantity': Decimal('0.001'),
+         'price': Decimal('49500'), 'order_id': old_order['order_id']},
+        {'symbol': 'BTC-USD', 'side': 'buy', 'order_type': 'limit', 'quantity': Decimal('0.001'),
+         'price': Decimal('49400'), 'order_id': 'missing'},
+    ])
+
+    assert results[0]['price'] == Decimal('49500')
+    assert old_order['order_id'] not in exchange.orders
+    assert 'error' in results[1]
+    assert [order['price'] for order in exchange.orders.values()] == [Decimal('49500')]
@@ -0,0 +1,23 @@
+"""
+滑动窗口网格状态查询测试
+"""
+from tests.test_replace_orders import FakeExchange, FakePositionManager
+from core.order_manager import OrderManager
+from strategies.sliding_window_grid import SlidingWindowGridStrategy
+
+
+def test_get_status_after_stop_runs_inline_without_pool():
+    """测试策略停止后查询状态不再创建I/O线程池，直接在当前线程获取"""
+    strategy = SlidingWindowGridStrategy(
+        OrderManager(FakeExchange()), None, FakePositionManager(),
+        symbol='BTC-USD', order_size='0.001', order_cooldown=0, min_valid_price=100, total_orders=10
+    )
+    assert strategy.start()['status'] == 'started'
+    assert strategy._io_pool is not None
+    strategy.stop()
+    assert strategy._io_pool is None
+
+    status = strategy.get_status()
+    assert status['is_running'] is False
+    assert status['current_price'] == '50000'
+    assert strategy._io_pool is None
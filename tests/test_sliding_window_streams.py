@@ -0,0 +1,67 @@
+"""
+滑动窗口网格推送订阅测试
+"""
+from tests.test_replace_orders import FakeExchange, FakePositionManager
+from core.order_manager import OrderManager
+from strategies.sliding_window_grid import SlidingWindowGridStrategy
+
+
+class StreamingExchange(FakeExchange):
+    """记录推送订阅的交易所，订单推送可指定为订阅失败"""
+
+    def __init__(self, orders_stream_ok=True):
+        super().__init__()
+        self.orders_stream_ok = orders_stream_ok
+        self.bbo_callbacks = []
+        self.order_callbacks = []
+
+    def watch_bbo(self, symbol, callback):
+        self.bbo_callbacks.append(callback)
+        return True
+
+    def unwatch_bbo(self, symbol, callback):
+        self.bbo_callbacks.remove(callback)
+
+    def watch_orders(self, callback):
+        if not self.orders_stream_ok:
+            return False
+        self.order_callbacks.append(callback)
+        return True
+
+    def unwatch_orders(self, callback):
+        self.order_callbacks.remove(callback)
+
+
+def _strategy(exchange):
+    return SlidingWindowGridStrategy(
+        OrderManager(exchange), None, FakePositionManager(),
+        symbol='BTC-USD', order_size='0.001', order_cooldown=0, min_valid_price=100, total_orders=10
+    )
+
+
+def test_bbo_subscribed_once_when_orders_stream_unavailable():
+    """测试订单推送订阅失败时，重复订阅不会重复登记行情回调，停止后回调被移除"""
+    exchange = StreamingExchange(orders_stream_ok=False)
+    strategy = _strategy(exchange)
+    assert strategy.start()['status'] == 'started'
+    strategy._subscribe_streams()
+
+    assert not strategy._streams_subscribed
+    assert exchange.bbo_callbacks == [strategy._on_bbo]
+
+    strategy.stop()
+    assert exchange.bbo_callbacks == []
+
+
+def test_stopped_strategies_release_stream_callbacks():
+    """测试共享交易所实例上多次启停策略时，推送回调不会累积"""
+    exchange = StreamingExchange()
+    for _ in range(3):
+        strategy = _strategy(exchange)
+        assert strategy.start()['status'] == 'started'
+        assert strategy._streams_subscribed
+        assert exchange.order_callbacks == [strategy._on_orders]
+        strategy.stop()
+
+    assert exchange.bbo_callbacks == []
+    assert exchange.order_callbacks == []
@@ -18,10 +18,13 @@ def format_decimal(value: Union[Decimal, str, float], precision: int = 8) -> str
     """
     if isinstance(value, (str, float)):
         value = Decimal(str(value))
+    # 整数值直接转换，无需先补齐precision位0再去掉
+    if value.is_finite() and value == value.to_integral_value():
+        return str(int(value))
     return f"{value:.{precision}f}".rstrip('0').rstrip('.')
 
 
-def parse_decimal(value: Union[str, float, int]) -> Decimal:
+def parse_decimal(value: Union[Decimal, str, float, int]) -> Decimal:
     """
     解析为Decimal
     
@@ -31,5 +34,8 @@ def parse_decimal(value: Union[str, float, int]) -> Decimal:
     Returns:
         Decimal对象
     """
+    # Decimal不可变，直接返回，无需再经过字符串转换
+    if isinstance(value, Decimal):
+        return value
     return Decimal(str(value))
 
@@ -2,6 +2,7 @@
 日志配置
 """
 import sys
+import logging
 import warnings
 from loguru import logger
 from config.settings import get_settings
@@ -26,7 +27,9 @@ def setup_logger():
         sys.stdout,
         format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
         level=settings.log_level,
-        colorize=True
+        colorize=True,
+        # 日志经队列由后台线程写出，策略更新线程中记录日志不阻塞在控制台/文件I/O上
+        enqueue=True
     )
     
     # 添加文件输出
@@ -35,8 +38,29 @@ def setup_logger():
         rotation="00:00",
         retention="30 days",
         level=settings.log_level,
-        encoding="utf-8"
+        encoding="utf-8",
+        # 文件不需要颜色标记，省去每条日志的颜色解析
+        colorize=False,
+        enqueue=True
     )
+    
+    # 将标准库logging（如交易所客户端模块）的日志转发到loguru
+    # 只追加转发处理器，不移除宿主程序（如uvicorn）已安装的根处理器；重复调用时不重复添加
+    root_logger = logging.getLogger()
+    if not any(isinstance(handler, _InterceptHandler) for handler in root_logger.handlers):
+        root_logger.addHandler(_InterceptHandler())
+    root_logger.setLevel(settings.log_level)
+
+
+class _InterceptHandler(logging.Handler):
+    """把标准库logging记录转发给loguru"""
+    
+    def emit(self, record: logging.LogRecord):
+        try:
+            level = logger.level(record.levelname).name
+        except ValueError:
+            level = record.levelno
+        logger.opt(depth=6, exception=record.exc_info).log(level, record.getMessage())
 
 
 def get_logger(name: str = None):
@@ -44,4 +68,3 @@ def get_logger(name: str = None):
     if name:
         return logger.bind(name=name)
     return logger
-